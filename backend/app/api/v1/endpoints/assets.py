@@ -4,14 +4,11 @@ Endpoints para gestionar y servir archivos estáticos
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import FileResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from typing import List
 from pathlib import Path
 
-from app.core.database import get_db
-from app.models.asset import Asset
-from app.schemas.asset import AssetResponse
+from app.core.loaders import Loaders, get_loaders
+from app.schemas.asset import AssetResponse, ProjectAssetResponse
 
 router = APIRouter()
 
@@ -25,31 +22,27 @@ IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
 
 
-@router.get("/project/{project_id}", response_model=List[AssetResponse])
+@router.get("/project/{project_id}", response_model=List[ProjectAssetResponse])
 async def list_project_assets(
     project_id: str,
-    db: AsyncSession = Depends(get_db)
+    loaders: Loaders = Depends(get_loaders)
 ):
-    """Listar todos los assets de un proyecto"""
-    result = await db.execute(
-        select(Asset)
-        .where(Asset.project_id == project_id)
-        .order_by(Asset.created_at.desc())
-    )
-    assets = result.scalars().all()
-    return assets
+    """
+    Listar todos los assets de un proyecto
+    
+    Ordenados por escena y luego del más nuevo al más viejo; una sola
+    query (JOIN, cacheada por proyecto) sin importar la cantidad de escenas.
+    """
+    return await loaders.project_assets(project_id)
 
 
 @router.get("/{asset_id}", response_model=AssetResponse)
 async def get_asset(
     asset_id: str,
-    db: AsyncSession = Depends(get_db)
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Obtener un asset por ID"""
-    result = await db.execute(
-        select(Asset).where(Asset.id == asset_id)
-    )
-    asset = result.scalar_one_or_none()
+    asset = await loaders.asset.load(asset_id)
     
     if not asset:
         raise HTTPException(
@@ -63,8 +56,7 @@ async def get_asset(
 @router.post("/upload/{project_id}", response_model=AssetResponse)
 async def upload_asset(
     project_id: str,
-    file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
+    file: UploadFile = File(...)
 ):
     """Subir un asset al proyecto"""
     # TODO: Implementar lógica de guardado de archivo
@@ -2,25 +2,146 @@
 Generation Endpoints
 Endpoints para la generación de contenido con IA
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
 from fastapi.responses import StreamingResponse
-from typing import List, Dict, AsyncGenerator
+from typing import Any, List, Dict, AsyncGenerator, Literal
+import hashlib
 import uuid
 import json
 import asyncio
+import httpx
 from datetime import datetime
 
+from app.core import queries
+from app.core.config import settings
 from app.core.database import get_turso_client
+from app.core.cache import project_cache, get_project_row, get_project_scene_rows, get_project_asset_rows
+from app.core.concurrency import provider_concurrency, spawn_bounded, cancel_pending
+from app.core.http import download_to_file
+from app.core.image_cache import image_cache, image_cache_key, image_available, image_model
 from app.schemas.generation import (
     ScriptAnalysisRequest,
     ScriptAnalysisResponse,
     ImageGenerationRequest,
     ImageGenerationResponse
 )
+from app.services.image_batch import ImageRequestBatcher
 from app.services.llm_service import LLMService
+from app.services.video_completion_service import video_completion_service
 
 router = APIRouter()
 
+IMAGE_WIDTH = 1024
+IMAGE_HEIGHT = 768
+IMAGE_PROVIDERS = ("dalle", "aimlapi", "higgsfield", "gemini")
+
+# Qué escenas regenerar: sin imagen vigente, solo las fallidas/interrumpidas, o todas
+GenerationScope = Literal["missing", "failed", "all"]
+UNFINISHED_IMAGE_STATUSES = ("image_generating", "image_failed")
+
+
+def scene_image_cache_keys(provider: str, image_generator, project: dict, scenes: List[dict]):
+    """
+    Claves del cache de imágenes para cada escena.
+    
+    Returns:
+        Tupla (proveedor, modelo, dict scene_id → clave)
+    """
+    # Proveedores desconocidos usan DALL-E
+    cache_provider = provider if provider in IMAGE_PROVIDERS else "dalle"
+    cache_model = image_model(image_generator)
+    style = project.get("style", "cinematic")
+    keys = {
+        scene["id"]: image_cache_key(
+            cache_provider, cache_model, scene["image_prompt"], style, IMAGE_WIDTH, IMAGE_HEIGHT
+        )
+        for scene in scenes
+    }
+    return cache_provider, cache_model, keys
+
+
+def image_prompt_fingerprint(prompt: str, style: str) -> str:
+    """Huella del prompt y estilo con que se generó la imagen de una escena"""
+    raw = json.dumps([prompt or "", style or ""], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+async def scenes_needing_images(
+    turso_client,
+    project_id: str,
+    project: dict,
+    scenes: List[dict],
+    only: str
+) -> List[dict]:
+    """
+    Escenas que hay que (re)generar en esta corrida.
+    
+    Una escena tiene imagen vigente si tiene un asset de imagen completo,
+    cuyo archivo sigue disponible y que se generó con el prompt y estilo
+    actuales (los assets anteriores al checkpoint, sin huella, cuentan
+    como vigentes). Con only=missing se generan las que no la tienen, con
+    only=failed solo las que además quedaron fallidas o interrumpidas, y
+    con only=all todas.
+    """
+    if only == "all":
+        return list(scenes)
+    
+    style = project.get("style", "cinematic")
+    fingerprints = {
+        scene["id"]: image_prompt_fingerprint(scene["image_prompt"], style) for scene in scenes
+    }
+    current = set()
+    for asset in await get_project_asset_rows(turso_client, project_id):
+        scene_id = asset["scene_id"]
+        if scene_id in current or asset["type"] != "image" or asset["status"] != "completed":
+            continue
+        if not asset["url"] or not image_available(asset["url"]):
+            continue
+        try:
+            metadata = json.loads(asset["metadata"] or "{}")
+        except ValueError:
+            metadata = {}
+        fingerprint = metadata.get("prompt_fingerprint") if isinstance(metadata, dict) else None
+        if fingerprint is None or fingerprint == fingerprints.get(scene_id):
+            current.add(scene_id)
+    
+    pending = [scene for scene in scenes if scene["id"] not in current]
+    if only == "failed":
+        pending = [scene for scene in pending if scene.get("status") in UNFINISHED_IMAGE_STATUSES]
+    return pending
+
+
+def start_video_task_statement(scene_id: str, task_id: str, provider: str):
+    """
+    UPDATE que asigna una animación nueva a la escena.
+    
+    Limpia el video anterior: el estado se lee por task_id, y con el
+    video_status/video_url viejos la tarea nueva figuraría terminada.
+    """
+    return (
+        """UPDATE scenes
+           SET video_task_id = ?, video_provider = ?, video_status = ?, video_url = NULL, updated_at = ?
+           WHERE id = ?""",
+        [task_id, provider, "animating", datetime.utcnow().isoformat(), scene_id]
+    )
+
+
+def candidate_urls(result: Dict[str, Any]) -> List[str]:
+    """URLs remotas de las candidatas de una escena (las data: URLs no van a la metadata)"""
+    return [url for url in result.get("variants") or [] if url.startswith("http")]
+
+
+async def set_scenes_status(turso_client, project_id: str, scene_ids: List[str], scene_status: str):
+    """Checkpoint de generación: un solo UPDATE para varias escenas"""
+    if not scene_ids:
+        return
+    placeholders = ", ".join("?" * len(scene_ids))
+    await turso_client.execute(
+        f"UPDATE scenes SET status = ?, updated_at = ? WHERE id IN ({placeholders})",
+        [scene_status, datetime.utcnow().isoformat(), *scene_ids]
+    )
+    await project_cache.invalidate(project_id)
+
 
 @router.post("/analyze-script", response_model=ScriptAnalysisResponse)
 async def analyze_script(request: ScriptAnalysisRequest):
@@ -30,19 +151,14 @@ async def analyze_script(request: ScriptAnalysisRequest):
     turso_client = get_turso_client()
     
     # Verificar que el proyecto existe
-    result = await turso_client.execute(
-        "SELECT id, title, style, reference_prompt, duration_target FROM projects WHERE id = ?",
-        [request.project_id]
-    )
+    project = await get_project_row(turso_client, request.project_id)
     
-    if not result or len(result) == 0:
+    if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    project = result[0]
-    
     # Analizar el guión con LLM
     try:
         llm_service = LLMService()
@@ -60,16 +176,16 @@ async def analyze_script(request: ScriptAnalysisRequest):
             detail=f"Error al analizar guión con LLM: {str(e)}"
         )
     
-    # Guardar las escenas en la base de datos
-    for scene in scenes:
-        scene_id = str(uuid.uuid4())
-        await turso_client.execute(
+    # Guardar las escenas y actualizar el proyecto en un solo round trip
+    now = datetime.utcnow().isoformat()
+    statements = [
+        (
             """INSERT INTO scenes (
                 id, project_id, order_index, title, description,
                 dialogue, image_prompt, duration, notes, status, created_at
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             [
-                scene_id,
+                str(uuid.uuid4()),
                 request.project_id,
                 scene.order,
                 scene.title,
@@ -79,15 +195,20 @@ async def analyze_script(request: ScriptAnalysisRequest):
                 scene.duration,
                 scene.notes,
                 "pending",
-                datetime.utcnow().isoformat()
+                now
             ]
         )
+        for scene in scenes
+    ]
     
     # Actualizar el estado del proyecto
-    await turso_client.execute(
+    statements.append((
         "UPDATE projects SET status = ?, updated_at = ? WHERE id = ?",
-        ["scenes_ready", datetime.utcnow().isoformat(), request.project_id]
-    )
+        ["scenes_ready", now, request.project_id]
+    ))
+    
+    await turso_client.execute_batch(statements)
+    await project_cache.invalidate(request.project_id)
     
     return ScriptAnalysisResponse(
         project_id=request.project_id,
@@ -101,11 +222,20 @@ async def analyze_script(request: ScriptAnalysisRequest):
 async def generate_images(
     project_id: str,
     background_tasks: BackgroundTasks,
-    provider: str = "dalle"  # "dalle", "aimlapi", "higgsfield", "gemini"
+    provider: str = "dalle",  # "dalle", "aimlapi", "higgsfield", "gemini"
+    force: bool = False,
+    only: GenerationScope = "missing",
+    variants: int = Query(1, ge=1, le=4)
 ):
     """
-    Generar imágenes para todas las escenas del proyecto.
+    Generar imágenes para las escenas del proyecto.
     Soporta DALL-E (OpenAI), AIMLAPI (Flux), Higgsfield o Gemini (Nano Banana) como proveedores.
+    Por defecto se saltean las escenas que ya tienen una imagen vigente
+    (only=missing); only=failed reintenta solo las fallidas o interrumpidas
+    y only=all regenera todas. Las escenas con una imagen ya generada con
+    los mismos parámetros la reutilizan del cache; force=true lo ignora.
+    Con variants > 1 se piden varias candidatas por escena en el mismo
+    request; la primera queda como imagen y las demás en la metadata.
     """
     from app.services.image_service import ImageService
     from app.services.higgsfield_service import HiggsfieldService
@@ -120,24 +250,16 @@ async def generate_images(
     turso_client = get_turso_client()
     
     # Verificar que el proyecto existe
-    project_result = await turso_client.execute(
-        "SELECT id, title, style FROM projects WHERE id = ?",
-        [project_id]
-    )
+    project = await get_project_row(turso_client, project_id)
     
-    if not project_result or len(project_result) == 0:
+    if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    project = project_result[0]
-    
     # Obtener las escenas del proyecto
-    scenes_result = await turso_client.execute(
-        "SELECT id, image_prompt, title, order_index FROM scenes WHERE project_id = ? ORDER BY order_index",
-        [project_id]
-    )
+    scenes_result = await get_project_scene_rows(turso_client, project_id)
     
     if not scenes_result or len(scenes_result) == 0:
         raise HTTPException(
@@ -160,73 +282,93 @@ async def generate_images(
         print("📸 Using OpenAI DALL-E for image generation")
     
     storage = StorageService()
-    generated_count = 0
+    concurrency = provider_concurrency(provider, settings.image_provider_concurrency)
+    pending_scenes = await scenes_needing_images(turso_client, project_id, project, scenes_result, only)
+    skipped_count = len(scenes_result) - len(pending_scenes)
+    print(f"⚡ Generating {len(pending_scenes)} images ({skipped_count} skipped), {concurrency} at a time")
     
-    for scene in scenes_result:
+    # Imágenes ya generadas con los mismos parámetros (una sola query)
+    cache_provider, cache_model, cache_keys = scene_image_cache_keys(
+        provider, image_generator, project, pending_scenes
+    )
+    style = project.get("style", "cinematic")
+    cached_urls = {}
+    if settings.IMAGE_CACHE_ENABLED and not force:
         try:
-            print(f"🎨 Generating image for scene {scene['order_index']}: {scene['title']}")
-            # Generar imagen con el proveedor seleccionado
-            result = await image_generator.generate_image(
-                prompt=scene["image_prompt"],
-                width=1024,
-                height=768,
-                style=project.get("style", "cinematic")
-            )
-            print(f"✅ Image generated: {result}")
-            image_url = result.get("image_url") or result.get("url")
-            if not image_url:
-                print(f"❌ No image URL returned for scene {scene['order_index']}")
-                continue
-            # Nombre de archivo único
-            filename = f"scene_{project_id[:8]}_{scene['order_index']:02d}_{scene['id'][:8]}.png"
-            # Si el storage es supabase
-            if storage.provider == "supabase":
-                if image_url.startswith("data:"):
-                    final_url = await storage.upload_image_from_base64(image_url, filename)
-                else:
-                    final_url = await storage.upload_image_from_url(image_url, filename)
-                print(f"💾 Image uploaded to Supabase: {final_url}")
+            cached_urls = await image_cache.get_many(turso_client, cache_keys.values())
+        except Exception as e:
+            print(f"⚠️ Image cache unavailable: {e}")
+    cached_count = 0
+    # Escenas con el mismo prompt comparten request (DALL-E n, Gemini candidateCount)
+    batcher = ImageRequestBatcher(
+        image_generator,
+        [scene for scene in pending_scenes if cache_keys[scene["id"]] not in cached_urls],
+        IMAGE_WIDTH, IMAGE_HEIGHT, style, variants=variants
+    )
+    
+    async def generate_scene(scene) -> bool:
+        """Generar, subir y registrar la imagen de una escena"""
+        nonlocal cached_count
+        try:
+            cache_key = cache_keys[scene["id"]]
+            final_url = cached_urls.get(cache_key)
+            if final_url:
+                print(f"♻️ Reusing cached image for scene {scene['order_index']}: {final_url}")
+                result = {"success": True, "cached": True}
+                filename = final_url.rsplit("/", 1)[-1]
             else:
-                # ...existing code for local/gdrive...
-                import base64
-                from pathlib import Path
-                images_dir = Path("uploads/images")
-                images_dir.mkdir(parents=True, exist_ok=True)
-                file_path = images_dir / filename
-                if image_url.startswith("data:"):
-                    try:
-                        header, encoded = image_url.split(",", 1)
-                        image_bytes = base64.b64decode(encoded)
-                        with open(file_path, "wb") as f:
-                            f.write(image_bytes)
-                        final_url = f"/api/v1/assets/image/{filename}"
-                        print(f"💾 Image saved locally: {file_path} ({len(image_bytes)} bytes)")
-                    except Exception as e:
-                        print(f"❌ Error saving image locally: {e}")
-                        continue
-                elif image_url.startswith("http"):
-                    try:
-                        import httpx
-                        async with httpx.AsyncClient(timeout=30.0) as http_client:
-                            img_response = await http_client.get(image_url)
-                            if img_response.status_code == 200:
-                                image_bytes = img_response.content
-                                with open(file_path, "wb") as f:
-                                    f.write(image_bytes)
-                                final_url = f"/api/v1/assets/image/{filename}"
-                                print(f"💾 Image downloaded and saved: {file_path} ({len(image_bytes)} bytes)")
-                            else:
-                                print(f"⚠️ Failed to download image: {img_response.status_code}")
-                                continue
-                    except Exception as e:
-                        print(f"❌ Error downloading image: {e}")
-                        continue
+                print(f"🎨 Generating image for scene {scene['order_index']}: {scene['title']}")
+                # Generar imagen con el proveedor seleccionado
+                result = await batcher.generate(scene)
+                print(f"✅ Image generated: {result}")
+                image_url = result.get("image_url") or result.get("url")
+                if not image_url:
+                    print(f"❌ No image URL returned for scene {scene['order_index']}")
+                    return False
+                # Nombre de archivo único
+                filename = f"scene_{project_id[:8]}_{scene['order_index']:02d}_{scene['id'][:8]}_{cache_key[:8]}.png"
+                # Si el storage es supabase
+                if storage.provider == "supabase":
+                    if image_url.startswith("data:"):
+                        final_url = await storage.upload_image_from_base64(image_url, filename)
+                    else:
+                        final_url = await storage.upload_image_from_url(image_url, filename)
+                    print(f"💾 Image uploaded to Supabase: {final_url}")
                 else:
+                    # ...existing code for local/gdrive...
+                    import base64
+                    from pathlib import Path
+                    images_dir = Path("uploads/images")
+                    images_dir.mkdir(parents=True, exist_ok=True)
+                    file_path = images_dir / filename
+                    if image_url.startswith("data:"):
+                        try:
+                            header, encoded = image_url.split(",", 1)
+                            image_bytes = base64.b64decode(encoded)
+                            with open(file_path, "wb") as f:
+                                f.write(image_bytes)
+                            final_url = f"/api/v1/assets/image/{filename}"
+                            print(f"💾 Image saved locally: {file_path} ({len(image_bytes)} bytes)")
+                        except Exception as e:
+                            print(f"❌ Error saving image locally: {e}")
+                            return False
+                    elif image_url.startswith("http"):
+                        try:
+                            image_size = await download_to_file("downloads", image_url, file_path, timeout=30.0)
+                            final_url = f"/api/v1/assets/image/{filename}"
+                            print(f"💾 Image downloaded and saved: {file_path} ({image_size} bytes)")
+                        except httpx.HTTPStatusError as e:
+                            print(f"⚠️ Failed to download image: {e.response.status_code}")
+                            return False
+                        except Exception as e:
+                            print(f"❌ Error downloading image: {e}")
+                            return False
+                    else:
+                        print(f"❌ Could not process image for scene {scene['order_index']}")
+                        return False
+                if not final_url:
                     print(f"❌ Could not process image for scene {scene['order_index']}")
-                    continue
-            if not final_url:
-                print(f"❌ Could not process image for scene {scene['order_index']}")
-                continue
+                    return False
             asset_id = str(uuid.uuid4())
             print(f"💾 Saving asset to database...")
             print(f"   Asset ID: {asset_id}")
@@ -237,60 +379,97 @@ async def generate_images(
                 metadata_json = json.dumps({
                     "filename": filename,
                     "scene_title": scene["title"],
-                    "original_source": result.get("success", False)
+                    "original_source": result.get("success", False),
+                    "prompt_fingerprint": image_prompt_fingerprint(scene["image_prompt"], style),
+                    "variants": candidate_urls(result)
                 })
-                await turso_client.execute(
-                    """INSERT INTO assets (
-                        id, scene_id, type, url, status, metadata, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                    [
-                        asset_id,
-                        scene["id"],
-                        "image",
-                        final_url,
-                        "completed",
-                        metadata_json,
-                        datetime.utcnow().isoformat()
-                    ]
-                )
+                # Asset y estado de la escena se guardan juntos o no se guardan
+                async with turso_client.transaction() as tx:
+                    tx.queue(
+                        """INSERT INTO assets (
+                            id, scene_id, type, url, status, metadata, created_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                        [
+                            asset_id,
+                            scene["id"],
+                            "image",
+                            final_url,
+                            "completed",
+                            metadata_json,
+                            datetime.utcnow().isoformat()
+                        ]
+                    )
+                    tx.queue(
+                        "UPDATE scenes SET status = ? WHERE id = ?",
+                        ["image_ready", scene["id"]]
+                    )
+                await project_cache.invalidate(project_id)
                 print(f"✅ Asset saved to database: {asset_id}")
             except Exception as db_error:
                 print(f"❌ Database error: {db_error}")
                 import traceback
                 traceback.print_exc()
-                continue
-            await turso_client.execute(
-                "UPDATE scenes SET status = ? WHERE id = ?",
-                ["image_ready", scene["id"]]
-            )
-            generated_count += 1
+                return False
+            if cache_key in cached_urls:
+                cached_count += 1
+            elif settings.IMAGE_CACHE_ENABLED:
+                try:
+                    await image_cache.put(turso_client, cache_key, cache_provider, cache_model, final_url)
+                except Exception as cache_error:
+                    print(f"⚠️ Image cache not updated: {cache_error}")
+            return True
         except Exception as e:
             print(f"Error generating image for scene {scene['id']}: {e}")
-            continue
+            return False
+    
+    # Checkpoint: las escenas quedan en image_generating hasta terminar,
+    # así una corrida cortada se retoma con only=failed
+    await set_scenes_status(turso_client, project_id, [s["id"] for s in pending_scenes], "image_generating")
+    tasks = spawn_bounded(generate_scene, pending_scenes, concurrency)
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        await cancel_pending(tasks)
+        await batcher.close()
+    generated_count = sum(results)
+    failed_ids = [scene["id"] for scene, ok in zip(pending_scenes, results) if not ok]
+    await set_scenes_status(turso_client, project_id, failed_ids, "image_failed")
     
     # Actualizar estado del proyecto
-    if generated_count > 0:
+    if generated_count > 0 or not pending_scenes:
         await turso_client.execute(
             "UPDATE projects SET status = ?, updated_at = ? WHERE id = ?",
             ["images_ready", datetime.utcnow().isoformat(), project_id]
         )
+        await project_cache.invalidate(project_id)
     
     return {
         "project_id": project_id,
         "total_scenes": len(scenes_result),
         "images_generated": generated_count,
-        "status": "completed" if generated_count == len(scenes_result) else "partial"
+        "images_cached": cached_count,
+        "images_skipped": skipped_count,
+        "images_failed": len(failed_ids),
+        "status": "completed" if generated_count == len(pending_scenes) else "partial"
     }
 
 
 @router.get("/generate-images-stream/{project_id}")
 async def generate_images_stream(
     project_id: str,
-    provider: str = "dalle"
+    provider: str = "dalle",
+    force: bool = False,
+    only: GenerationScope = "missing",
+    variants: int = Query(1, ge=1, le=4)
 ):
     """
     Generar imágenes con Server-Sent Events (SSE) para progreso en tiempo real.
     El cliente recibe actualizaciones cada vez que se genera una imagen.
+    Retomable: las escenas con imagen vigente se saltean (only=missing),
+    only=failed reintenta solo las fallidas o interrumpidas y only=all
+    regenera todas. Las imágenes reutilizadas del cache llegan con
+    cached=true; force=true lo ignora. variants > 1 pide varias
+    candidatas por escena, como en /generate-images.
     """
     
     async def event_generator() -> AsyncGenerator[str, None]:
@@ -299,38 +478,38 @@ async def generate_images_stream(
         from app.services.dalle_service import DalleService
         from app.services.gemini_image_service import GeminiImageService
         from app.services.storage_service import StorageService
-        from app.core.config import settings
         import base64
         from pathlib import Path
         
         turso_client = get_turso_client()
         
         # Verificar que el proyecto existe
-        project_result = await turso_client.execute(
-            "SELECT id, title, style FROM projects WHERE id = ?",
-            [project_id]
-        )
+        project = await get_project_row(turso_client, project_id)
         
-        if not project_result or len(project_result) == 0:
+        if not project:
             yield f"data: {json.dumps({'type': 'error', 'message': 'Project not found'})}\n\n"
             return
         
-        project = project_result[0]
-        
         # Obtener las escenas del proyecto
-        scenes_result = await turso_client.execute(
-            "SELECT id, image_prompt, title, order_index FROM scenes WHERE project_id = ? ORDER BY order_index",
-            [project_id]
-        )
+        scenes_result = await get_project_scene_rows(turso_client, project_id)
         
         if not scenes_result or len(scenes_result) == 0:
             yield f"data: {json.dumps({'type': 'error', 'message': 'No scenes found'})}\n\n"
             return
         
-        total_scenes = len(scenes_result)
+        # Solo las escenas sin imagen vigente (o las que pida `only`)
+        pending_scenes = await scenes_needing_images(turso_client, project_id, project, scenes_result, only)
+        skipped_count = len(scenes_result) - len(pending_scenes)
+        # `scene` identifica la escena en el proyecto; los contadores van sobre las pendientes
+        scene_numbers = {scene["id"]: index + 1 for index, scene in enumerate(scenes_result)}
+        pending_positions = {scene["id"]: index + 1 for index, scene in enumerate(pending_scenes)}
+        total_scenes = len(pending_scenes)
         
         # Enviar evento inicial
-        yield f"data: {json.dumps({'type': 'start', 'total': total_scenes, 'message': f'Iniciando generación de {total_scenes} imágenes...'})}\n\n"
+        start_msg = f'Iniciando generación de {total_scenes} imágenes...'
+        if skipped_count:
+            start_msg = f'Iniciando generación de {total_scenes} imágenes ({skipped_count} ya generadas)...'
+        yield f"data: {json.dumps({'type': 'start', 'total': total_scenes, 'skipped': skipped_count, 'message': start_msg})}\n\n"
         
         # Seleccionar el servicio según el proveedor
         if provider == "higgsfield":
@@ -343,134 +522,176 @@ async def generate_images_stream(
             image_generator = DalleService()
         
         storage = StorageService()
+        concurrency = provider_concurrency(provider, settings.image_provider_concurrency)
         generated_count = 0
+        started_count = 0
+        cached_count = 0
+        
+        # Imágenes ya generadas con los mismos parámetros (una sola query)
+        cache_provider, cache_model, cache_keys = scene_image_cache_keys(
+            provider, image_generator, project, pending_scenes
+        )
+        style = project.get("style", "cinematic")
+        cached_urls = {}
+        if settings.IMAGE_CACHE_ENABLED and not force:
+            try:
+                cached_urls = await image_cache.get_many(turso_client, cache_keys.values())
+            except Exception as e:
+                print(f"⚠️ Image cache unavailable: {e}")
+        batcher = ImageRequestBatcher(
+            image_generator,
+            [scene for scene in pending_scenes if cache_keys[scene["id"]] not in cached_urls],
+            IMAGE_WIDTH, IMAGE_HEIGHT, style, variants=variants
+        )
         
         # Crear directorio de imágenes si no existe
         images_dir = Path("uploads/images")
         images_dir.mkdir(parents=True, exist_ok=True)
         
-        for index, scene in enumerate(scenes_result):
-            scene_number = index + 1
+        # Los workers publican sus eventos acá y se emiten en orden de llegada;
+        # None marca que una escena terminó
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def generate_scene(scene: dict) -> bool:
+            """Generar la imagen de una escena y publicar sus eventos"""
+            nonlocal generated_count, started_count, cached_count
+            scene_number = scene_numbers[scene["id"]]
+            started_count += 1
             
             # Enviar evento de progreso
             scene_title = scene['title']
-            progress_msg = f"Generando imagen {scene_number}/{total_scenes}: {scene_title}"
-            yield f"data: {json.dumps({'type': 'progress', 'current': scene_number, 'total': total_scenes, 'scene_title': scene_title, 'message': progress_msg})}\n\n"
+            progress_msg = f"Generando imagen {pending_positions[scene['id']]}/{total_scenes}: {scene_title} (escena {scene_number})"
+            await events.put({'type': 'progress', 'current': started_count, 'scene': scene_number, 'total': total_scenes, 'scene_title': scene_title, 'message': progress_msg})
             
             try:
-                # Generar imagen
-                result = await image_generator.generate_image(
-                    prompt=scene["image_prompt"],
-                    width=1024,
-                    height=768,
-                    style=project.get("style", "cinematic")
-                )
+                cache_key = cache_keys[scene["id"]]
+                result = {}
+                final_url = cached_urls.get(cache_key)
+                if final_url:
+                    # Misma imagen ya generada: no se vuelve a pedir al proveedor
+                    filename = final_url.rsplit("/", 1)[-1]
+                else:
+                    # Generar imagen
+                    result = await batcher.generate(scene)
                 
-                # Verificar si el servicio retornó un error explícito
-                if isinstance(result, dict) and result.get("success") is False:
-                    error_msg = result.get("error", "Error desconocido")
-                    error_code = result.get("error_code", "unknown")
+                    # Verificar si el servicio retornó un error explícito
+                    if isinstance(result, dict) and result.get("success") is False:
+                        error_msg = result.get("error", "Error desconocido")
+                        error_code = result.get("error_code", "unknown")
                     
-                    yield f"data: {json.dumps({'type': 'scene_error', 'scene': scene_number, 'error_code': error_code, 'message': f'❌ Escena {scene_number}: {error_msg}'})}\n\n"
+                        await events.put({'type': 'scene_error', 'scene': scene_number, 'error_code': error_code, 'message': f'❌ Escena {scene_number}: {error_msg}'})
                     
-                    # Si es quota agotada o sin créditos, abortar el resto
-                    if error_code in ('quota_exhausted', 'no_credits', 'no_api_key'):
-                        yield f"data: {json.dumps({'type': 'fatal_error', 'error_code': error_code, 'message': f'🛑 {error_msg}. No se pueden generar más imágenes.'})}\n\n"
-                        break
-                    continue
+                        # Si es quota agotada o sin créditos, abortar el resto
+                        if error_code in ('quota_exhausted', 'no_credits', 'no_api_key'):
+                            await events.put({'type': 'fatal_error', 'error_code': error_code, 'message': f'🛑 {error_msg}. No se pueden generar más imágenes.'})
+                        return
                 
-                image_url = result.get("image_url") or result.get("url")
+                    image_url = result.get("image_url") or result.get("url")
                 
-                if not image_url:
-                    yield f"data: {json.dumps({'type': 'scene_error', 'scene': scene_number, 'error_code': 'no_image', 'message': f'No se pudo generar imagen para escena {scene_number}'})}\n\n"
-                    continue
+                    if not image_url:
+                        await events.put({'type': 'scene_error', 'scene': scene_number, 'error_code': 'no_image', 'message': f'No se pudo generar imagen para escena {scene_number}'})
+                        return
                 
-                # Nombre de archivo único
-                filename = f"scene_{project_id[:8]}_{scene['order_index']:02d}_{scene['id'][:8]}.png"
+                    # Nombre de archivo único
+                    filename = f"scene_{project_id[:8]}_{scene['order_index']:02d}_{scene['id'][:8]}_{cache_key[:8]}.png"
                 
-                # Get image bytes
-                image_bytes = None
+                    # La imagen se baja a disco por chunks (nunca entera en memoria)
+                    file_path = images_dir / filename
                 
-                if image_url.startswith("data:"):
-                    try:
-                        header, encoded = image_url.split(",", 1)
-                        image_bytes = base64.b64decode(encoded)
-                    except Exception as e:
-                        yield f"data: {json.dumps({'type': 'scene_error', 'scene': scene_number, 'message': f'Error decodificando imagen: {str(e)}'})}\n\n"
-                        continue
+                    if image_url.startswith("data:"):
+                        try:
+                            header, encoded = image_url.split(",", 1)
+                            with open(file_path, "wb") as f:
+                                f.write(base64.b64decode(encoded))
+                        except Exception as e:
+                            await events.put({'type': 'scene_error', 'scene': scene_number, 'message': f'Error decodificando imagen: {str(e)}'})
+                            return
                         
-                elif image_url.startswith("http"):
-                    try:
-                        import httpx
-                        async with httpx.AsyncClient(timeout=30.0) as http_client:
-                            img_response = await http_client.get(image_url)
-                            if img_response.status_code == 200:
-                                image_bytes = img_response.content
-                    except Exception as e:
-                        yield f"data: {json.dumps({'type': 'scene_error', 'scene': scene_number, 'message': f'Error descargando imagen: {str(e)}'})}\n\n"
-                        continue
+                    elif image_url.startswith("http"):
+                        try:
+                            await download_to_file("downloads", image_url, file_path, timeout=30.0)
+                        except Exception as e:
+                            await events.put({'type': 'scene_error', 'scene': scene_number, 'message': f'Error descargando imagen: {str(e)}'})
+                            return
                 
-                if not image_bytes:
-                    yield f"data: {json.dumps({'type': 'scene_error', 'scene': scene_number, 'message': f'No se pudo obtener imagen para escena {scene_number}'})}\n\n"
-                    continue
+                    if not file_path.is_file() or file_path.stat().st_size == 0:
+                        await events.put({'type': 'scene_error', 'scene': scene_number, 'message': f'No se pudo obtener imagen para escena {scene_number}'})
+                        return
                 
-                # Store image and get final URL
-                final_url = None
+                    # Store image and get final URL
+                    final_url = None
                 
-                # Try Supabase Storage first (works in production)
-                if settings.SUPABASE_URL and settings.SUPABASE_SERVICE_KEY:
-                    try:
-                        from app.services.supabase_storage_service import SupabaseStorageService
-                        supabase_storage = SupabaseStorageService()
-                        supabase_url = await supabase_storage._upload_bytes(
-                            image_bytes, filename
-                        )
-                        if supabase_url:
-                            final_url = supabase_url
-                    except Exception as e:
-                        print(f"Supabase upload failed, falling back to local: {e}")
+                    # Try Supabase Storage first (works in production)
+                    if settings.SUPABASE_URL and settings.SUPABASE_SERVICE_KEY:
+                        try:
+                            from app.services.supabase_storage_service import SupabaseStorageService
+                            supabase_storage = SupabaseStorageService()
+                            supabase_url = await supabase_storage.upload_file(file_path, filename)
+                            if supabase_url:
+                                final_url = supabase_url
+                                file_path.unlink(missing_ok=True)
+                        except Exception as e:
+                            print(f"Supabase upload failed, falling back to local: {e}")
                 
-                # Fallback to local storage
-                if not final_url:
-                    file_path = images_dir / filename
-                    with open(file_path, "wb") as f:
-                        f.write(image_bytes)
-                    # Build URL dynamically based on environment
-                    api_host = settings.API_HOST
-                    api_port = settings.API_PORT
-                    if settings.ENV == "production":
-                        # In production, use relative path - frontend and backend on same domain or use CORS
-                        final_url = f"/api/v1/assets/image/{filename}"
-                    else:
-                        final_url = f"http://localhost:{api_port}/api/v1/assets/image/{filename}"
+                    # Fallback to local storage (el archivo ya está en disco)
+                    if not final_url:
+                        # Build URL dynamically based on environment
+                        api_host = settings.API_HOST
+                        api_port = settings.API_PORT
+                        if settings.ENV == "production":
+                            # In production, use relative path - frontend and backend on same domain or use CORS
+                            final_url = f"/api/v1/assets/image/{filename}"
+                        else:
+                            final_url = f"http://localhost:{api_port}/api/v1/assets/image/{filename}"
                 
                 # Guardar en base de datos
                 asset_id = str(uuid.uuid4())
-                metadata_json = json.dumps({"filename": filename, "scene_title": scene["title"]})
-                await turso_client.execute(
-                    """INSERT INTO assets (
-                        id, scene_id, type, url, status, metadata, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                    [
-                        asset_id,
-                        scene["id"],
-                        "image",
-                        final_url,
-                        "completed",
-                        metadata_json,
-                        datetime.utcnow().isoformat()
-                    ]
-                )
-                
-                await turso_client.execute(
-                    "UPDATE scenes SET status = ? WHERE id = ?",
-                    ["image_ready", scene["id"]]
-                )
+                metadata_json = json.dumps({
+                    "filename": filename,
+                    "scene_title": scene["title"],
+                    "prompt_fingerprint": image_prompt_fingerprint(scene["image_prompt"], style),
+                    "variants": candidate_urls(result)
+                })
+                try:
+                    async with turso_client.transaction() as tx:
+                        tx.queue(
+                            """INSERT INTO assets (
+                                id, scene_id, type, url, status, metadata, created_at
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                            [
+                                asset_id,
+                                scene["id"],
+                                "image",
+                                final_url,
+                                "completed",
+                                metadata_json,
+                                datetime.utcnow().isoformat()
+                            ]
+                        )
+                        tx.queue(
+                            "UPDATE scenes SET status = ? WHERE id = ?",
+                            ["image_ready", scene["id"]]
+                        )
+                    await project_cache.invalidate(project_id)
+                except Exception as db_error:
+                    await events.put({'type': 'scene_error', 'scene': scene_number, 'error_code': 'db_error', 'message': f'Error guardando escena {scene_number}: {str(db_error)[:200]}'})
+                    return
                 
                 generated_count += 1
+                cached = cache_key in cached_urls
+                if cached:
+                    cached_count += 1
+                elif settings.IMAGE_CACHE_ENABLED:
+                    try:
+                        await image_cache.put(turso_client, cache_key, cache_provider, cache_model, final_url)
+                    except Exception as cache_error:
+                        print(f"⚠️ Image cache not updated: {cache_error}")
                 
                 # Enviar evento de éxito para esta escena
-                yield f"data: {json.dumps({'type': 'scene_complete', 'scene': scene_number, 'total': total_scenes, 'image_url': final_url, 'message': f'✅ Imagen {scene_number}/{total_scenes} completada'})}\n\n"
+                label = '♻️ Imagen reutilizada' if cached else '✅ Imagen'
+                await events.put({'type': 'scene_complete', 'scene': scene_number, 'completed': generated_count, 'total': total_scenes, 'image_url': final_url, 'cached': cached, 'message': f'{label} {generated_count}/{total_scenes} completada (escena {scene_number})'})
+                completed_ids.add(scene["id"])
+                return True
                 
             except Exception as e:
                 error_str = str(e)
@@ -479,9 +700,9 @@ async def generate_images_stream(
                 # Detectar errores comunes por el mensaje
                 if "429" in error_str or "quota" in error_str.lower() or "rate" in error_str.lower():
                     error_code = "quota_exhausted"
-                    yield f"data: {json.dumps({'type': 'scene_error', 'scene': scene_number, 'error_code': error_code, 'message': f'❌ Quota agotada: {error_str[:200]}'})}\n\n"
-                    yield f"data: {json.dumps({'type': 'fatal_error', 'error_code': error_code, 'message': '🛑 Se agotó la quota de la API. No se pueden generar más imágenes.'})}\n\n"
-                    break
+                    await events.put({'type': 'scene_error', 'scene': scene_number, 'error_code': error_code, 'message': f'❌ Quota agotada: {error_str[:200]}'})
+                    await events.put({'type': 'fatal_error', 'error_code': error_code, 'message': '🛑 Se agotó la quota de la API. No se pueden generar más imágenes.'})
+                    return
                 elif "403" in error_str or "credits" in error_str.lower():
                     error_code = "no_credits"
                 elif "nsfw" in error_str.lower() or "safety" in error_str.lower():
@@ -489,18 +710,49 @@ async def generate_images_stream(
                 elif "timeout" in error_str.lower():
                     error_code = "timeout"
                 
-                yield f"data: {json.dumps({'type': 'scene_error', 'scene': scene_number, 'error_code': error_code, 'message': f'Error: {error_str[:200]}'})}\n\n"
-                continue
+                await events.put({'type': 'scene_error', 'scene': scene_number, 'error_code': error_code, 'message': f'Error: {error_str[:200]}'})
+        
+        async def run_scene(scene: dict):
+            try:
+                await generate_scene(scene)
+            finally:
+                events.put_nowait(None)
+        
+        # Checkpoint: image_generating hasta que cada escena termine; si el
+        # cliente se desconecta quedan así y only=failed las retoma
+        completed_ids = set()
+        await set_scenes_status(turso_client, project_id, [s["id"] for s in pending_scenes], "image_generating")
+        
+        # Hasta `concurrency` escenas en vuelo; un fatal_error cancela las que quedan
+        tasks = spawn_bounded(run_scene, pending_scenes, concurrency)
+        try:
+            finished = 0
+            while finished < total_scenes:
+                event = await events.get()
+                if event is None:
+                    finished += 1
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+                if event['type'] == 'fatal_error':
+                    break
+        finally:
+            await cancel_pending(tasks)
+            await batcher.close()
+        
+        # Las que no terminaron (error o canceladas por un fatal_error) quedan fallidas
+        failed_ids = [scene["id"] for scene in pending_scenes if scene["id"] not in completed_ids]
+        await set_scenes_status(turso_client, project_id, failed_ids, "image_failed")
         
         # Actualizar estado del proyecto
-        if generated_count > 0:
+        if generated_count > 0 or not pending_scenes:
             await turso_client.execute(
                 "UPDATE projects SET status = ?, updated_at = ? WHERE id = ?",
                 ["images_ready", datetime.utcnow().isoformat(), project_id]
             )
+            await project_cache.invalidate(project_id)
         
         # Enviar evento final
-        yield f"data: {json.dumps({'type': 'complete', 'generated': generated_count, 'total': total_scenes, 'message': f'✅ {generated_count}/{total_scenes} imágenes generadas'})}\n\n"
+        yield f"data: {json.dumps({'type': 'complete', 'generated': generated_count, 'cached': cached_count, 'skipped': skipped_count, 'failed': len(failed_ids), 'total': total_scenes, 'message': f'✅ {generated_count}/{total_scenes} imágenes generadas ({cached_count} del cache, {skipped_count} ya estaban)'})}\n\n"
     
     return StreamingResponse(
         event_generator(),
@@ -523,6 +775,38 @@ async def get_video_providers():
     return unified_video_service.list_providers()
 
 
+@router.get("/image-providers")
+async def get_image_providers():
+    """
+    Lista los proveedores de imagen y el estado de sus modelos
+    
+    Los modelos de Gemini con quota agotada o fallando aparecen con
+    healthy=false y los segundos que faltan para volver a probarlos.
+    """
+    from app.services.gemini_image_service import GeminiImageService
+    
+    gemini_models = GeminiImageService.model_health()
+    return {
+        "dalle": {
+            "name": "OpenAI DALL-E",
+            "available": bool(settings.OPENAI_API_KEY),
+        },
+        "gemini": {
+            "name": "Google Gemini (Nano Banana)",
+            "available": bool(settings.GOOGLE_AI_API_KEY) and any(m["healthy"] for m in gemini_models),
+            "models": gemini_models,
+        },
+        "higgsfield": {
+            "name": "Higgsfield",
+            "available": bool(settings.HIGGSFIELD_API_KEY_ID),
+        },
+        "aimlapi": {
+            "name": "AIMLAPI (Flux)",
+            "available": bool(settings.HIGGSFIELD_API_KEY_ID),
+        },
+    }
+
+
 @router.post("/animate-scene", response_model=Dict)
 async def animate_scene(
     scene_id: str,
@@ -572,6 +856,7 @@ async def animate_scene(
         "UPDATE scenes SET video_status = ?, updated_at = ? WHERE id = ?",
         ["animating", datetime.utcnow().isoformat(), scene_id]
     )
+    await project_cache.invalidate(scene["project_id"])
     
     try:
         print(f"🎬 Starting animation for scene {scene['order_index']}: {scene['title']} (Provider: {provider})")
@@ -602,9 +887,10 @@ async def animate_scene(
         print(f"✅ Animation task started: {task_id}")
         
         # Guardar task_id en la escena
-        await turso_client.execute(
-            "UPDATE scenes SET video_task_id = ?, video_provider = ? WHERE id = ?",
-            [task_id, provider, scene_id]
+        await turso_client.execute(*start_video_task_statement(scene_id, task_id, provider))
+        await project_cache.invalidate(scene["project_id"])
+        video_completion_service.track(
+            scene_id, scene["project_id"], task_id, provider, result.get("estimated_time")
         )
         
         return {
@@ -621,6 +907,7 @@ async def animate_scene(
             "UPDATE scenes SET video_status = ?, updated_at = ? WHERE id = ?",
             ["failed", datetime.utcnow().isoformat(), scene_id]
         )
+        await project_cache.invalidate(scene["project_id"])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Animation failed: {str(e)}"
@@ -632,48 +919,43 @@ async def get_animation_status(task_id: str, provider: str = "kling"):
     """
     Obtener el estado de una animación en progreso.
     
+    Responde desde la base: el video completion service es quien consulta
+    al proveedor y guarda el resultado en la escena.
+    
     Args:
         task_id: ID de la tarea
-        provider: Proveedor usado (kling, veo, etc.)
+        provider: Proveedor usado (kling, veo, etc.); se usa el de la escena
     """
-    from app.services.unified_video_service import unified_video_service
-    from app.services.storage_service import StorageService
+    turso_client = get_turso_client()
+    scene_result = await turso_client.execute(
+        queries.SCENE_BY_VIDEO_TASK,
+        [task_id]
+    )
     
-    try:
-        status = await unified_video_service.get_animation_status(task_id, provider)
-        
-        # Si el video está completo, descargarlo y subirlo a storage
-        if status.get("status") == "completed" and status.get("video_url"):
-            turso_client = get_turso_client()
-            
-            # Buscar la escena asociada
-            scene_result = await turso_client.execute(
-                "SELECT id, project_id FROM scenes WHERE video_task_id = ?",
-                [task_id]
-            )
-            
-            if scene_result and len(scene_result) > 0:
-                scene = scene_result[0]
-                video_url = status.get("video_url")
-                
-                # Actualizar la escena con la URL del video
-                await turso_client.execute(
-                    """UPDATE scenes 
-                       SET video_url = ?, video_status = ?, updated_at = ? 
-                       WHERE id = ?""",
-                    [video_url, "completed", datetime.utcnow().isoformat(), scene["id"]]
-                )
-                
-                print(f"✅ Video completed and saved for scene {scene['id']}")
-        
-        return status
-        
-    except Exception as e:
-        print(f"❌ Error checking animation status: {e}")
-        return {
-            "status": "error",
-            "error": str(e)
-        }
+    if not scene_result or len(scene_result) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Animation task not found"
+        )
+    
+    scene = scene_result[0]
+    video_status = scene.get("video_status")
+    if video_status not in ("completed", "failed"):
+        video_status = "processing"
+    
+    response = {
+        "task_id": task_id,
+        "scene_id": scene["id"],
+        "provider": scene.get("video_provider") or provider,
+        "status": video_status,
+    }
+    if video_status == "completed":
+        response["video_url"] = scene.get("video_url")
+    elif video_status == "processing":
+        next_check = video_completion_service.next_check_in(task_id)
+        if next_check is not None:
+            response["next_check_in"] = round(next_check)
+    return response
 
 
 @router.post("/animate-scenes/{project_id}")
@@ -709,11 +991,7 @@ async def animate_scenes(
     
     # Obtener escenas con sus imágenes desde la tabla assets
     scenes_result = await turso_client.execute(
-        """SELECT DISTINCT s.id, s.title, s.order_index, a.url as image_url
-           FROM scenes s
-           INNER JOIN assets a ON s.id = a.scene_id
-           WHERE s.project_id = ? AND a.type = 'image' AND a.status = 'completed'
-           ORDER BY s.order_index""",
+        queries.PROJECT_SCENE_IMAGES,
         [project_id]
     )
     
@@ -723,82 +1001,81 @@ async def animate_scenes(
             detail="No scenes with images found. Generate images first."
         )
     
-    # Actualizar estado del proyecto
-    await turso_client.execute(
-        "UPDATE projects SET status = ?, updated_at = ? WHERE id = ?",
-        ["animating", datetime.utcnow().isoformat(), project_id]
-    )
+    # Proyecto y escenas pasan a animating en un solo round trip
+    scene_ids = [scene["id"] for scene in scenes_result]
+    placeholders = ", ".join("?" * len(scene_ids))
+    now = datetime.utcnow().isoformat()
+    await turso_client.execute_batch([
+        ("UPDATE projects SET status = ?, updated_at = ? WHERE id = ?", ["animating", now, project_id]),
+        (f"UPDATE scenes SET status = ?, updated_at = ? WHERE id IN ({placeholders})", ["animating", now, *scene_ids]),
+    ])
+    await project_cache.invalidate(project_id)
     
-    animated_count = 0
-    failed_count = 0
-    tasks = []
+    positions = {scene["id"]: index + 1 for index, scene in enumerate(scenes_result)}
     
-    for scene in scenes_result:
+    async def submit(scene: dict) -> Dict:
+        """Iniciar la animación de una escena; devuelve el resultado del proveedor o el error"""
         try:
-            print(f"🎨 Animating scene {scene['order_index']}: {scene['title']}")
-            
-            # Actualizar estado de la escena
-            await turso_client.execute(
-                "UPDATE scenes SET status = ?, updated_at = ? WHERE id = ?",
-                ["animating", datetime.utcnow().isoformat(), scene["id"]]
-            )
-            
-            # Iniciar animación con el proveedor seleccionado
+            print(f"🎨 Animating scene {positions[scene['id']]}/{len(scenes_result)} (order {scene['order_index']}): {scene['title']}")
             result = await unified_video_service.animate_image(
                 image_url=scene["image_url"],
                 duration=duration,
                 motion_type=motion_type,
                 provider=provider
             )
-            
             if not result.get("success", True):
                 print(f"❌ Animation failed for scene {scene['order_index']}: {result.get('error')}")
-                failed_count += 1
-                await turso_client.execute(
-                    "UPDATE scenes SET status = ? WHERE id = ?",
-                    ["image_ready", scene["id"]]
-                )
-                continue
-            
-            task_id = result.get("task_id")
-            
-            if task_id:
-                # Guardar task_id y provider
-                await turso_client.execute(
-                    "UPDATE scenes SET video_task_id = ?, video_provider = ? WHERE id = ?",
-                    [task_id, provider, scene["id"]]
-                )
-                tasks.append({
-                    "scene_id": scene["id"],
-                    "scene_title": scene["title"],
-                    "task_id": task_id,
-                    "provider": provider
-                })
-                animated_count += 1
-                print(f"✅ Animation started for scene {scene['order_index']}: {task_id}")
-            else:
-                failed_count += 1
-                await turso_client.execute(
-                    "UPDATE scenes SET status = ? WHERE id = ?",
-                    ["image_ready", scene["id"]]
-                )
-                
+            return result
         except Exception as e:
             print(f"❌ Failed to animate scene {scene['order_index']}: {e}")
             import traceback
             traceback.print_exc()
-            failed_count += 1
-            await turso_client.execute(
-                "UPDATE scenes SET status = ? WHERE id = ?",
-                ["image_ready", scene["id"]]
-            )
+            return {"success": False, "error": str(e)}
+    
+    # Todas las escenas a la vez, hasta `concurrency` por proveedor
+    concurrency = provider_concurrency(provider, settings.video_provider_concurrency)
+    submissions = spawn_bounded(submit, scenes_result, concurrency)
+    try:
+        results = await asyncio.gather(*submissions)
+    finally:
+        await cancel_pending(submissions)
     
+    tasks = []
+    failed_ids = []
+    statements = []
+    for scene, result in zip(scenes_result, results):
+        task_id = result.get("task_id") if result.get("success", True) else None
+        if not task_id:
+            failed_ids.append(scene["id"])
+            continue
+        # Guardar task_id y provider
+        statements.append(start_video_task_statement(scene["id"], task_id, provider))
+        tasks.append({
+            "scene_id": scene["id"],
+            "scene_title": scene["title"],
+            "task_id": task_id,
+            "provider": provider
+        })
+        video_completion_service.track(scene["id"], project_id, task_id, provider, result.get("estimated_time"))
+        print(f"✅ Animation started for scene {scene['order_index']}: {task_id}")
+    
+    animated_count = len(tasks)
+    failed_count = len(failed_ids)
+    if failed_ids:
+        placeholders = ", ".join("?" * len(failed_ids))
+        statements.append((
+            f"UPDATE scenes SET status = ? WHERE id IN ({placeholders})",
+            ["image_ready", *failed_ids]
+        ))
     # Si todas fallaron, revertir estado del proyecto
     if animated_count == 0:
-        await turso_client.execute(
+        statements.append((
             "UPDATE projects SET status = ?, updated_at = ? WHERE id = ?",
             ["images_ready", datetime.utcnow().isoformat(), project_id]
-        )
+        ))
+    # Todos los resultados en un solo batch
+    await turso_client.execute_batch(statements)
+    await project_cache.invalidate(project_id)
     
     return {
         "project_id": project_id,
@@ -877,6 +1154,7 @@ async def prepare_for_editor(project_id: str):
         "UPDATE projects SET status = ?, updated_at = ? WHERE id = ?",
         ["ready_for_edit", datetime.utcnow().isoformat(), project_id]
     )
+    await project_cache.invalidate(project_id)
     
     return {
         "project_id": project_id,
@@ -2,11 +2,15 @@
 Projects Endpoints
 CRUD operations para proyectos usando Turso HTTP API
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional
 import uuid
 
-from app.core.database import turso_client
+from app.core import queries
+from app.core.database import get_turso_client
+from app.core.cache import project_cache, get_project_row
+from app.core.loaders import Loaders, get_loaders
+from app.core.pagination import decode_cursor, page_size, paginate
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
 
 router = APIRouter()
@@ -15,6 +19,8 @@ router = APIRouter()
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(project_data: ProjectCreate):
     """Crear un nuevo proyecto"""
+    turso_client = get_turso_client()
+    
     project_id = str(uuid.uuid4())
     
     try:
@@ -54,38 +60,63 @@ async def create_project(project_data: ProjectCreate):
 
 
 @router.get("/", response_model=List[ProjectResponse])
-async def list_projects(skip: int = 0, limit: int = 100):
-    """Listar todos los proyectos"""
+async def list_projects(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """
+    Listar todos los proyectos
+    
+    Paginación por cursor: pasar el header X-Next-Cursor de la respuesta
+    anterior como `cursor`. `skip` se mantiene por compatibilidad.
+    """
+    turso_client = get_turso_client()
+    limit = page_size(limit)
+    
     try:
-        result = await turso_client.execute(
-            "SELECT * FROM projects ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            [limit, skip]
-        )
+        if cursor:
+            created_at, project_id = decode_cursor(cursor, 2)
+            result = await turso_client.execute(
+                queries.PROJECTS_PAGE,
+                [created_at, project_id, limit + 1],
+                columnar=True
+            )
+        else:
+            result = await turso_client.execute(
+                queries.PROJECTS_FIRST_PAGE,
+                [limit + 1, skip],
+                columnar=True
+            )
         
-        if not result:
-            return []
+        page, _ = paginate(
+            result, limit,
+            key=lambda row: (row["created_at"], row["id"]),
+            response=response
+        )
         
-        return [ProjectResponse(**project) for project in result]
+        # Validar directamente desde las vistas de fila, sin un dict por proyecto
+        return [ProjectResponse.model_validate(project) for project in page]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing projects: {str(e)}")
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: str):
+async def get_project(project_id: str, loaders: Loaders = Depends(get_loaders)):
     """Obtener un proyecto por ID"""
     try:
-        result = await turso_client.execute(
-            "SELECT * FROM projects WHERE id = ?",
-            [project_id]
-        )
+        project = await loaders.project.load(project_id)
         
-        if not result or len(result) == 0:
+        if not project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Project not found"
             )
         
-        return ProjectResponse(**result[0])
+        return ProjectResponse(**project)
     except HTTPException:
         raise
     except Exception as e:
@@ -95,6 +126,8 @@ async def get_project(project_id: str):
 @router.patch("/{project_id}", response_model=ProjectResponse)
 async def update_project(project_id: str, project_data: ProjectUpdate):
     """Actualizar un proyecto"""
+    turso_client = get_turso_client()
+    
     try:
         # Build UPDATE query dynamically
         update_data = project_data.model_dump(exclude_unset=True)
@@ -108,17 +141,15 @@ async def update_project(project_id: str, project_data: ProjectUpdate):
             f"UPDATE projects SET {', '.join(set_clauses)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
             values
         )
+        await project_cache.invalidate(project_id)
         
         # Get updated project
-        result = await turso_client.execute(
-            "SELECT * FROM projects WHERE id = ?",
-            [project_id]
-        )
+        project = await get_project_row(turso_client, project_id)
         
-        if not result or len(result) == 0:
+        if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        return ProjectResponse(**result[0])
+        return ProjectResponse(**project)
     except HTTPException:
         raise
     except Exception as e:
@@ -128,11 +159,14 @@ async def update_project(project_id: str, project_data: ProjectUpdate):
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(project_id: str):
     """Eliminar un proyecto"""
+    turso_client = get_turso_client()
+    
     try:
         result = await turso_client.execute(
             "DELETE FROM projects WHERE id = ?",
             [project_id]
         )
+        await project_cache.invalidate(project_id)
         return None
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting project: {str(e)}")
@@ -1,35 +1,51 @@
 """
 Scenes Endpoints
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional
 
+from app.core import queries
 from app.core.database import get_turso_client
+from app.core.loaders import Loaders, get_loaders
+from app.core.pagination import decode_cursor, page_size, paginate
 from app.schemas.scene import SceneCreate, SceneResponse
 
 router = APIRouter()
 
 
 @router.get("/project/{project_id}")
-async def list_project_scenes(project_id: str):
-    """Listar todas las escenas de un proyecto"""
+async def list_project_scenes(
+    project_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    loaders: Loaders = Depends(get_loaders)
+):
+    """
+    Listar todas las escenas de un proyecto
+    
+    Sin `limit` ni `cursor` devuelve todas las escenas (cacheadas). Con
+    ellos pagina por (order_index, id); el siguiente cursor va en X-Next-Cursor.
+    """
     turso_client = get_turso_client()
     
+    if limit is None and cursor is None:
+        return await loaders.scenes_by_project.load(project_id)
+    
+    limit = page_size(limit)
+    order_index, scene_id = decode_cursor(cursor, 2) if cursor else (-1, "")
+    
     result = await turso_client.execute(
-        """SELECT id, project_id, order_index as 'order', title, description, dialogue, 
-                  image_prompt, duration, notes, status, 
-                  video_url, video_status, video_provider, video_task_id,
-                  created_at, updated_at 
-           FROM scenes 
-           WHERE project_id = ? 
-           ORDER BY order_index""",
-        [project_id]
+        queries.PROJECT_SCENES_PAGE,
+        [project_id, order_index, scene_id, limit + 1]
     )
     
-    if not result:
-        return []
-    
-    return result
+    page, _ = paginate(
+        result or [], limit,
+        key=lambda row: (row["order_index"], row["id"]),
+        response=response
+    )
+    return page
 
 
 @router.get("/{scene_id}")
@@ -57,41 +73,89 @@ async def get_scene(scene_id: str):
 
 
 @router.get("/{scene_id}/assets")
-async def get_scene_assets(scene_id: str):
-    """Obtener los assets (imágenes, videos) de una escena"""
+async def get_scene_assets(
+    scene_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """
+    Obtener los assets (imágenes, videos) de una escena
+    
+    Sin `limit` ni `cursor` devuelve todos. Con ellos pagina por
+    (created_at, id) descendente; el siguiente cursor va en X-Next-Cursor.
+    """
     turso_client = get_turso_client()
     
-    result = await turso_client.execute(
-        "SELECT id, scene_id, type, url, status, metadata, created_at FROM assets WHERE scene_id = ? ORDER BY created_at DESC",
-        [scene_id]
-    )
+    if limit is None and cursor is None:
+        result = await turso_client.execute(queries.SCENE_ASSETS, [scene_id])
+        return result if result else []
     
-    return result if result else []
+    limit = page_size(limit)
+    
+    if cursor:
+        created_at, asset_id = decode_cursor(cursor, 2)
+        result = await turso_client.execute(
+            queries.SCENE_ASSETS_PAGE,
+            [scene_id, created_at, asset_id, limit + 1]
+        )
+    else:
+        result = await turso_client.execute(
+            queries.SCENE_ASSETS_FIRST_PAGE,
+            [scene_id, limit + 1]
+        )
+    
+    page, _ = paginate(
+        result or [], limit,
+        key=lambda row: (row["created_at"], row["id"]),
+        response=response
+    )
+    return page
 
 
 @router.get("/project/{project_id}/assets")
-async def get_project_assets(project_id: str):
-    """Obtener todos los assets de un proyecto"""
+async def get_project_assets(
+    project_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    loaders: Loaders = Depends(get_loaders)
+):
+    """
+    Obtener todos los assets de un proyecto
+    
+    Sin `limit` ni `cursor` devuelve todos (cacheados). Con ellos pagina por
+    (scene_order, created_at DESC, id DESC); el siguiente cursor va en X-Next-Cursor.
+    """
     turso_client = get_turso_client()
     
-    # Obtener todos los scenes del proyecto primero
-    scenes_result = await turso_client.execute(
-        "SELECT id FROM scenes WHERE project_id = ?",
-        [project_id]
-    )
+    if limit is None and cursor is None:
+        # Assets con info de la escena (una sola query, cacheada por proyecto)
+        return await loaders.project_assets(project_id)
     
-    if not scenes_result:
-        return []
+    limit = page_size(limit)
+    keyset = ""
+    params: list = [project_id]
+    if cursor:
+        scene_order, created_at, asset_id = decode_cursor(cursor, 3)
+        keyset = """AND (s.order_index > ?
+                    OR (s.order_index = ? AND (a.created_at, a.id) < (?, ?)))"""
+        params += [scene_order, scene_order, created_at, asset_id]
     
-    # Obtener assets con info de la escena
     result = await turso_client.execute(
-        """SELECT a.id, a.scene_id, a.type, a.url, a.status, a.metadata, a.created_at,
+        f"""SELECT a.id, a.scene_id, a.type, a.url, a.status, a.metadata, a.created_at,
                   s.order_index as scene_order, s.title as scene_title
            FROM assets a
            INNER JOIN scenes s ON a.scene_id = s.id
-           WHERE s.project_id = ?
-           ORDER BY s.order_index, a.created_at DESC""",
-        [project_id]
+           WHERE s.project_id = ? {keyset}
+           ORDER BY s.order_index, a.created_at DESC, a.id DESC
+           LIMIT ?""",
+        params + [limit + 1]
     )
     
-    return result if result else []
+    page, _ = paginate(
+        result or [], limit,
+        key=lambda row: (row["scene_order"], row["created_at"], row["id"]),
+        response=response
+    )
+    return page
@@ -0,0 +1,78 @@
+"""
+Webhooks Endpoints
+Callbacks de proveedores: completan al instante los requests que se
+están esperando en el status poller
+"""
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from typing import Optional
+import json
+
+from app.core.status_poller import status_poller
+from app.core.webhooks import verify_signature, verify_token, webhook_requests
+# Registra "higgsfield" en el poller aunque todavía no se haya generado nada
+import app.services.higgsfield_service  # noqa: F401
+
+router = APIRouter()
+
+
+@router.post("/{provider}", status_code=status.HTTP_202_ACCEPTED)
+async def receive_webhook(
+    provider: str,
+    request: Request,
+    nonce: Optional[str] = Query(None),
+    token: Optional[str] = Query(None),
+    request_id: Optional[str] = Query(None),
+    x_webhook_signature: Optional[str] = Header(None)
+):
+    """
+    Recibir el aviso de un proveedor de que un request terminó
+
+    El body es el mismo status que devolvería el endpoint de status del
+    proveedor. Si nadie está esperando todavía ese request, el resultado
+    queda guardado unos minutos para cuando llegue. Un callback sin firma
+    solo puede resolver el request para el que se emitió su URL.
+    """
+    if not status_poller.is_registered(provider):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown provider: {provider}"
+        )
+
+    body = await request.body()
+    signed = verify_signature(body, x_webhook_signature)
+    if not signed and not verify_token(provider, nonce, token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook signature"
+        )
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook body must be JSON"
+        )
+
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook body must be a JSON object"
+        )
+
+    request_id = payload.get("request_id") or request_id
+    if not request_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Missing request_id"
+        )
+
+    if not signed and not webhook_requests.claim(provider, nonce, str(request_id)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Webhook URL was issued for another request"
+        )
+
+    matched = status_poller.resolve(provider, str(request_id), payload)
+    print(f"🔔 Webhook {provider}: request {request_id} → {payload.get('status')} ({'esperado' if matched else 'sin espera'})")
+    return {"accepted": True, "matched": matched}
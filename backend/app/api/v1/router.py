@@ -3,7 +3,7 @@ API Router - v1
 """
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import projects, scenes, assets, generation
+from app.api.v1.endpoints import projects, scenes, assets, generation, webhooks
 
 api_router = APIRouter()
 
@@ -18,6 +18,7 @@ async def api_info():
             "scenes": "/api/v1/scenes",
             "assets": "/api/v1/assets",
             "generation": "/api/v1/generation",
+            "webhooks": "/api/v1/webhooks",
             "docs": "/api/docs"
         }
     }
@@ -47,3 +48,9 @@ api_router.include_router(
     prefix="/generation",
     tags=["generation"]
 )
+
+api_router.include_router(
+    webhooks.router,
+    prefix="/webhooks",
+    tags=["webhooks"]
+)
@@ -0,0 +1,193 @@
+"""
+Read-through cache for project and scene rows
+Cache en proceso (LRU + TTL) con invalidación por versión de proyecto
+y un tier opcional en Redis para compartir entre workers de uvicorn
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import json
+import time
+
+from app.core import queries
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except Exception:  # pragma: no cover - redis es opcional
+    aioredis = None
+
+
+class ProjectCache:
+    """
+    Versioned read-through cache keyed by project id.
+
+    Every cached value lives under `<namespace>:<project_id>:<version>`.
+    Invalidating a project bumps its version, so all of its entries become
+    unreachable at once without having to enumerate them; the stale
+    entries are dropped later by LRU or TTL eviction.
+    """
+
+    KEY_PREFIX = "heymake:cache"
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0, redis_url: str = ""):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._redis = None
+        self.hits = 0
+        self.misses = 0
+
+        if redis_url:
+            if aioredis is None:
+                print("⚠️ Paquete redis no instalado, el cache será solo local")
+            else:
+                self._redis = aioredis.from_url(redis_url, decode_responses=True)
+
+    def _version_key(self, project_id: str) -> str:
+        return f"{self.KEY_PREFIX}:version:{project_id}"
+
+    async def _version(self, project_id: str) -> int:
+        """Current version of a project, shared through Redis when available"""
+        if self._redis is not None:
+            try:
+                version = await self._redis.get(self._version_key(project_id))
+                return int(version or 0)
+            except Exception as e:
+                print(f"⚠️ Redis cache no disponible: {e}")
+        return self._versions.get(project_id, 0)
+
+    def _get_local(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _set_local(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        project_id: str,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached value or load it, store it and return it"""
+        version = await self._version(project_id)
+        key = f"{namespace}:{project_id}:{version}"
+
+        found, value = self._get_local(key)
+        if found:
+            self.hits += 1
+            return value
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(f"{self.KEY_PREFIX}:{key}")
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._set_local(key, value)
+                    self.hits += 1
+                    return value
+            except Exception as e:
+                print(f"⚠️ Redis cache no disponible: {e}")
+
+        self.misses += 1
+        value = await loader()
+        if value is None:
+            return value
+
+        self._set_local(key, value)
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    f"{self.KEY_PREFIX}:{key}",
+                    json.dumps(value, default=str),
+                    ex=max(1, int(self.ttl))
+                )
+            except Exception as e:
+                print(f"⚠️ Redis cache no disponible: {e}")
+        return value
+
+    async def invalidate(self, project_id: Optional[str]):
+        """Drop every cached value of a project by bumping its version"""
+        if not project_id:
+            return
+        self._versions[project_id] = self._versions.get(project_id, 0) + 1
+        if self._redis is not None:
+            try:
+                version_key = self._version_key(project_id)
+                await self._redis.incr(version_key)
+                await self._redis.expire(version_key, 86400)
+            except Exception as e:
+                print(f"⚠️ Redis cache no disponible: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for diagnostics"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "redis": self._redis is not None,
+        }
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+
+
+project_cache = ProjectCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL,
+    redis_url=settings.REDIS_URL if settings.CACHE_REDIS_ENABLED else ""
+)
+
+
+# Filas cacheadas más leídas por la API
+
+async def get_project_row(turso_client, project_id: str) -> Optional[dict]:
+    """Fila completa del proyecto, o None si no existe"""
+    async def load():
+        result = await turso_client.execute(
+            queries.PROJECT_BY_ID,
+            [project_id]
+        )
+        return result[0] if result else None
+
+    if not settings.CACHE_ENABLED:
+        return await load()
+    return await project_cache.get_or_load("project", project_id, load)
+
+
+async def get_project_scene_rows(turso_client, project_id: str) -> List[dict]:
+    """Escenas del proyecto ordenadas por order_index"""
+    async def load():
+        return await turso_client.execute(
+            queries.PROJECT_SCENES,
+            [project_id]
+        ) or []
+
+    if not settings.CACHE_ENABLED:
+        return await load()
+    return await project_cache.get_or_load("scenes", project_id, load)
+
+
+async def get_project_asset_rows(turso_client, project_id: str) -> List[dict]:
+    """Assets de todas las escenas del proyecto, con info de la escena"""
+    async def load():
+        return await turso_client.execute(
+            queries.PROJECT_ASSETS,
+            [project_id]
+        ) or []
+
+    if not settings.CACHE_ENABLED:
+        return await load()
+    return await project_cache.get_or_load("assets", project_id, load)
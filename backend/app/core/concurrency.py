@@ -0,0 +1,82 @@
+"""
+Bounded fan-out helpers
+Ejecutan trabajo por escena en paralelo con un límite de concurrencia
+por proveedor, y serializan el trabajo sobre una misma key
+"""
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, List, TypeVar
+import asyncio
+
+from app.core.config import settings
+
+
+T = TypeVar("T")
+
+
+def provider_concurrency(provider: str, overrides: Dict[str, int]) -> int:
+    """Concurrency limit for a provider: its override or MAX_CONCURRENT_TASKS"""
+    limit = overrides.get((provider or "").lower(), settings.MAX_CONCURRENT_TASKS)
+    return max(1, limit)
+
+
+def spawn_bounded(
+    worker: Callable[[T], Awaitable[Any]],
+    items: Iterable[T],
+    limit: int
+) -> List[asyncio.Task]:
+    """
+    Start one task per item, at most `limit` of them running at once.
+
+    Tasks are created upfront and wait on a shared semaphore, so results
+    can be consumed in completion order with `asyncio.as_completed` or all
+    together with `asyncio.gather`.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T):
+        async with semaphore:
+            return await worker(item)
+
+    return [asyncio.create_task(run(item)) for item in items]
+
+
+async def cancel_pending(tasks: Iterable[asyncio.Task]):
+    """Cancel the tasks still running and wait until they are gone"""
+    tasks = list(tasks)
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class KeyedLock:
+    """
+    One asyncio.Lock per key, created on first use.
+
+    Each key's lock counts its holders and waiters and is dropped when
+    the last one leaves, so the map stays small without ever handing two
+    concurrent callers different locks for the same key.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, List[Any]] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._locks
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
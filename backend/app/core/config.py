@@ -1,7 +1,7 @@
 """
 Application Configuration
 """
-from typing import List
+from typing import Dict, List, Tuple
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -22,9 +22,44 @@ class Settings(BaseSettings):
     DATABASE_AUTH_TOKEN: str = ""
     DATABASE_ECHO: bool = False
     
+    # Turso HTTP transport (pool shared by all requests)
+    DATABASE_HTTP2: bool = True
+    DATABASE_MAX_CONNECTIONS: int = 20
+    DATABASE_MAX_KEEPALIVE: int = 10
+    DATABASE_KEEPALIVE_EXPIRY: float = 30.0  # segundos
+    DATABASE_TIMEOUT: float = 30.0  # segundos
+    DATABASE_POOL_TIMEOUT: float = 10.0  # segundos esperando una conexión libre
+    
+    # Réplica embebida (opcional): lecturas desde un SQLite local sincronizado
+    DATABASE_REPLICA_PATH: str = ""  # ej: "replica.db"; vacío = desactivada
+    DATABASE_REPLICA_SYNC_INTERVAL: float = 60.0  # segundos; 0 = solo sync tras escrituras
+    DATABASE_AUTO_MIGRATE: bool = True  # aplicar migraciones pendientes al iniciar
+    DATABASE_SLOW_QUERY_MS: float = 500.0  # loguear round trips más lentos; 0 = desactivado
+    
+    # Clientes HTTP compartidos para APIs de proveedores (un pool por proveedor)
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 50
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60.0  # segundos
+    HTTP_CLIENT_RETRIES: int = 2  # reintentos de conexión (nunca de requests ya enviados)
+    HTTP_STREAM_CHUNK_SIZE: int = 64 * 1024  # bytes en memoria por descarga/subida en curso
+    
     # Redis (optional for production without workers)
     REDIS_URL: str = ""
     
+    # Read-through cache de proyectos/escenas
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL: float = 30.0  # segundos
+    CACHE_REDIS_ENABLED: bool = False  # compartir el cache entre workers vía REDIS_URL
+    
+    # Rate limit de proveedores: "proveedor=requests/segundos"; "proveedor:status=..."
+    # es el bucket aparte de los status checks (sin él usan el límite del proveedor)
+    RATE_LIMITS: str = "dalle=5/60,sora=5/60,gemini=10/60,veo=10/60,higgsfield=60/60,kling=20/60,veo:status=120/60,sora:status=60/60,kling:status=120/60,higgsfield:status=120/60"
+    RATE_LIMIT_REDIS_ENABLED: bool = False  # compartir los buckets entre workers vía REDIS_URL
+    RATE_LIMIT_MAX_WAIT: float = 120.0  # segundos máximos esperando un token
+    RATE_LIMIT_MAX_RETRIES: int = 2  # reintentos tras un 429 (respetando Retry-After)
+    
     # Celery (optional - only needed for background tasks)
     CELERY_BROKER_URL: str = ""
     CELERY_RESULT_BACKEND: str = ""
@@ -69,6 +104,30 @@ class Settings(BaseSettings):
     
     # Processing
     MAX_CONCURRENT_TASKS: int = 3
+    IMAGE_PROVIDER_CONCURRENCY: str = ""  # overrides por proveedor, ej: "higgsfield=8,gemini=2"
+    VIDEO_PROVIDER_CONCURRENCY: str = ""  # ídem para animaciones, ej: "veo=4,kling=8"
+    IMAGE_CACHE_ENABLED: bool = True  # reutilizar imágenes con mismo prompt/estilo/tamaño/proveedor
+    IMAGE_CACHE_MAX_ENTRIES: int = 5000
+    SOURCE_IMAGE_CACHE_DIR: str = "uploads/cache/source_images"  # imágenes de entrada de Veo, ya en base64
+    SOURCE_IMAGE_CACHE_MAX_MB: int = 512
+    SOURCE_IMAGE_CACHE_TTL: float = 300.0  # segundos antes de revalidar con ETag/If-Modified-Since
+    MODEL_QUOTA_COOLDOWN: float = 3600.0  # segundos sin usar un modelo con quota agotada (si no informa retryDelay)
+    MODEL_ERROR_COOLDOWN: float = 60.0
+    MODEL_ERROR_THRESHOLD: int = 3  # errores seguidos antes de pausar un modelo
+    MODEL_MAX_COOLDOWN: float = 21600.0
+    STATUS_POLL_INITIAL_INTERVAL: float = 2.0  # segundos hasta el primer status check
+    STATUS_POLL_MAX_INTERVAL: float = 15.0
+    STATUS_POLL_BACKOFF: float = 1.5
+    STATUS_POLL_JITTER: float = 0.2  # ±20% sobre cada intervalo
+    WEBHOOK_BASE_URL: str = ""  # URL pública de esta API; vacío = sin webhooks, solo polling
+    WEBHOOK_SECRET: str = ""  # vacío = usa SECRET_KEY
+    WEBHOOK_POLL_FALLBACK: float = 30.0  # segundos sin callback antes de empezar a consultar
+    VIDEO_COMPLETION_ENABLED: bool = False  # True solo con un único proceso de API; si no, worker aparte (python -m app.services.video_completion_service)
+    VIDEO_POLL_MIN_INTERVAL: float = 5.0
+    VIDEO_POLL_MAX_INTERVAL: float = 60.0
+    VIDEO_DEFAULT_ESTIMATED_TIME: float = 60.0  # segundos, si el proveedor no informa estimated_time
+    VIDEO_TASK_TIMEOUT: float = 1800.0  # después de esto la animación queda failed
+    VIDEO_COMPLETION_RESYNC: float = 60.0  # cada cuánto se buscan en la base animaciones sin seguir
     VIDEO_OUTPUT_FORMAT: str = "mp4"
     VIDEO_QUALITY: str = "high"
     
@@ -87,9 +146,52 @@ class Settings(BaseSettings):
         """Parse allowed image formats into a list"""
         return [fmt.strip() for fmt in self.ALLOWED_IMAGE_FORMATS.split(",")]
     
+    @property
+    def provider_rate_limits(self) -> Dict[str, Tuple[int, float]]:
+        """Parse RATE_LIMITS into provider → (requests, period seconds)"""
+        limits = {}
+        for name, value in parse_provider_pairs(self.RATE_LIMITS).items():
+            requests, _, period = value.partition("/")
+            try:
+                limits[name] = (int(requests), float(period or 1))
+            except ValueError:
+                continue
+        return limits
+    
+    @property
+    def image_provider_concurrency(self) -> Dict[str, int]:
+        """Parse per-provider image concurrency overrides into a dict"""
+        return parse_provider_limits(self.IMAGE_PROVIDER_CONCURRENCY)
+    
+    @property
+    def video_provider_concurrency(self) -> Dict[str, int]:
+        """Parse per-provider video concurrency overrides into a dict"""
+        return parse_provider_limits(self.VIDEO_PROVIDER_CONCURRENCY)
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
+def parse_provider_pairs(spec: str) -> Dict[str, str]:
+    """Parse "provider=value,provider=value" into a dict"""
+    pairs = {}
+    for entry in spec.split(","):
+        name, _, value = entry.partition("=")
+        if name.strip() and value.strip():
+            pairs[name.strip().lower()] = value.strip()
+    return pairs
+
+
+def parse_provider_limits(spec: str) -> Dict[str, int]:
+    """Parse "provider=limit,provider=limit" into a dict, ignoring bad entries"""
+    limits = {}
+    for name, value in parse_provider_pairs(spec).items():
+        try:
+            limits[name] = int(value)
+        except ValueError:
+            continue
+    return limits
+
+
 settings = Settings()
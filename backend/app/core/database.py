@@ -4,73 +4,515 @@ Using Turso (LibSQL) for serverless SQLite via HTTP API
 """
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from typing import AsyncGenerator
+from collections.abc import Mapping
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import base64
+import time
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import query_metrics
 
 # For Turso, we use httpx to interact with their HTTP API
 # This is simpler than compiling libsql native bindings
 
+
+class Row(Mapping):
+    """Read-only mapping view over one row of a ResultSet"""
+    
+    __slots__ = ("_index", "_values")
+    
+    def __init__(self, index: Dict[str, int], values: list):
+        self._index = index
+        self._values = values
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._index[key]]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __repr__(self) -> str:
+        return f"Row({dict(self)!r})"
+
+
+class ResultSet(Sequence):
+    """
+    Columnar query result.
+    
+    Keeps the row lists exactly as decoded from the Turso response and a
+    single column index shared by every row. Indexing returns a lightweight
+    `Row` view instead of building a dict per row.
+    """
+    
+    __slots__ = ("columns", "rows", "_index")
+    
+    def __init__(self, columns: Sequence[str], rows: List[list]):
+        self.columns = tuple(columns)
+        self.rows = rows
+        self._index = {name: i for i, name in enumerate(self.columns)}
+    
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return [Row(self._index, values) for values in self.rows[i]]
+        return Row(self._index, self.rows[i])
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def column(self, name: str) -> list:
+        """All values of a single column"""
+        i = self._index[name]
+        return [values[i] for values in self.rows]
+    
+    def dicts(self) -> List[dict]:
+        """Materialize every row as a dict"""
+        return [dict(zip(self.columns, values)) for values in self.rows]
+
+
 class TursoClient:
     """Simple HTTP client for Turso API"""
     
-    def __init__(self, url: str, auth_token: str):
+    def __init__(
+        self,
+        url: str,
+        auth_token: str,
+        http2: bool = False,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        pool_timeout: float = 10.0
+    ):
         # Convert libsql:// to https://
         self.base_url = url.replace("libsql://", "https://")
         self.auth_token = auth_token
+        self.max_connections = max_connections
+        
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("⚠️ Paquete h2 no instalado, Turso usará HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+        
         self.client = httpx.AsyncClient(
             base_url=self.base_url,
             headers={
                 "Authorization": f"Bearer {auth_token}",
                 "Content-Type": "application/json"
             },
-            timeout=30.0
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(timeout, pool=pool_timeout)
         )
+        
+        # Parser de la forma de respuesta detectada (lista u objeto), None hasta la primera
+        self._parse_results: Optional[Callable[[Any, bool], List[Union[List[dict], ResultSet]]]] = None
+        
+        # Métricas de saturación del pool
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._requests_total = 0
+        self._saturated_total = 0
+        self._pool_timeouts = 0
+        self._request_seconds = 0.0
+    
+    async def _post(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        """POST through the shared pool, tracking how close it runs to its limits"""
+        if self._in_flight >= self.max_connections:
+            # Con HTTP/1.1 este request espera una conexión libre
+            self._saturated_total += 1
+        self._in_flight += 1
+        self._requests_total += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        
+        start = time.perf_counter()
+        try:
+            return await self.client.post(url, json=payload)
+        except httpx.PoolTimeout:
+            self._pool_timeouts += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._request_seconds += time.perf_counter() - start
     
-    async def execute(self, sql: str, parameters: list = None):
-        """Execute SQL via Turso HTTP API"""
-        payload = {
-            "statements": [sql] if not parameters else [{"q": sql, "params": parameters}]
+    def pool_stats(self) -> Dict[str, Any]:
+        """Snapshot of the HTTP pool usage"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "requests_total": self._requests_total,
+            "saturated_total": self._saturated_total,
+            "pool_timeouts": self._pool_timeouts,
+            "avg_request_ms": round(
+                self._request_seconds / self._requests_total * 1000, 2
+            ) if self._requests_total else 0.0,
         }
-        response = await self.client.post("/", json=payload)
-        response.raise_for_status()
-        data = response.json()
+    
+    @staticmethod
+    def _statement(sql: str, parameters: list = None):
+        """Build a statement entry for the Turso HTTP payload"""
+        return sql if not parameters else {"q": sql, "params": parameters}
+    
+    @staticmethod
+    def _rows(result: dict, columnar: bool = False) -> Union[List[dict], ResultSet]:
+        """Convert a single statement result into a list of dicts or a ResultSet"""
+        if "error" in result:
+            raise Exception(result["error"])
+        
+        columns = result.get("columns", [])
+        rows = result.get("rows", [])
+        
+        if columnar:
+            return ResultSet(columns, rows)
         
+        # Convert rows to list of dicts
+        return [dict(zip(columns, row)) for row in rows]
+    
+    async def execute(self, sql: str, parameters: list = None, columnar: bool = False):
+        """
+        Execute SQL via Turso HTTP API
+        
+        Con columnar=True devuelve un ResultSet en lugar de una lista de dicts
+        """
+        results = await self.execute_batch([(sql, parameters)], columnar=columnar)
+        return results[0] if results else (ResultSet([], []) if columnar else [])
+    
+    async def execute_batch(
+        self,
+        statements: Sequence[Tuple[str, Optional[list]]],
+        columnar: bool = False
+    ) -> List[Union[List[dict], ResultSet]]:
+        """
+        Execute several parameterized statements in a single HTTP request.
+        
+        Turso runs the statements in order and returns one result per
+        statement, so N writes cost one round trip instead of N.
+        
+        Args:
+            statements: Lista de tuplas (sql, parameters)
+            columnar: Devolver un ResultSet por statement en lugar de dicts
+        
+        Returns:
+            Lista con las filas de cada statement, en el mismo orden
+        """
+        if not statements:
+            return []
+        
+        sqls = [sql for sql, _ in statements]
+        start = time.perf_counter()
+        try:
+            response = await self._post("/", {
+                "statements": [self._statement(sql, params) for sql, params in statements]
+            })
+            response.raise_for_status()
+            results = self._results(response.json(), len(statements), columnar)
+        except Exception:
+            query_metrics.observe_error(sqls)
+            raise
+        
+        query_metrics.observe(
+            sqls,
+            time.perf_counter() - start,
+            [len(rows) for rows in results],
+            len(response.content)
+        )
+        return results
+    
+    def _list_results(self, data: Any, columnar: bool) -> List[Union[List[dict], ResultSet]]:
+        """New format: array containing one object per statement"""
+        results = []
+        for entry in data:
+            if "error" in entry:
+                raise Exception(entry["error"])
+            results.append(self._rows(entry.get("results", {}), columnar))
+        return results
+    
+    def _object_results(self, data: Any, columnar: bool) -> List[Union[List[dict], ResultSet]]:
+        """Old format: object with "results" array"""
+        return [self._rows(result, columnar) for result in data["results"]]
+    
+    def _results(self, data: Any, count: int, columnar: bool) -> List[Union[List[dict], ResultSet]]:
+        """Split a Turso HTTP response into one result per statement"""
         # Parse Turso response format
-        # Turso returns: [{"results": {"columns": [...], "rows": [[...]]}}]
-        if isinstance(data, list) and len(data) > 0:
-            # New format: array containing objects with "results" key
-            result = data[0].get("results", {})
-            if "error" in result:
-                raise Exception(result["error"])
-            
-            columns = result.get("columns", [])
-            rows = result.get("rows", [])
-            
-            # Convert rows to list of dicts
-            return [dict(zip(columns, row)) for row in rows]
-        elif "results" in data and len(data["results"]) > 0:
-            # Old format: object with "results" array
-            result = data["results"][0]
-            if "error" in result:
-                raise Exception(result["error"])
-            
-            columns = result.get("columns", [])
-            rows = result.get("rows", [])
-            
-            # Convert rows to list of dicts
-            return [dict(zip(columns, row)) for row in rows]
+        # Turso returns: [{"results": {"columns": [...], "rows": [[...]]}}, ...]
+        # La forma se detecta una vez por cliente; si el parser cacheado no
+        # entiende una respuesta (p. ej. un error top-level como objeto) se
+        # vuelve a detectar
+        if self._parse_results is not None:
+            try:
+                return self._parse_results(data, columnar)
+            except (TypeError, KeyError, AttributeError):
+                pass
         
-        return []
+        if isinstance(data, list):
+            self._parse_results = self._list_results
+        elif isinstance(data, dict) and "error" in data:
+            raise Exception(data["error"])
+        elif isinstance(data, dict) and "results" in data:
+            self._parse_results = self._object_results
+        else:
+            return [ResultSet([], []) if columnar else [] for _ in range(count)]
+        return self._parse_results(data, columnar)
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["TursoTransaction"]:
+        """
+        Transacción interactiva sobre un stream de Turso.
+        
+        Commit al salir del bloque, rollback si se lanza una excepción:
+        
+            async with turso_client.transaction() as tx:
+                tx.queue("INSERT INTO assets ...", [...])
+                tx.queue("UPDATE scenes SET status = ? WHERE id = ?", [...])
+        """
+        tx = TursoTransaction(self)
+        try:
+            yield tx
+        except BaseException:
+            await tx.rollback()
+            raise
+        else:
+            await tx.commit()
     
     async def close(self):
         await self.client.aclose()
 
-# Create Turso client
-turso_client = None
-if settings.DATABASE_URL.startswith("libsql://"):
-    turso_client = TursoClient(settings.DATABASE_URL, settings.DATABASE_AUTH_TOKEN)
+
+class TursoTransaction:
+    """
+    Interactive transaction on a Turso (Hrana over HTTP) stream.
+    
+    The server keeps the stream open between requests and hands back a
+    baton that identifies it. Statements added with `queue` are buffered
+    and sent together with COMMIT, so a transaction that only writes costs
+    a single round trip. `execute` flushes the buffer and returns rows for
+    reads that must see the transaction's own writes.
+    """
+    
+    def __init__(self, client: TursoClient):
+        self._client = client
+        self._baton: Optional[str] = None
+        self._base_url: Optional[str] = None
+        self._began = False
+        self._closed = False
+        self._pending: List[Tuple[str, Optional[list]]] = []
+        self._last_response_bytes = 0
+    
+    @staticmethod
+    def _encode_value(value: Any) -> Dict[str, Any]:
+        """Convert a Python value into a Hrana value"""
+        if value is None:
+            return {"type": "null"}
+        if isinstance(value, bool):
+            return {"type": "integer", "value": str(int(value))}
+        if isinstance(value, int):
+            return {"type": "integer", "value": str(value)}
+        if isinstance(value, float):
+            return {"type": "float", "value": value}
+        if isinstance(value, (bytes, bytearray)):
+            return {"type": "blob", "base64": base64.b64encode(value).decode("ascii")}
+        return {"type": "text", "value": str(value)}
+    
+    @staticmethod
+    def _decode_value(value: Dict[str, Any]) -> Any:
+        """Convert a Hrana value into a Python value"""
+        value_type = value.get("type")
+        if value_type == "null":
+            return None
+        if value_type == "integer":
+            return int(value["value"])
+        if value_type == "blob":
+            return base64.b64decode(value["base64"])
+        return value.get("value")
+    
+    def _rows(self, result: Dict[str, Any]) -> List[dict]:
+        """Convert a Hrana statement result into a list of dicts"""
+        columns = [col.get("name") for col in result.get("cols", [])]
+        return [
+            dict(zip(columns, (self._decode_value(v) for v in row)))
+            for row in result.get("rows", [])
+        ]
+    
+    def _batch(self, statements: List[Tuple[str, Optional[list]]]) -> Dict[str, Any]:
+        """Build a batch request where each step only runs if the previous one succeeded"""
+        steps = []
+        for index, (sql, params) in enumerate(statements):
+            step = {
+                "stmt": {
+                    "sql": sql,
+                    "args": [self._encode_value(v) for v in (params or [])]
+                }
+            }
+            if index > 0:
+                step["condition"] = {"type": "ok", "step": index - 1}
+            steps.append(step)
+        return {"type": "batch", "batch": {"steps": steps}}
+    
+    async def _pipeline(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send a pipeline request on this transaction's stream"""
+        url = f"{self._base_url}/v2/pipeline" if self._base_url else "/v2/pipeline"
+        response = await self._client._post(
+            url,
+            {"baton": self._baton, "requests": requests}
+        )
+        response.raise_for_status()
+        self._last_response_bytes = len(response.content)
+        data = response.json()
+        
+        self._baton = data.get("baton")
+        self._base_url = data.get("base_url") or self._base_url
+        
+        results = data.get("results", [])
+        for result in results:
+            if result.get("type") == "error":
+                raise Exception(result.get("error", {}).get("message", result))
+        return results
+    
+    async def _run(
+        self,
+        statements: List[Tuple[str, Optional[list]]],
+        close: bool = False
+    ) -> List[List[dict]]:
+        """Run statements as one chained batch and return rows per statement"""
+        if self._closed:
+            raise RuntimeError("Transaction already finished")
+        
+        begin = not self._began
+        if begin:
+            statements = [("BEGIN", None)] + statements
+        requests = [self._batch(statements)]
+        if close:
+            # Cerrar el stream descarta cualquier transacción que siga abierta
+            self._closed = True
+            requests.append({"type": "close"})
+        
+        sqls = [sql for sql, _ in statements]
+        start = time.perf_counter()
+        try:
+            results = await self._pipeline(requests)
+            self._began = True
+            
+            batch = results[0]["response"]["result"]
+            for error in batch.get("step_errors", []):
+                if error:
+                    raise Exception(error.get("message", error))
+        except Exception:
+            query_metrics.observe_error(sqls)
+            raise
+        
+        rows = [self._rows(r or {}) for r in batch.get("step_results", [])]
+        query_metrics.observe(
+            sqls,
+            time.perf_counter() - start,
+            [len(r) for r in rows],
+            self._last_response_bytes
+        )
+        if begin:
+            # Descartar el resultado del BEGIN implícito
+            rows = rows[1:]
+        return rows
+    
+    def queue(self, sql: str, parameters: list = None):
+        """Buffer a write to be sent together with the next execute or commit"""
+        self._pending.append((sql, parameters))
+    
+    async def execute(self, sql: str, parameters: list = None) -> List[dict]:
+        """Flush buffered writes and run a statement inside the transaction"""
+        statements = self._pending + [(sql, parameters)]
+        self._pending = []
+        results = await self._run(statements)
+        return results[-1]
+    
+    async def commit(self):
+        """Send buffered writes and COMMIT in a single round trip"""
+        if self._closed:
+            return
+        if not self._pending and not self._began:
+            self._closed = True
+            return
+        
+        statements = self._pending + [("COMMIT", None)]
+        self._pending = []
+        await self._run(statements, close=True)
+    
+    async def rollback(self):
+        """Discard buffered writes and roll back whatever reached the server"""
+        self._pending = []
+        if self._closed:
+            return
+        self._closed = True
+        if not self._began:
+            return
+        try:
+            await self._pipeline([
+                {"type": "execute", "stmt": {"sql": "ROLLBACK"}},
+                {"type": "close"}
+            ])
+        except Exception as e:
+            print(f"⚠️ Turso rollback failed: {e}")
+
+
+# Turso client, created in the app lifespan (see main.py)
+turso_client: Optional[TursoClient] = None
+
+
+async def init_turso_client() -> Optional[TursoClient]:
+    """Create the shared Turso client with the configured pool settings"""
+    global turso_client
+    if turso_client is None and settings.DATABASE_URL.startswith("libsql://"):
+        pool_options = dict(
+            http2=settings.DATABASE_HTTP2,
+            max_connections=settings.DATABASE_MAX_CONNECTIONS,
+            max_keepalive=settings.DATABASE_MAX_KEEPALIVE,
+            keepalive_expiry=settings.DATABASE_KEEPALIVE_EXPIRY,
+            timeout=settings.DATABASE_TIMEOUT,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT
+        )
+        from app.core.replica import replica_supported
+        use_replica = bool(settings.DATABASE_REPLICA_PATH)
+        if use_replica and not replica_supported():
+            print("⚠️ libsql no instalado: DATABASE_REPLICA_PATH se ignora y las lecturas van al primario")
+            use_replica = False
+        if use_replica:
+            # Réplica embebida: lecturas locales, escrituras al primario
+            from app.core.replica import ReplicaTursoClient
+            client = ReplicaTursoClient(
+                settings.DATABASE_URL,
+                settings.DATABASE_AUTH_TOKEN,
+                replica_path=settings.DATABASE_REPLICA_PATH,
+                sync_interval=settings.DATABASE_REPLICA_SYNC_INTERVAL,
+                **pool_options
+            )
+            await client.start()
+            turso_client = client
+        else:
+            turso_client = TursoClient(
+                settings.DATABASE_URL,
+                settings.DATABASE_AUTH_TOKEN,
+                **pool_options
+            )
+    return turso_client
+
+
+async def close_turso_client():
+    """Close the shared Turso client and its connections"""
+    global turso_client
+    if turso_client is not None:
+        await turso_client.close()
+        turso_client = None
 
 
 def get_turso_client() -> TursoClient:
@@ -80,6 +522,11 @@ def get_turso_client() -> TursoClient:
     return turso_client
 
 
+def turso_client_stats() -> Optional[Dict[str, Any]]:
+    """Pool metrics of the shared Turso client, if it exists"""
+    return turso_client.pool_stats() if turso_client is not None else None
+
+
 # For SQLAlchemy ORM (optional - for complex queries)
 # We use local SQLite for development/testing
 engine = create_async_engine(
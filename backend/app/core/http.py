@@ -0,0 +1,250 @@
+"""
+Shared HTTP clients for provider APIs
+Un cliente httpx de larga vida por proveedor (keep-alive, HTTP/2 y
+reintentos de conexión), creado en el lifespan y cerrado al apagar
+"""
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Union
+import os
+
+import httpx
+
+from app.core.config import settings
+
+
+class ProviderClientStats:
+    """Requests sent vs TCP connections opened for one provider client"""
+
+    __slots__ = ("requests", "connections")
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections": self.connections,
+            "reuse_ratio": round(1 - self.connections / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class ClientLease:
+    """
+    View over a shared client with per-call defaults.
+
+    Keeps the `async with ... as client:` shape of the services: leaving
+    the block returns the connection to the pool instead of closing it.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, timeout: Optional[float], follow_redirects: bool):
+        self._client = client
+        self._defaults: Dict[str, Any] = {"follow_redirects": follow_redirects}
+        if timeout is not None:
+            self._defaults["timeout"] = timeout
+
+    def _with_defaults(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {**self._defaults, **kwargs}
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self._client.request(method, url, **self._with_defaults(kwargs))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    def stream(self, method: str, url: str, **kwargs):
+        return self._client.stream(method, url, **self._with_defaults(kwargs))
+
+    async def __aenter__(self) -> "ClientLease":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+class HTTPClientRegistry:
+    """
+    One pooled AsyncClient per provider.
+
+    Clients are created on first use and kept for the life of the
+    process, so polling a provider every few seconds reuses the same
+    keep-alive (or HTTP/2) connection instead of paying a new TCP+TLS
+    handshake each time. The transport retries failed connects; it
+    never retries a request that reached the server.
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 60.0,
+        retries: int = 2,
+        timeout: float = 60.0
+    ):
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("⚠️ Paquete h2 no instalado, los proveedores usarán HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.retries = retries
+        self.timeout = timeout
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, ProviderClientStats] = {}
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        stats = self._stats.setdefault(name, ProviderClientStats())
+
+        async def trace(event: str, info: Dict[str, Any]):
+            if event == "connection.connect_tcp.complete":
+                stats.connections += 1
+
+        async def on_request(request: httpx.Request):
+            stats.requests += 1
+            # httpcore informa cada conexión TCP nueva por esta extensión
+            request.extensions["trace"] = trace
+
+        transport = httpx.AsyncHTTPTransport(
+            http2=self.http2,
+            limits=self.limits,
+            retries=self.retries
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(self.timeout),
+            event_hooks={"request": [on_request]}
+        )
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """Pooled client of a provider, created on first use"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create(name)
+        return client
+
+    def lease(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        follow_redirects: bool = False
+    ) -> ClientLease:
+        return ClientLease(self.client(name), timeout, follow_redirects)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Registry compartido, creado en el lifespan de la app (ver main.py)
+http_clients: Optional[HTTPClientRegistry] = None
+
+
+def init_http_clients() -> HTTPClientRegistry:
+    """Create the shared registry with the configured pool settings"""
+    global http_clients
+    if http_clients is None:
+        http_clients = HTTPClientRegistry(
+            http2=settings.HTTP_CLIENT_HTTP2,
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+            retries=settings.HTTP_CLIENT_RETRIES
+        )
+    return http_clients
+
+
+async def close_http_clients():
+    """Close every pooled provider client"""
+    global http_clients
+    if http_clients is not None:
+        await http_clients.close()
+        http_clients = None
+
+
+def get_http_client(
+    name: str,
+    timeout: Optional[float] = None,
+    follow_redirects: bool = False
+) -> ClientLease:
+    """
+    Pooled client for a provider.
+
+    Usage keeps the shape of a throwaway client:
+
+        async with get_http_client("openai", timeout=120.0) as client:
+            response = await client.post(url, json=payload)
+
+    Outside the app lifespan (scripts, Celery workers) the registry is
+    created on first use.
+    """
+    return init_http_clients().lease(name, timeout, follow_redirects)
+
+
+def http_client_stats() -> Optional[Dict[str, Dict[str, Any]]]:
+    """Connection reuse per provider, if the registry exists"""
+    return http_clients.stats() if http_clients is not None else None
+
+
+async def download_to_file(
+    name: str,
+    url: str,
+    path: Union[str, Path],
+    timeout: Optional[float] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> int:
+    """
+    Stream a response body to disk chunk by chunk.
+
+    Only one chunk (HTTP_STREAM_CHUNK_SIZE) is held in memory at a time.
+    The body is written to `<path>.part` and renamed when complete, so a
+    failed download never leaves a truncated file at `path`.
+
+    Returns:
+        Bytes escritos
+
+    Raises:
+        httpx.HTTPStatusError si la respuesta no es 2xx
+    """
+    path = Path(path)
+    partial = path.with_name(path.name + ".part")
+    size = 0
+    try:
+        async with get_http_client(name, timeout=timeout, follow_redirects=True) as client:
+            async with client.stream("GET", url, headers=headers) as response:
+                response.raise_for_status()
+                with open(partial, "wb") as f:
+                    async for chunk in response.aiter_bytes(settings.HTTP_STREAM_CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+        os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return size
+
+
+async def iter_file(path: Union[str, Path]) -> AsyncIterator[bytes]:
+    """Read a file in HTTP_STREAM_CHUNK_SIZE chunks, as a streaming request body"""
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.HTTP_STREAM_CHUNK_SIZE):
+            yield chunk
@@ -0,0 +1,121 @@
+"""
+Content-addressed cache for generated images
+Misma combinación de (proveedor, modelo, prompt, estilo, tamaño) → misma
+URL guardada, sin volver a pagar ni esperar la generación
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+import hashlib
+import json
+
+from app.core.config import settings
+
+
+LOCAL_IMAGE_PATH = "/api/v1/assets/image/"
+IMAGES_DIR = Path("uploads/images")
+
+
+def image_model(generator: Any) -> str:
+    """
+    Model identity of an image service.
+
+    Gemini walks a fallback chain, so the whole chain is the identity;
+    the other services expose their DEFAULT_MODEL.
+    """
+    models = getattr(generator, "IMAGE_MODELS", None)
+    if models:
+        return "|".join(model["id"] for model in models)
+    return getattr(generator, "DEFAULT_MODEL", "") or ""
+
+
+def image_cache_key(
+    provider: str,
+    model: str,
+    prompt: str,
+    style: Optional[str],
+    width: int,
+    height: int
+) -> str:
+    """sha256 of everything that determines the generated image"""
+    raw = json.dumps([provider, model, prompt or "", style or "", width, height], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def image_available(url: str) -> bool:
+    """Local images can be deleted from disk; remote ones are trusted"""
+    if LOCAL_IMAGE_PATH not in url:
+        return True
+    filename = url.rsplit(LOCAL_IMAGE_PATH, 1)[1]
+    return (IMAGES_DIR / filename).is_file()
+
+
+class ImageCache:
+    """
+    Key → asset URL map stored in the image_cache table.
+
+    Lookups are batched (one query per project run) and refresh
+    last_used_at; the table is trimmed to `max_entries` by least recent
+    use on every insert. Generated files carry the key in their name, so
+    a scene regenerated with a new prompt never overwrites an image that
+    another scene reuses.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    async def get_many(self, turso_client, keys: Iterable[str]) -> Dict[str, str]:
+        """URLs cached for the given keys (missing keys are left out)"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        placeholders = ", ".join("?" * len(keys))
+        rows = await turso_client.execute(
+            f"SELECT key, url FROM image_cache WHERE key IN ({placeholders})",
+            keys
+        )
+        found = {row["key"]: row["url"] for row in rows or [] if image_available(row["url"])}
+        stale = [row["key"] for row in rows or [] if row["key"] not in found]
+
+        statements = []
+        if found:
+            hit_keys = list(found)
+            statements.append((
+                f"UPDATE image_cache SET last_used_at = CURRENT_TIMESTAMP WHERE key IN ({', '.join('?' * len(hit_keys))})",
+                hit_keys
+            ))
+        if stale:
+            statements.append((
+                f"DELETE FROM image_cache WHERE key IN ({', '.join('?' * len(stale))})",
+                stale
+            ))
+        if statements:
+            await turso_client.execute_batch(statements)
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def put(self, turso_client, key: str, provider: str, model: str, url: str):
+        """Remember the URL of a freshly generated image"""
+        await turso_client.execute_batch([
+            (
+                """INSERT OR REPLACE INTO image_cache (key, provider, model, url, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)""",
+                [key, provider, model, url]
+            ),
+            (
+                """DELETE FROM image_cache WHERE key IN (
+                       SELECT key FROM image_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                [self.max_entries]
+            ),
+        ])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+image_cache = ImageCache(max_entries=settings.IMAGE_CACHE_MAX_ENTRIES)
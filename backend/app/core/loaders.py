@@ -0,0 +1,186 @@
+"""
+Request-scoped batch loaders
+Agrupan las lecturas por id hechas en el mismo ciclo del event loop en una
+sola query `IN (...)` contra Turso (patrón DataLoader); las lecturas por
+proyecto pasan por project_cache
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Set
+import asyncio
+
+from app.core.cache import get_project_asset_rows, get_project_row, get_project_scene_rows
+from app.core.database import TursoClient, get_turso_client
+from app.core.queries import ASSET_COLUMNS, SCENE_COLUMNS
+
+
+# SQLite limita la cantidad de parámetros por statement
+MAX_IN_PARAMS = 500
+
+
+class BatchLoader:
+    """
+    Coalesce lookups by key into one batch call.
+
+    Every `load` made before the event loop gets back to this loader is
+    queued and resolved by a single call to `batch_fn(keys)`, which returns
+    a dict key → value. Results are memoized for the lifetime of the loader,
+    which is one request, so repeated lookups never hit Turso twice.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        default: Optional[Callable[[], Any]] = None
+    ):
+        self._batch_fn = batch_fn
+        self._default = default
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        # El loop solo guarda referencias débiles a las tareas
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+
+    async def load(self, key: Hashable) -> Any:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # Despachar cuando el resto de las tareas listas hayan encolado sus keys
+                loop.call_soon(self._dispatch)
+        # shield: cancelar un caller no debe cancelar la carga de los demás
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Sequence[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any):
+        """Seed the memo with a value already loaded by another query"""
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def _dispatch(self):
+        keys, self._queue = self._queue, []
+        if keys:
+            task = asyncio.get_running_loop().create_task(self._run(keys))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: List[Hashable]):
+        self.batches += 1
+        try:
+            values = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                # Sin memo del error: un load posterior vuelve a intentar
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                if key in values:
+                    future.set_result(values[key])
+                else:
+                    future.set_result(self._default() if self._default else None)
+
+
+class Loaders:
+    """
+    Loaders for the project → scenes → assets graph of one request.
+
+    Each level costs one round trip however many ids it is asked for, so
+    reading a project with all its scenes and assets is a constant number
+    of queries regardless of scene count. Per-project lists come from the
+    project_cache rows (one query each on a miss, none on a hit) and prime
+    the by-id loaders, so later lookups in the same request are free.
+    """
+
+    def __init__(self, turso_client: TursoClient):
+        self.turso_client = turso_client
+        self.project = BatchLoader(self._load_projects)
+        self.scene = BatchLoader(self._load_scenes)
+        self.scenes_by_project = BatchLoader(self._load_scenes_by_project, default=list)
+        self.asset = BatchLoader(self._load_assets)
+        self.assets_by_scene = BatchLoader(self._load_assets_by_scene, default=list)
+        self.assets_by_project = BatchLoader(self._load_assets_by_project, default=list)
+
+    async def _select_in(self, sql: str, keys: List[Hashable]) -> List[dict]:
+        """
+        Run `sql` with its `{placeholders}` bound to the keys.
+
+        Large key sets are split into chunks of MAX_IN_PARAMS, all sent in
+        the same execute_batch round trip.
+        """
+        statements = []
+        for i in range(0, len(keys), MAX_IN_PARAMS):
+            chunk = list(keys[i:i + MAX_IN_PARAMS])
+            statements.append((sql.format(placeholders=", ".join("?" * len(chunk))), chunk))
+        results = await self.turso_client.execute_batch(statements)
+        return [row for rows in results for row in rows]
+
+    async def _per_project(self, load, project_ids: List[str]) -> Dict[str, Any]:
+        values = await asyncio.gather(*(load(self.turso_client, project_id) for project_id in project_ids))
+        return dict(zip(project_ids, values))
+
+    async def _load_projects(self, ids: List[str]) -> Dict[str, dict]:
+        projects = await self._per_project(get_project_row, ids)
+        return {project_id: row for project_id, row in projects.items() if row}
+
+    async def _load_scenes(self, ids: List[str]) -> Dict[str, dict]:
+        rows = await self._select_in(
+            f"SELECT {SCENE_COLUMNS} FROM scenes WHERE id IN ({{placeholders}})",
+            ids
+        )
+        return {row["id"]: row for row in rows}
+
+    async def _load_scenes_by_project(self, project_ids: List[str]) -> Dict[str, List[dict]]:
+        grouped = await self._per_project(get_project_scene_rows, project_ids)
+        for rows in grouped.values():
+            for row in rows:
+                self.scene.prime(row["id"], row)
+        return grouped
+
+    async def _load_assets(self, ids: List[str]) -> Dict[str, dict]:
+        rows = await self._select_in(
+            f"SELECT {ASSET_COLUMNS} FROM assets WHERE id IN ({{placeholders}})",
+            ids
+        )
+        return {row["id"]: row for row in rows}
+
+    async def _load_assets_by_scene(self, scene_ids: List[str]) -> Dict[str, List[dict]]:
+        rows = await self._select_in(
+            f"""SELECT {ASSET_COLUMNS} FROM assets
+                WHERE scene_id IN ({{placeholders}})
+                ORDER BY scene_id, created_at DESC, id DESC""",
+            scene_ids
+        )
+        grouped: Dict[str, List[dict]] = {}
+        for row in rows:
+            grouped.setdefault(row["scene_id"], []).append(row)
+            self.asset.prime(row["id"], row)
+        return grouped
+
+    async def _load_assets_by_project(self, project_ids: List[str]) -> Dict[str, List[dict]]:
+        """Assets of every scene of each project, in scene order (one JOIN per project)"""
+        grouped = await self._per_project(get_project_asset_rows, project_ids)
+        for rows in grouped.values():
+            per_scene: Dict[str, List[dict]] = {}
+            for row in rows:
+                per_scene.setdefault(row["scene_id"], []).append(row)
+            for scene_id, assets in per_scene.items():
+                self.assets_by_scene.prime(scene_id, assets)
+        return grouped
+
+    async def project_assets(self, project_id: str) -> List[dict]:
+        """Assets of every scene of a project, in scene order"""
+        return await self.assets_by_project.load(project_id)
+
+
+def get_loaders() -> Loaders:
+    """FastAPI dependency: fresh loaders (and memo) for each request"""
+    return Loaders(get_turso_client())
@@ -0,0 +1,165 @@
+"""
+Query metrics
+Latencia, filas y bytes por statement SQL normalizado, expuestos en
+formato Prometheus y con un log de queries lentas
+"""
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import re
+
+from app.core.config import settings
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    Collapse a statement into a stable label.
+
+    Literals become `?`, `IN (?, ?, ...)` lists of any length become
+    `(?...)` and whitespace is collapsed, so the same query written on
+    several lines or with different inline values shares one series.
+    """
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class _StatementStats:
+    __slots__ = ("count", "errors", "rows", "bytes", "seconds", "buckets")
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.buckets = [0] * bucket_count
+
+
+class QueryMetrics:
+    """Per-statement counters and latency histograms for TursoClient"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, slow_query_ms: float = 0.0):
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, _StatementStats] = {}
+
+    def _get(self, sql: str) -> _StatementStats:
+        label = normalize_sql(sql)
+        stats = self._stats.get(label)
+        if stats is None:
+            # +1 para el bucket +Inf
+            stats = self._stats[label] = _StatementStats(len(self.BUCKETS) + 1)
+        return stats
+
+    def observe(
+        self,
+        statements: Sequence[str],
+        seconds: float,
+        row_counts: Optional[Sequence[int]] = None,
+        response_bytes: int = 0
+    ):
+        """
+        Record one round trip.
+
+        Every statement of a batch waited for the same round trip, so each
+        one is observed with the full latency; the response size is split
+        evenly between them.
+        """
+        if not statements:
+            return
+        bucket = bisect_left(self.BUCKETS, seconds)
+        share = response_bytes // len(statements)
+
+        for i, sql in enumerate(statements):
+            stats = self._get(sql)
+            stats.count += 1
+            stats.seconds += seconds
+            stats.buckets[bucket] += 1
+            stats.bytes += share
+            rows = row_counts[i] if row_counts and i < len(row_counts) else 0
+            stats.rows += rows
+
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            labels = " | ".join(normalize_sql(sql) for sql in statements)
+            print(f"🐢 Slow query ({seconds * 1000:.1f} ms, {len(statements)} stmt): {labels[:500]}")
+
+    def observe_error(self, statements: Sequence[str]):
+        for sql in statements:
+            self._get(sql).errors += 1
+
+    def snapshot(self) -> List[dict]:
+        """Stats per normalized statement, slowest total time first"""
+        rows = [
+            {
+                "statement": label,
+                "count": stats.count,
+                "errors": stats.errors,
+                "rows": stats.rows,
+                "bytes": stats.bytes,
+                "total_ms": round(stats.seconds * 1000, 2),
+                "avg_ms": round(stats.seconds / stats.count * 1000, 2) if stats.count else 0.0,
+            }
+            for label, stats in self._stats.items()
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = [
+            "# HELP heymake_db_query_duration_seconds Turso round-trip latency per statement",
+            "# TYPE heymake_db_query_duration_seconds histogram",
+        ]
+        for label, stats in self._stats.items():
+            statement = _escape(label)
+            cumulative = 0
+            for le, count in zip(self.BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f'heymake_db_query_duration_seconds_bucket{{statement="{statement}",le="{le}"}} {cumulative}')
+            lines.append(f'heymake_db_query_duration_seconds_bucket{{statement="{statement}",le="+Inf"}} {stats.count}')
+            lines.append(f'heymake_db_query_duration_seconds_sum{{statement="{statement}"}} {stats.seconds:.6f}')
+            lines.append(f'heymake_db_query_duration_seconds_count{{statement="{statement}"}} {stats.count}')
+
+        for name, attr, help_text in (
+            ("heymake_db_query_rows_total", "rows", "Rows returned per statement"),
+            ("heymake_db_query_response_bytes_total", "bytes", "Response bytes per statement"),
+            ("heymake_db_query_errors_total", "errors", "Failed executions per statement"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for label, stats in self._stats.items():
+                lines.append(f'{name}{{statement="{_escape(label)}"}} {getattr(stats, attr)}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        self._stats.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_gauges(prefix: str, values: Optional[Dict[str, object]]) -> str:
+    """Render the numeric values of a stats dict as Prometheus gauges"""
+    if not values:
+        return ""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        lines.append(f"# TYPE {prefix}_{key} gauge")
+        lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics(slow_query_ms=settings.DATABASE_SLOW_QUERY_MS)
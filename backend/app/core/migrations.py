@@ -0,0 +1,244 @@
+"""
+Schema migrations
+Migraciones versionadas del esquema de Turso: tablas base e índices que
+necesitan las queries más frecuentes de la API.
+
+Uso:
+    python -m app.core.migrations status          # versión actual en Turso
+    python -m app.core.migrations upgrade         # aplicar migraciones pendientes
+    python -m app.core.migrations explain [db]    # verificar índices con EXPLAIN QUERY PLAN
+"""
+from typing import Dict, List, Tuple
+import asyncio
+import sqlite3
+import sys
+
+from app.core import queries
+
+
+# (versión, descripción, statements)
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (
+        1,
+        "base schema",
+        [
+            """CREATE TABLE IF NOT EXISTS projects (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT,
+                original_script TEXT,
+                status TEXT NOT NULL DEFAULT 'draft',
+                style TEXT,
+                reference_prompt TEXT,
+                duration_target INTEGER,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS scenes (
+                id TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+                order_index INTEGER NOT NULL,
+                title TEXT,
+                description TEXT,
+                dialogue TEXT,
+                image_prompt TEXT,
+                image_url TEXT,
+                duration REAL,
+                notes TEXT,
+                status TEXT,
+                video_url TEXT,
+                video_status TEXT,
+                video_provider TEXT,
+                video_task_id TEXT,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS assets (
+                id TEXT PRIMARY KEY,
+                scene_id TEXT NOT NULL REFERENCES scenes(id) ON DELETE CASCADE,
+                type TEXT NOT NULL,
+                url TEXT,
+                status TEXT,
+                metadata TEXT,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )""",
+        ],
+    ),
+    (
+        2,
+        "indexes for hot queries",
+        [
+            # Listado de escenas de un proyecto y paginación por (order_index, id)
+            "CREATE INDEX IF NOT EXISTS idx_scenes_project_order ON scenes(project_id, order_index, id)",
+            # Assets de una escena filtrados por tipo/estado (animate_scenes, listados)
+            "CREATE INDEX IF NOT EXISTS idx_assets_scene_type_status_created ON assets(scene_id, type, status, created_at)",
+            # get_animation_status busca la escena por task_id en cada poll
+            "CREATE INDEX IF NOT EXISTS idx_scenes_video_task_id ON scenes(video_task_id)",
+            # Listado de proyectos paginado por (created_at, id)
+            "CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects(created_at, id)",
+        ],
+    ),
+    (
+        3,
+        "generated image cache",
+        [
+            """CREATE TABLE IF NOT EXISTS image_cache (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT,
+                url TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                last_used_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_image_cache_last_used ON image_cache(last_used_at)",
+        ],
+    ),
+    (
+        4,
+        "in-flight animations index",
+        [
+            # Resync del video completion service: solo las escenas animándose
+            """CREATE INDEX IF NOT EXISTS idx_scenes_video_in_flight ON scenes(video_task_id)
+               WHERE video_task_id IS NOT NULL
+                 AND (video_status IS NULL OR video_status NOT IN ('completed', 'failed'))""",
+        ],
+    ),
+]
+
+SCHEMA_TABLE = """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+)"""
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# Queries más frecuentes de la API (las mismas constantes que ejecutan los
+# endpoints), con parámetros de ejemplo
+HOT_QUERIES: Dict[str, Tuple[str, list]] = {
+    "project_by_id": (queries.PROJECT_BY_ID, ["p"]),
+    "projects_first_page": (queries.PROJECTS_FIRST_PAGE, [100, 0]),
+    "projects_page": (queries.PROJECTS_PAGE, ["2025-01-01", "p", 100]),
+    "project_scenes": (queries.PROJECT_SCENES, ["p"]),
+    "project_scenes_page": (queries.PROJECT_SCENES_PAGE, ["p", 0, "", 50]),
+    "scene_by_video_task": (queries.SCENE_BY_VIDEO_TASK, ["task"]),
+    "scene_assets": (queries.SCENE_ASSETS, ["s"]),
+    "scene_assets_first_page": (queries.SCENE_ASSETS_FIRST_PAGE, ["s", 50]),
+    "scene_assets_page": (queries.SCENE_ASSETS_PAGE, ["s", "2025-01-01", "a", 50]),
+    "project_assets": (queries.PROJECT_ASSETS, ["p"]),
+    "project_scene_images": (queries.PROJECT_SCENE_IMAGES, ["p"]),
+    "in_flight_video_scenes": (queries.IN_FLIGHT_VIDEO_SCENES, []),
+}
+
+
+async def current_version(client) -> int:
+    """Versión de esquema registrada en la base"""
+    await client.execute(SCHEMA_TABLE)
+    result = await client.execute("SELECT MAX(version) AS version FROM schema_migrations")
+    return (result[0]["version"] or 0) if result else 0
+
+
+async def apply_migrations(client) -> List[int]:
+    """
+    Apply every pending migration, each one in its own transaction.
+
+    Returns:
+        Versiones aplicadas
+    """
+    version = await current_version(client)
+    applied = []
+
+    for target, description, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        async with client.transaction() as tx:
+            for sql in statements:
+                tx.queue(sql)
+            tx.queue(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                [target, description]
+            )
+        applied.append(target)
+        print(f"✅ Migración {target} aplicada: {description}")
+
+    return applied
+
+
+def apply_migrations_sqlite(conn: sqlite3.Connection) -> List[int]:
+    """Same migrations against a local SQLite connection"""
+    conn.execute(SCHEMA_TABLE)
+    version = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()[0] or 0
+    applied = []
+
+    for target, description, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        with conn:
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                [target, description]
+            )
+        applied.append(target)
+
+    return applied
+
+
+def explain_hot_queries(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """
+    Run EXPLAIN QUERY PLAN for every hot query.
+
+    Returns:
+        Dict nombre → lista de pasos del plan que recorren una tabla
+        completa sin índice (vacía si la query usa índices)
+    """
+    full_scans = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        details = [row[-1] for row in plan]
+        full_scans[name] = [
+            detail for detail in details
+            if detail.startswith("SCAN") and "INDEX" not in detail
+        ]
+    return full_scans
+
+
+async def _main(args: List[str]) -> int:
+    command = args[0] if args else "status"
+
+    if command == "explain":
+        path = args[1] if len(args) > 1 else ":memory:"
+        conn = sqlite3.connect(path)
+        apply_migrations_sqlite(conn)
+        failed = False
+        for name, scans in explain_hot_queries(conn).items():
+            if scans:
+                failed = True
+                print(f"❌ {name}: {'; '.join(scans)}")
+            else:
+                print(f"✅ {name}")
+        conn.close()
+        return 1 if failed else 0
+
+    from app.core.database import init_turso_client, close_turso_client
+
+    client = await init_turso_client()
+    if client is None:
+        print("❌ DATABASE_URL no es una base de Turso (libsql://)")
+        return 1
+    try:
+        if command == "upgrade":
+            applied = await apply_migrations(client)
+            if not applied:
+                print("✅ Esquema al día")
+        version = await current_version(client)
+        print(f"📋 Versión de esquema: {version} (última: {LATEST_VERSION})")
+    finally:
+        await close_turso_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,206 @@
+"""
+Model health registry
+Circuit breaker por modelo compartido entre requests: un modelo con la
+quota agotada o que falla seguido se saltea hasta que pasa su cooldown
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import time
+
+from app.core.config import settings
+
+
+# Errores que dicen algo del modelo y no del prompt
+TRANSIENT_ERRORS = ("overloaded", "api_error", "timeout", "unexpected_error")
+
+
+class _ModelState:
+    """Circuit of one provider model: closed, open until a time, or probing"""
+
+    __slots__ = (
+        "reason", "open_until", "cooldown", "failures", "probing_since", "probe_done", "last_error", "successes"
+    )
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.failures = 0
+        self.probing_since = 0.0
+        # Se setea cuando termina el probe en curso (para los requests que esperan)
+        self.probe_done: Optional[asyncio.Event] = None
+        self.last_error: Optional[str] = None
+        self.successes = 0
+
+
+class ModelHealthRegistry:
+    """
+    Shared health of the models behind a fallback chain.
+
+    A quota error opens the model's circuit at once (for the provider's
+    retry delay when it sends one, else MODEL_QUOTA_COOLDOWN); transient
+    errors open it after MODEL_ERROR_THRESHOLD in a row. While open, the
+    model is skipped without a round trip. When the cooldown ends a single
+    request probes the model: success closes the circuit, another failure
+    reopens it with twice the cooldown (up to MODEL_MAX_COOLDOWN). The
+    prober must end its probe with record_success, record_failure or
+    release_probe (also when cancelled); other requests can wait_probe
+    instead of treating the busy model as down.
+    """
+
+    PROBE_TIMEOUT = 180.0
+
+    def __init__(
+        self,
+        quota_cooldown: float = 3600.0,
+        error_cooldown: float = 60.0,
+        error_threshold: int = 3,
+        max_cooldown: float = 6 * 3600.0
+    ):
+        self.quota_cooldown = quota_cooldown
+        self.error_cooldown = error_cooldown
+        self.error_threshold = max(1, error_threshold)
+        self.max_cooldown = max_cooldown
+        self._models: Dict[Tuple[str, str], _ModelState] = {}
+        self.skipped = 0
+
+    def _state(self, provider: str, model: str) -> _ModelState:
+        return self._models.setdefault((provider, model), _ModelState())
+
+    def available(self, provider: str, model: str) -> bool:
+        """Whether a request may use the model now (claims the probe slot if half-open)"""
+        state = self._models.get((provider, model))
+        if state is None or not state.open_until:
+            return True
+
+        now = time.time()
+        if now < state.open_until:
+            self.skipped += 1
+            return False
+        if state.probing_since and now - state.probing_since < self.PROBE_TIMEOUT:
+            # Otro request ya está probando el modelo
+            self.skipped += 1
+            return False
+        _end_probe(state)
+        state.probing_since = now
+        state.probe_done = asyncio.Event()
+        return True
+
+    def probing(self, provider: str, model: str) -> bool:
+        """Whether the model is only unavailable because another request is probing it"""
+        state = self._models.get((provider, model))
+        return bool(
+            state is not None
+            and state.probing_since
+            and time.time() - state.probing_since < self.PROBE_TIMEOUT
+        )
+
+    async def wait_probe(self, provider: str, model: str, timeout: Optional[float] = None):
+        """Esperar a que termine el probe en curso del modelo (si hay uno)"""
+        state = self._models.get((provider, model))
+        if state is None or state.probe_done is None:
+            return
+        try:
+            await asyncio.wait_for(state.probe_done.wait(), timeout or self.PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+    def release_probe(self, provider: str, model: str):
+        """Give up the probe slot without a verdict (cancelled or unexpected error)"""
+        state = self._models.get((provider, model))
+        if state is not None and state.probing_since:
+            _end_probe(state)
+
+    def record_success(self, provider: str, model: str):
+        state = self._state(provider, model)
+        if state.open_until:
+            print(f"✅ {provider}/{model} disponible de nuevo")
+        state.reason = None
+        state.open_until = 0.0
+        state.cooldown = 0.0
+        state.failures = 0
+        _end_probe(state)
+        state.successes += 1
+
+    def record_failure(
+        self,
+        provider: str,
+        model: str,
+        error_code: str,
+        error: Optional[str] = None,
+        retry_after: Optional[float] = None
+    ):
+        """Count a failed request; errors caused by the prompt are ignored"""
+        if error_code != "quota_exhausted" and error_code not in TRANSIENT_ERRORS:
+            state = self._models.get((provider, model))
+            if state is not None and state.probing_since:
+                # El modelo respondió (el problema era el prompt): cerrar el circuito
+                self.record_success(provider, model)
+            return
+
+        state = self._state(provider, model)
+        state.last_error = (error or error_code)[:200]
+        state.failures += 1
+        probing = bool(state.probing_since)
+        _end_probe(state)
+
+        if error_code == "quota_exhausted":
+            cooldown = retry_after if retry_after else self.quota_cooldown
+        elif probing or state.failures >= self.error_threshold:
+            cooldown = self.error_cooldown
+        else:
+            return
+
+        if probing and state.cooldown:
+            # Sigue fallando después del cooldown: esperar el doble
+            cooldown = max(cooldown, state.cooldown * 2)
+        state.cooldown = min(cooldown, self.max_cooldown)
+        state.reason = error_code
+        state.open_until = time.time() + state.cooldown
+        print(f"🔌 {provider}/{model} en pausa {state.cooldown:.0f}s ({error_code})")
+
+    def retry_in(self, provider: str, model: str) -> float:
+        """Seconds until the model is tried again (0 = available)"""
+        state = self._models.get((provider, model))
+        if state is None:
+            return 0.0
+        return max(0.0, state.open_until - time.time())
+
+    def snapshot(self, provider: str, models: Iterable[str]) -> List[Dict[str, Any]]:
+        """Health of each model of a provider, in fallback order"""
+        result = []
+        for model in models:
+            state = self._models.get((provider, model))
+            retry_in = self.retry_in(provider, model)
+            result.append({
+                "model": model,
+                "healthy": retry_in == 0.0,
+                "reason": state.reason if state and retry_in else None,
+                "retry_in_seconds": round(retry_in),
+                "consecutive_failures": state.failures if state else 0,
+                "last_error": state.last_error if state else None,
+            })
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "tracked": len(self._models),
+            "open": sum(1 for state in self._models.values() if state.open_until > now),
+            "skipped": self.skipped,
+        }
+
+
+def _end_probe(state: _ModelState):
+    state.probing_since = 0.0
+    if state.probe_done is not None:
+        state.probe_done.set()
+        state.probe_done = None
+
+
+model_health = ModelHealthRegistry(
+    quota_cooldown=settings.MODEL_QUOTA_COOLDOWN,
+    error_cooldown=settings.MODEL_ERROR_COOLDOWN,
+    error_threshold=settings.MODEL_ERROR_THRESHOLD,
+    max_cooldown=settings.MODEL_MAX_COOLDOWN
+)
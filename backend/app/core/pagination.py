@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination helpers
+Los cursores son opacos para el cliente: base64 de los valores de la
+última fila de la página, p. ej. (created_at, id) u (order_index, id)
+"""
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import base64
+import json
+
+from fastapi import HTTPException, Response, status
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row into an opaque cursor"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor, validating its shape"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Clamp the requested page size"""
+    if limit is None:
+        return MAX_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def paginate(
+    rows: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], Tuple[Any, ...]],
+    response: Optional[Response] = None
+) -> Tuple[Sequence[Any], Optional[str]]:
+    """
+    Cut a `limit + 1` query result down to one page.
+
+    The extra row only tells whether there is a next page; the cursor is
+    built from the last row actually returned. When a Response is given,
+    the cursor is also exposed in the X-Next-Cursor header so list bodies
+    can stay plain JSON arrays.
+    """
+    page = rows[:limit]
+    next_cursor = encode_cursor(*key(page[-1])) if len(rows) > limit and page else None
+
+    if response is not None and next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return page, next_cursor
@@ -0,0 +1,72 @@
+"""
+Hot queries
+SQL de las lecturas más frecuentes de la API, compartido por los
+endpoints y por migrations.HOT_QUERIES (que verifica que usen índices)
+"""
+
+SCENE_COLUMNS = """id, project_id, order_index, order_index as 'order', title, description, dialogue,
+                  image_prompt, duration, notes, status,
+                  video_url, video_status, video_provider, video_task_id,
+                  created_at, updated_at"""
+
+ASSET_COLUMNS = "id, scene_id, type, url, status, metadata, created_at"
+
+PROJECT_BY_ID = "SELECT * FROM projects WHERE id = ?"
+
+PROJECTS_FIRST_PAGE = "SELECT * FROM projects ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+
+PROJECTS_PAGE = """SELECT * FROM projects
+                   WHERE (created_at, id) < (?, ?)
+                   ORDER BY created_at DESC, id DESC LIMIT ?"""
+
+PROJECT_SCENES = f"""SELECT {SCENE_COLUMNS}
+               FROM scenes
+               WHERE project_id = ?
+               ORDER BY order_index"""
+
+PROJECT_SCENES_PAGE = f"""SELECT {SCENE_COLUMNS}
+           FROM scenes
+           WHERE project_id = ? AND (order_index, id) > (?, ?)
+           ORDER BY order_index, id
+           LIMIT ?"""
+
+SCENE_BY_VIDEO_TASK = """SELECT id, project_id, video_url, video_status, video_provider
+           FROM scenes WHERE video_task_id = ?"""
+
+SCENE_ASSETS = f"""SELECT {ASSET_COLUMNS} FROM assets
+               WHERE scene_id = ?
+               ORDER BY created_at DESC, id DESC"""
+
+SCENE_ASSETS_FIRST_PAGE = f"""SELECT {ASSET_COLUMNS} FROM assets
+               WHERE scene_id = ?
+               ORDER BY created_at DESC, id DESC LIMIT ?"""
+
+SCENE_ASSETS_PAGE = f"""SELECT {ASSET_COLUMNS} FROM assets
+               WHERE scene_id = ? AND (created_at, id) < (?, ?)
+               ORDER BY created_at DESC, id DESC LIMIT ?"""
+
+PROJECT_ASSETS = """SELECT a.id, a.scene_id, a.type, a.url, a.status, a.metadata, a.created_at,
+                      s.order_index as scene_order, s.title as scene_title
+               FROM assets a
+               INNER JOIN scenes s ON a.scene_id = s.id
+               WHERE s.project_id = ?
+               ORDER BY s.order_index, a.created_at DESC, a.id DESC"""
+
+# Una fila por escena: solo su imagen completa más reciente (regenerar deja varias)
+PROJECT_SCENE_IMAGES = """SELECT s.id, s.title, s.order_index, a.url as image_url
+           FROM scenes s
+           INNER JOIN assets a ON a.id = (
+               SELECT latest.id FROM assets latest
+               WHERE latest.scene_id = s.id AND latest.type = 'image' AND latest.status = 'completed'
+               ORDER BY latest.created_at DESC, latest.id DESC
+               LIMIT 1
+           )
+           WHERE s.project_id = ?
+           ORDER BY s.order_index"""
+
+# Animaciones en curso (video_completion_service.resync); los literales tienen
+# que coincidir con el WHERE de idx_scenes_video_in_flight para que lo use
+IN_FLIGHT_VIDEO_SCENES = """SELECT id, project_id, video_task_id, video_provider, updated_at
+           FROM scenes
+           WHERE video_task_id IS NOT NULL
+             AND (video_status IS NULL OR video_status NOT IN ('completed', 'failed'))"""
@@ -0,0 +1,277 @@
+"""
+Provider rate limiter
+Token bucket por proveedor y API key, compartido entre workers de uvicorn
+y Celery a través de Redis (o en memoria para desarrollo y tests)
+"""
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import time
+
+import httpx
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except Exception:  # pragma: no cover - redis es opcional
+    aioredis = None
+
+
+# Tomar un token: devuelve los segundos a esperar (0 = token tomado)
+TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'blocked')
+local blocked = tonumber(state[3]) or 0
+if blocked > now then
+    return tostring(blocked - now)
+end
+if capacity <= 0 then
+    return '0'
+end
+local rate = capacity / period
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now), 'blocked', tostring(blocked))
+redis.call('EXPIRE', KEYS[1], math.ceil(period * 2) + 60)
+return tostring(wait)
+"""
+
+# Vaciar el bucket hasta now + ARGV[1] segundos (Retry-After)
+BLOCK_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local blocked_until = now + tonumber(ARGV[1])
+local blocked = tonumber(redis.call('HGET', KEYS[1], 'blocked')) or 0
+if blocked_until > blocked then
+    redis.call('HSET', KEYS[1], 'tokens', '0', 'updated', tostring(blocked_until), 'blocked', tostring(blocked_until))
+end
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[1])) + 60)
+return 1
+"""
+
+
+class RateLimitExceeded(Exception):
+    """The wait for a token would exceed RATE_LIMIT_MAX_WAIT"""
+
+    def __init__(self, provider: str, wait: float):
+        super().__init__(f"{provider} rate limit: next slot in {wait:.0f}s")
+        self.provider = provider
+        self.wait = wait
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos, aceptando segundos o una fecha HTTP"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class MemoryBucketStore:
+    """Token buckets in this process only"""
+
+    name = "memory"
+
+    def __init__(self):
+        # key → [tokens, updated, blocked_until]
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        now = time.time()
+        tokens, updated, blocked = self._buckets.get(key, (float(capacity), now, 0.0))
+        if blocked > now:
+            return blocked - now
+        if capacity <= 0:
+            return 0.0
+
+        rate = capacity / period
+        tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = [tokens, now, blocked]
+        return wait
+
+    async def block(self, key: str, seconds: float):
+        blocked_until = time.time() + seconds
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket[2] < blocked_until:
+            self._buckets[key] = [0.0, blocked_until, blocked_until]
+
+    async def close(self):
+        pass
+
+
+class RedisBucketStore:
+    """Token buckets shared through Redis, updated atomically by Lua scripts"""
+
+    name = "redis"
+
+    def __init__(self, redis_url: str):
+        self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        self._take = self._redis.register_script(TAKE_SCRIPT)
+        self._block = self._redis.register_script(BLOCK_SCRIPT)
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        return float(await self._take(keys=[key], args=[capacity, period]))
+
+    async def block(self, key: str, seconds: float):
+        await self._block(keys=[key], args=[seconds])
+
+    async def close(self):
+        await self._redis.close()
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter keyed by provider and API key.
+
+    Callers wait for a token before each request instead of sending one
+    that is going to be rejected. A `scope` gets its own bucket, with its
+    own limit when RATE_LIMITS has a "provider:scope" entry (status polls
+    are cheaper than submits) and the provider's limit otherwise. A 429 drains the bucket until its
+    Retry-After, so every worker sharing the key backs off together.
+    """
+
+    KEY_PREFIX = "heymake:ratelimit"
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[int, float]],
+        redis_url: str = "",
+        max_wait: float = 120.0,
+        max_retries: int = 2
+    ):
+        self.limits = limits
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self._memory = MemoryBucketStore()
+        self._store = self._memory
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+
+        if redis_url:
+            if aioredis is None:
+                print("⚠️ Paquete redis no instalado, el rate limit será por proceso")
+            else:
+                self._store = RedisBucketStore(redis_url)
+
+    def _limit(self, provider: str, scope: str) -> Tuple[int, float]:
+        if scope:
+            limit = self.limits.get(f"{provider}:{scope}")
+            if limit is not None:
+                return limit
+        return self.limits.get(provider, (0, 0.0))
+
+    def _key(self, provider: str, api_key: str, scope: str) -> str:
+        # Nunca guardar la API key en claro
+        digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        key = f"{self.KEY_PREFIX}:{provider}:{digest}"
+        return f"{key}:{scope}" if scope else key
+
+    async def _call(self, method: str, *args):
+        try:
+            return await getattr(self._store, method)(*args)
+        except Exception as e:
+            if self._store is self._memory:
+                raise
+            print(f"⚠️ Redis rate limit no disponible, usando memoria: {e}")
+            return await getattr(self._memory, method)(*args)
+
+    async def acquire(self, provider: str, api_key: str = "", scope: str = "") -> float:
+        """
+        Wait until the provider bucket hands out a token.
+
+        Returns:
+            Segundos esperados
+        """
+        capacity, period = self._limit(provider, scope)
+        key = self._key(provider, api_key, scope)
+        waited = 0.0
+
+        while True:
+            wait = await self._call("take", key, capacity, period)
+            if wait <= 0:
+                return waited
+            if waited + wait > self.max_wait:
+                raise RateLimitExceeded(provider, wait)
+            self.waits += 1
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+            waited += wait
+
+    async def penalize(self, provider: str, api_key: str = "", seconds: float = 1.0, scope: str = ""):
+        """Block the bucket for `seconds`, e.g. after a 429"""
+        self.throttled += 1
+        await self._call("block", self._key(provider, api_key, scope), seconds)
+
+    async def send(
+        self,
+        provider: str,
+        api_key: str,
+        request: Callable[[], Awaitable[httpx.Response]],
+        scope: str = "",
+        retries: Optional[int] = None
+    ) -> httpx.Response:
+        """
+        Send a request under the provider's limit.
+
+        A 429 blocks the bucket for its Retry-After (or an exponential
+        backoff when the header is missing) and the request is retried up
+        to `retries` times (default RATE_LIMIT_MAX_RETRIES); the last
+        response is returned as is.
+        """
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            await self.acquire(provider, api_key, scope)
+            response = await request()
+            if response.status_code != 429:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = 2.0 * 2 ** attempt
+            await self.penalize(provider, api_key, retry_after, scope)
+            if attempt < retries:
+                print(f"⏳ {provider} respondió 429, reintentando en {retry_after:.1f}s")
+        return response
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": self._store.name,
+            "waits": self.waits,
+            "waited_seconds": round(self.waited_seconds, 2),
+            "throttled": self.throttled,
+        }
+
+    async def close(self):
+        await self._store.close()
+
+
+rate_limiter = RateLimiter(
+    limits=settings.provider_rate_limits,
+    redis_url=settings.REDIS_URL if settings.RATE_LIMIT_REDIS_ENABLED else "",
+    max_wait=settings.RATE_LIMIT_MAX_WAIT,
+    max_retries=settings.RATE_LIMIT_MAX_RETRIES
+)
@@ -0,0 +1,179 @@
+"""
+Embedded replica for Turso reads
+Las lecturas se sirven desde un archivo SQLite local sincronizado con el
+primario; las escrituras siguen yendo al primario por HTTP
+"""
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple
+import asyncio
+import time
+
+from app.core.database import ResultSet, TursoClient, TursoTransaction
+from app.core.metrics import query_metrics
+
+
+READ_PREFIXES = ("SELECT", "WITH", "EXPLAIN", "PRAGMA")
+
+
+def is_read_statement(sql: str) -> bool:
+    """True for statements that can be answered by the local replica"""
+    return sql.lstrip().upper().startswith(READ_PREFIXES)
+
+
+def replica_supported() -> bool:
+    """Whether libsql (embedded replica with `sync()`) is installed"""
+    try:
+        import libsql_experimental  # type: ignore  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def connect_replica(path: str, sync_url: str, auth_token: str) -> Tuple[Any, bool]:
+    """
+    Open the local libsql embedded replica.
+
+    There is no sqlite3 fallback: a plain file never pulls from the
+    primary and would serve stale reads. Tests inject a stand-in through
+    ReplicaTursoClient's `connect`.
+
+    Returns:
+        Tupla (conexión, soporta_sync)
+
+    Raises:
+        ImportError si libsql no está instalado
+    """
+    import libsql_experimental as libsql  # type: ignore
+    conn = libsql.connect(path, sync_url=sync_url, auth_token=auth_token)
+    return conn, True
+
+
+class ReplicaTursoClient(TursoClient):
+    """
+    TursoClient that reads from an embedded replica.
+
+    Reads run against the local file on the event loop (they are
+    microsecond-scale indexed lookups). Writes go to the primary through
+    the regular HTTP path and mark the replica dirty; the next read syncs
+    first so a request always sees its own writes. A background task also
+    syncs every `sync_interval` seconds to pick up other writers.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        auth_token: str,
+        replica_path: str,
+        sync_interval: float = 60.0,
+        connect: Optional[Callable[[str, str, str], Tuple[Any, bool]]] = None,
+        **kwargs
+    ):
+        super().__init__(url, auth_token, **kwargs)
+        self.replica_path = replica_path
+        self.sync_interval = sync_interval
+        self._conn, self._can_sync = (connect or connect_replica)(replica_path, url, auth_token)
+        self._dirty = False
+        self._syncing = False
+        self._sync_lock = asyncio.Lock()
+        self._sync_task: Optional[asyncio.Task] = None
+        self.local_reads = 0
+        self.remote_reads = 0
+        self.syncs = 0
+
+    async def start(self):
+        """Initial sync and periodic background sync"""
+        await self.sync()
+        if self.sync_interval > 0:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"⚠️ Error sincronizando réplica: {e}")
+
+    async def sync(self):
+        """Pull the latest frames from the primary into the local file"""
+        async with self._sync_lock:
+            self._dirty = False
+            if not self._can_sync:
+                return
+            self._syncing = True
+            try:
+                # sync() es bloqueante (red), va a un thread
+                await asyncio.to_thread(self._conn.sync)
+                self.syncs += 1
+            except Exception:
+                self._dirty = True
+                raise
+            finally:
+                self._syncing = False
+
+    def _query_local(self, sql: str, parameters: Optional[list], columnar: bool = False):
+        start = time.perf_counter()
+        try:
+            cursor = self._conn.execute(sql, tuple(parameters or ()))
+            rows = cursor.fetchall()
+        except Exception:
+            query_metrics.observe_error([sql])
+            raise
+        query_metrics.observe([sql], time.perf_counter() - start, [len(rows)])
+        columns = [col[0] for col in cursor.description or ()]
+        if columnar:
+            return ResultSet(columns, rows)
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def execute_batch(
+        self,
+        statements: Sequence[Tuple[str, Optional[list]]],
+        columnar: bool = False
+    ) -> List[Any]:
+        if not statements:
+            return []
+
+        if not all(is_read_statement(sql) for sql, _ in statements):
+            try:
+                return await super().execute_batch(statements, columnar)
+            finally:
+                self._dirty = True
+
+        if self._dirty:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"⚠️ Réplica desactualizada, leyendo del primario: {e}")
+
+        if self._syncing or self._dirty:
+            # La conexión local está ocupada o atrasada
+            self.remote_reads += len(statements)
+            return await super().execute_batch(statements, columnar)
+
+        self.local_reads += len(statements)
+        return [self._query_local(sql, params, columnar) for sql, params in statements]
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[TursoTransaction]:
+        try:
+            async with super().transaction() as tx:
+                yield tx
+        finally:
+            self._dirty = True
+
+    def pool_stats(self):
+        stats = super().pool_stats()
+        stats["replica"] = {
+            "path": self.replica_path,
+            "sync_supported": self._can_sync,
+            "local_reads": self.local_reads,
+            "remote_reads": self.remote_reads,
+            "syncs": self.syncs,
+        }
+        return stats
+
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+        await super().close()
+        self._conn.close()
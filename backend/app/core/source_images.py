@@ -0,0 +1,254 @@
+"""
+Source image cache
+Imágenes de entrada de los proveedores de video (Supabase, URLs remotas o
+uploads/ locales) guardadas en disco ya codificadas en base64, para no
+volver a descargarlas ni a codificarlas en cada animación
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+import asyncio
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import time
+
+from app.core.concurrency import KeyedLock
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.image_cache import IMAGES_DIR, LOCAL_IMAGE_PATH
+
+
+class SourceImageCache:
+    """
+    Size-bounded on-disk LRU of source images, keyed by URL.
+
+    Each entry is the image already encoded as base64 (the form the video
+    APIs take in JSON) plus its validators. Within `ttl` seconds of the
+    last validation an entry is used as is; after that a conditional GET
+    (If-None-Match / If-Modified-Since) revalidates it and only a changed
+    image is downloaded again. Local uploads are read from disk and
+    re-encoded only when their mtime or size change. Downloads are encoded
+    chunk by chunk while streaming, and concurrent requests for the same
+    URL share one fetch.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float = 300.0):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._locks = KeyedLock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.revalidated = 0
+        self.fetches = 0
+        self.evictions = 0
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.b64", self.directory / f"{key}.json"
+
+    async def get_base64(self, url: str) -> Tuple[str, str]:
+        """
+        Imagen de `url` en base64
+
+        Returns:
+            Tupla (base64, mime type)
+
+        Raises:
+            FileNotFoundError si es local y no existe
+            httpx.HTTPError si la descarga falla
+        """
+        async with self._locks.hold(url):
+            self.directory.mkdir(parents=True, exist_ok=True)
+            local_path = _local_path(url)
+            if local_path is not None:
+                return await self._get_local(url, local_path)
+            return await self._get_remote(url)
+
+    async def _get_local(self, url: str, path: Path) -> Tuple[str, str]:
+        data_path, meta_path = self._paths(url)
+        # Leer y codificar el archivo fuera del event loop
+        meta, replaced = await asyncio.to_thread(_encode_local, url, path, data_path, meta_path)
+        if replaced is None:
+            self.hits += 1
+        else:
+            self._stored(data_path, meta_path, meta, replaced)
+        return await asyncio.to_thread(self._use, data_path), meta["mime_type"]
+
+    async def _get_remote(self, url: str) -> Tuple[str, str]:
+        data_path, meta_path = self._paths(url)
+        meta = _read_meta(meta_path) if data_path.is_file() else None
+        if meta and time.time() - meta.get("validated_at", 0) < self.ttl:
+            self.hits += 1
+            return self._use(data_path), meta["mime_type"]
+
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        partial = data_path.with_name(data_path.name + ".part")
+        async with get_http_client("downloads", timeout=120.0, follow_redirects=True) as client:
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and meta:
+                    self.revalidated += 1
+                    meta["validated_at"] = time.time()
+                    _write_meta(meta_path, meta)
+                    return self._use(data_path), meta["mime_type"]
+                response.raise_for_status()
+                self.fetches += 1
+                mime_type = (
+                    response.headers.get("content-type", "").split(";")[0].strip()
+                    or mimetypes.guess_type(urlparse(url).path)[0]
+                    or "image/png"
+                )
+                replaced = _file_size(data_path)
+                try:
+                    with open(partial, "wb") as target:
+                        await _encode_async_stream(
+                            response.aiter_bytes(settings.HTTP_STREAM_CHUNK_SIZE), target
+                        )
+                    os.replace(partial, data_path)
+                except BaseException:
+                    partial.unlink(missing_ok=True)
+                    raise
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+
+        self._stored(data_path, meta_path, {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "mime_type": mime_type,
+            "validated_at": time.time(),
+        }, replaced)
+        return self._use(data_path), mime_type
+
+    def _use(self, data_path: Path) -> str:
+        """Leer la entrada y marcarla como usada recién (orden del LRU)"""
+        os.utime(data_path)
+        return data_path.read_text("ascii")
+
+    def _stored(self, data_path: Path, meta_path: Path, meta: Dict[str, Any], replaced: int = 0):
+        """Registrar una entrada recién escrita; `replaced` es el tamaño de la versión que pisó"""
+        _write_meta(meta_path, meta)
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.directory.glob("*.b64"))
+        else:
+            self._size += data_path.stat().st_size - replaced
+        self._evict(keep=data_path)
+
+    def _evict(self, keep: Path):
+        """Borrar las entradas usadas hace más tiempo hasta volver bajo max_bytes"""
+        if self._size <= self.max_bytes:
+            return
+        entries = sorted(
+            (p for p in self.directory.glob("*.b64") if p != keep),
+            key=lambda p: p.stat().st_mtime
+        )
+        for path in entries:
+            if self._size <= self.max_bytes:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bytes": self._size or 0,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "fetches": self.fetches,
+            "evictions": self.evictions,
+        }
+
+
+def _local_path(url: str) -> Optional[Path]:
+    """
+    Archivo de uploads/ detrás de una URL local (None si es remota)
+
+    Las imágenes guardadas por la API se sirven en LOCAL_IMAGE_PATH, con la
+    URL relativa (/api/v1/assets/image/<archivo>) o en localhost.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return Path(unquote(parsed.path))
+    if LOCAL_IMAGE_PATH in parsed.path and parsed.hostname in (None, "localhost", "127.0.0.1"):
+        # Solo el nombre: uploads/images es plano y así no se sale del directorio
+        return IMAGES_DIR / Path(unquote(parsed.path.rsplit(LOCAL_IMAGE_PATH, 1)[1])).name
+    return None
+
+
+def _encode_local(url: str, path: Path, data_path: Path, meta_path: Path) -> Tuple[Dict[str, Any], Optional[int]]:
+    """
+    Codificar un upload local si cambió desde la última vez
+
+    Returns:
+        Tupla (meta, tamaño de la versión pisada); None en lugar del tamaño
+        si la entrada ya estaba al día
+    """
+    if not path.is_file():
+        raise FileNotFoundError(f"Local image not found: {path}")
+    stat = path.stat()
+    version = f"{stat.st_mtime_ns}-{stat.st_size}"
+    meta = _read_meta(meta_path)
+    if meta and meta.get("version") == version and data_path.is_file():
+        return meta, None
+
+    mime_type = mimetypes.guess_type(path.name)[0] or "image/png"
+    replaced = _file_size(data_path)
+    with open(path, "rb") as source, open(data_path, "wb") as target:
+        _encode_stream(iter(lambda: source.read(settings.HTTP_STREAM_CHUNK_SIZE), b""), target)
+    return {"url": url, "version": version, "mime_type": mime_type}, replaced
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _read_meta(meta_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(meta_path.read_text("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: Path, meta: Dict[str, Any]):
+    meta_path.write_text(json.dumps(meta), "utf-8")
+
+
+def _encode_stream(chunks, target):
+    """Codificar en base64 por chunks (múltiplos de 3 bytes, sin padding intermedio)"""
+    rest = b""
+    for chunk in chunks:
+        data = rest + chunk
+        cut = len(data) - len(data) % 3
+        target.write(base64.b64encode(data[:cut]))
+        rest = data[cut:]
+    target.write(base64.b64encode(rest))
+
+
+async def _encode_async_stream(chunks, target):
+    rest = b""
+    async for chunk in chunks:
+        data = rest + chunk
+        cut = len(data) - len(data) % 3
+        target.write(base64.b64encode(data[:cut]))
+        rest = data[cut:]
+    target.write(base64.b64encode(rest))
+
+
+source_image_cache = SourceImageCache(
+    directory=settings.SOURCE_IMAGE_CACHE_DIR,
+    max_bytes=settings.SOURCE_IMAGE_CACHE_MAX_MB * 1024 * 1024,
+    ttl=settings.SOURCE_IMAGE_CACHE_TTL
+)
@@ -0,0 +1,285 @@
+"""
+Centralized status poller
+Una sola tarea en background consulta el estado de todos los requests
+asíncronos en curso (Higgsfield, ...) y resuelve el future de cada uno;
+los webhooks de los proveedores lo resuelven antes (ver resolve)
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import random
+import time
+
+from app.core.config import settings
+
+
+# Recibe los request ids vencidos y devuelve {request_id: status}
+StatusFetcher = Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+TerminalCheck = Callable[[Dict[str, Any]], bool]
+
+
+class PollTimeout(Exception):
+    """The request did not reach a terminal status before its deadline"""
+
+    def __init__(self, provider: str, request_id: str, timeout: float):
+        super().__init__(f"{provider} request {request_id} not finished after {timeout:g}s")
+        self.provider = provider
+        self.request_id = request_id
+        self.timeout = timeout
+
+
+class _PendingRequest:
+    """One in-flight provider request and its polling schedule"""
+
+    __slots__ = ("provider", "request_id", "future", "interval", "next_at", "deadline", "timeout", "waiters")
+
+    def __init__(
+        self,
+        provider: str,
+        request_id: str,
+        future: asyncio.Future,
+        now: float,
+        interval: float,
+        timeout: float,
+        first_poll_after: Optional[float] = None
+    ):
+        self.provider = provider
+        self.request_id = request_id
+        self.future = future
+        self.interval = interval
+        self.next_at = now + (interval if first_poll_after is None else first_poll_after)
+        self.deadline = now + timeout
+        self.timeout = timeout
+        self.waiters = 0
+
+
+class StatusPoller:
+    """
+    Multiplexed poller for async provider jobs.
+
+    Callers register a request id and await its future instead of running
+    their own sleep+GET loop. A single background task wakes up when the
+    next request is due, fetches every due id of a provider in one call
+    (the provider's fetcher batches when its API allows it) and backs off
+    each request exponentially with jitter, so poll traffic and coroutine
+    count stay flat however many generations are in flight.
+
+    When the provider reports completion by webhook, `resolve` completes
+    the future immediately; polling then only runs as a fallback after
+    `first_poll_after` seconds without a callback.
+    """
+
+    # Callbacks que llegan antes de que alguien espere el request
+    EARLY_RESULT_TTL = 300.0
+    EARLY_RESULT_MAX = 1000
+
+    def __init__(
+        self,
+        initial_interval: float = 2.0,
+        max_interval: float = 15.0,
+        backoff: float = 1.5,
+        jitter: float = 0.2
+    ):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self._providers: Dict[str, Tuple[StatusFetcher, TerminalCheck]] = {}
+        self._pending: Dict[Tuple[str, str], _PendingRequest] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._early: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+        self.polls = 0
+        self.fetches = 0
+        self.resolved = 0
+        self.pushed = 0
+        self.timeouts = 0
+
+    def register_provider(self, provider: str, fetch: StatusFetcher, is_terminal: TerminalCheck):
+        """Declare how to fetch statuses of a provider and when a job is done"""
+        self._providers[provider] = (fetch, is_terminal)
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Nuevo event loop (scripts, tests): lo anterior quedó inutilizable
+            self._loop = loop
+            self._pending.clear()
+            self._task = None
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def is_registered(self, provider: str) -> bool:
+        return provider in self._providers
+
+    async def wait(
+        self,
+        provider: str,
+        request_id: str,
+        timeout: float = 120.0,
+        first_poll_after: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Wait until the request reaches a terminal status.
+
+        `first_poll_after` delays the first status check, for requests
+        whose completion is expected by webhook.
+
+        Returns:
+            Último status devuelto por el proveedor
+
+        Raises:
+            PollTimeout si no termina antes de `timeout` segundos
+        """
+        if provider not in self._providers:
+            raise ValueError(f"No status fetcher registered for provider '{provider}'")
+
+        self._ensure_running()
+        key = (provider, request_id)
+        early = self._early.pop(key, None)
+        if early is not None and early[1] > time.monotonic():
+            return early[0]
+
+        entry = self._pending.get(key)
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            entry = _PendingRequest(
+                provider, request_id, loop.create_future(),
+                loop.time(), self.initial_interval, timeout, first_poll_after
+            )
+            self._pending[key] = entry
+
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.future)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.future.done():
+                # Nadie más espera este request: dejar de consultarlo
+                entry.future.cancel()
+                self._pending.pop(key, None)
+
+    def resolve(self, provider: str, request_id: str, status: Dict[str, Any]) -> bool:
+        """
+        Complete a request from a pushed status (webhook).
+
+        Non-terminal statuses are ignored. A terminal status for a request
+        nobody is waiting on yet is kept for EARLY_RESULT_TTL seconds, since
+        the callback can beat the caller to `wait`.
+
+        Returns:
+            True si había alguien esperando el request
+        """
+        entry_provider = self._providers.get(provider)
+        if entry_provider is None or not entry_provider[1](status):
+            return False
+
+        key = (provider, request_id)
+        entry = self._pending.pop(key, None)
+        if entry is not None and not entry.future.done():
+            self.pushed += 1
+            entry.future.set_result(status)
+            return True
+
+        now = time.monotonic()
+        if len(self._early) >= self.EARLY_RESULT_MAX:
+            self._early = {k: v for k, v in self._early.items() if v[1] > now}
+        if len(self._early) < self.EARLY_RESULT_MAX:
+            self._early[key] = (status, now + self.EARLY_RESULT_TTL)
+        return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            now = loop.time()
+            due: Dict[str, List[_PendingRequest]] = {}
+            for entry in self._pending.values():
+                if entry.next_at <= now or entry.deadline <= now:
+                    due.setdefault(entry.provider, []).append(entry)
+
+            # Sumar al mismo fetch los requests que vencen en breve: el jitter
+            # los dispersa, pero no hace falta una consulta para cada uno
+            window = now + self.initial_interval / 2
+            for entry in self._pending.values():
+                batch = due.get(entry.provider)
+                if batch is not None and now < entry.next_at <= window and entry.deadline > now:
+                    batch.append(entry)
+
+            if not due:
+                next_at = min(min(e.next_at, e.deadline) for e in self._pending.values())
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_at - now))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await asyncio.gather(*(
+                self._poll(provider, entries) for provider, entries in due.items()
+            ))
+
+    async def _poll(self, provider: str, entries: List[_PendingRequest]):
+        fetch, is_terminal = self._providers[provider]
+        loop = asyncio.get_running_loop()
+        active = [e for e in entries if not e.future.done() and e.deadline > loop.time()]
+
+        statuses: Dict[str, Dict[str, Any]] = {}
+        if active:
+            self.fetches += 1
+            self.polls += len(active)
+            try:
+                statuses = await fetch([e.request_id for e in active])
+            except Exception as e:
+                print(f"⚠️ Status poll de {provider} falló ({len(active)} requests): {e}")
+
+        now = loop.time()
+        for entry in entries:
+            if entry.future.done():
+                self._pending.pop((entry.provider, entry.request_id), None)
+                continue
+
+            status = statuses.get(entry.request_id)
+            if status is not None and is_terminal(status):
+                self.resolved += 1
+                entry.future.set_result(status)
+                self._pending.pop((entry.provider, entry.request_id), None)
+            elif now >= entry.deadline:
+                self.timeouts += 1
+                entry.future.set_exception(PollTimeout(provider, entry.request_id, entry.timeout))
+                self._pending.pop((entry.provider, entry.request_id), None)
+            else:
+                entry.interval = min(self.max_interval, entry.interval * self.backoff)
+                spread = random.uniform(1 - self.jitter, 1 + self.jitter)
+                entry.next_at = now + entry.interval * spread
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "polls": self.polls,
+            "fetches": self.fetches,
+            "resolved": self.resolved,
+            "pushed": self.pushed,
+            "timeouts": self.timeouts,
+        }
+
+    async def close(self):
+        """Stop the background task and fail whoever is still waiting"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        for entry in self._pending.values():
+            if not entry.future.done():
+                entry.future.cancel()
+        self._pending.clear()
+        self._early.clear()
+        self._task = None
+
+
+status_poller = StatusPoller(
+    initial_interval=settings.STATUS_POLL_INITIAL_INTERVAL,
+    max_interval=settings.STATUS_POLL_MAX_INTERVAL,
+    backoff=settings.STATUS_POLL_BACKOFF,
+    jitter=settings.STATUS_POLL_JITTER
+)
@@ -0,0 +1,120 @@
+"""
+Provider webhooks
+URLs de callback firmadas para que los proveedores avisen cuando termina
+un request, en lugar de esperar al próximo status poll
+"""
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import hmac
+import secrets
+import time
+
+from app.core.config import settings
+
+
+WEBHOOK_PATH = "/api/v1/webhooks/"
+SIGNATURE_HEADER = "X-Webhook-Signature"
+
+
+def _secret() -> bytes:
+    return (settings.WEBHOOK_SECRET or settings.SECRET_KEY).encode("utf-8")
+
+
+def webhook_token(provider: str, nonce: str) -> str:
+    """Token of one callback URL (HMAC of the provider and the request's nonce)"""
+    return hmac.new(_secret(), f"{provider}:{nonce}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def webhooks_enabled() -> bool:
+    return bool(settings.WEBHOOK_BASE_URL)
+
+
+class WebhookRequests:
+    """
+    Callback nonces issued by this process and the request each one is for.
+
+    Every submit gets its own nonce, and a nonce resolves exactly one
+    provider request: the one bound once the submit returns its id, or
+    the first id its callback reports if the callback arrives first.
+    """
+
+    TTL = 6 * 3600.0
+    MAX = 10000
+
+    def __init__(self):
+        # (provider, nonce) → [request_id o None, vence]
+        self._nonces: Dict[Tuple[str, str], List] = {}
+
+    def issue(self, provider: str) -> str:
+        now = time.monotonic()
+        if len(self._nonces) >= self.MAX:
+            self._nonces = {k: v for k, v in self._nonces.items() if v[1] > now}
+        nonce = secrets.token_urlsafe(16)
+        self._nonces[(provider, nonce)] = [None, now + self.TTL]
+        return nonce
+
+    def bind(self, provider: str, nonce: str, request_id: str):
+        """Tie a nonce to the request id the provider returned"""
+        entry = self._nonces.get((provider, nonce))
+        if entry is None:
+            return
+        if entry[0] is not None and entry[0] != request_id:
+            print(f"⚠️ Webhook {provider}: el callback reportó {entry[0]}, el submit devolvió {request_id}")
+        entry[0] = request_id
+
+    def claim(self, provider: str, nonce: str, request_id: str) -> bool:
+        """Whether a callback for `request_id` may use this nonce's URL"""
+        entry = self._nonces.get((provider, nonce))
+        if entry is None or entry[1] <= time.monotonic():
+            return False
+        if entry[0] is None:
+            entry[0] = request_id
+        return entry[0] == request_id
+
+
+webhook_requests = WebhookRequests()
+
+
+class Webhook:
+    """Callback URL of one provider request"""
+
+    __slots__ = ("provider", "nonce", "url")
+
+    def __init__(self, provider: str, nonce: str, url: str):
+        self.provider = provider
+        self.nonce = nonce
+        self.url = url
+
+    def bind(self, request_id: str):
+        webhook_requests.bind(self.provider, self.nonce, request_id)
+
+
+def new_webhook(provider: str) -> Optional[Webhook]:
+    """
+    Callback URL for a new provider request, or None if webhooks are disabled.
+
+    Most providers do not sign their callbacks, so the URL itself carries
+    the proof: a per-request nonce and a token only this server can
+    compute. Bind it to the request id once the provider returns one.
+    """
+    if not webhooks_enabled():
+        return None
+    nonce = webhook_requests.issue(provider)
+    base = settings.WEBHOOK_BASE_URL.rstrip("/")
+    url = f"{base}{WEBHOOK_PATH}{provider}?nonce={nonce}&token={webhook_token(provider, nonce)}"
+    return Webhook(provider, nonce, url)
+
+
+def sign_webhook(body: bytes) -> str:
+    """Signature of a raw body, as sent in X-Webhook-Signature"""
+    return "sha256=" + hmac.new(_secret(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Whether the body carries a valid X-Webhook-Signature"""
+    return bool(signature) and hmac.compare_digest(signature, sign_webhook(body))
+
+
+def verify_token(provider: str, nonce: Optional[str], token: Optional[str]) -> bool:
+    """Whether the URL token was issued by this server for that nonce"""
+    return bool(nonce and token) and hmac.compare_digest(token, webhook_token(provider, nonce))
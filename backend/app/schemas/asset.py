@@ -1,37 +1,38 @@
 """
 Asset Schemas
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, field_validator
 from typing import Optional, Dict, Any
 from datetime import datetime
+import json
 
-from app.models.asset import AssetType, AssetStatus
 
-
-class AssetBase(BaseModel):
-    """Base asset schema"""
-    type: AssetType
-    filename: str
-    
-
-class AssetResponse(AssetBase):
-    """Schema de respuesta de asset"""
+class AssetResponse(BaseModel):
+    """Schema de respuesta de asset (fila de la tabla assets en Turso)"""
     id: str
-    project_id: str
-    status: AssetStatus
-    original_filename: Optional[str] = None
-    file_path: Optional[str] = None
-    file_size: Optional[int] = None
-    mime_type: Optional[str] = None
-    width: Optional[int] = None
-    height: Optional[int] = None
-    duration: Optional[float] = None
+    scene_id: str
+    type: str
+    url: Optional[str] = None
+    status: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
-    generated_by: Optional[str] = None
-    generation_prompt: Optional[str] = None
-    generation_params: Optional[Dict[str, Any]] = None
     created_at: datetime
-    updated_at: Optional[datetime] = None
-    
+
+    @field_validator("metadata", mode="before")
+    @classmethod
+    def parse_metadata(cls, value):
+        """Turso guarda metadata como texto JSON"""
+        if isinstance(value, str):
+            try:
+                return json.loads(value) if value else None
+            except ValueError:
+                return {"raw": value}
+        return value
+
     class Config:
         from_attributes = True
+
+
+class ProjectAssetResponse(AssetResponse):
+    """Asset con la info de su escena, para listados por proyecto"""
+    scene_order: Optional[int] = None
+    scene_title: Optional[str] = None
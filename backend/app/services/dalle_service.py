@@ -2,15 +2,23 @@
 DALL-E Image Service
 Servicio para generar imágenes usando OpenAI DALL-E
 """
+import asyncio
 import httpx
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.rate_limit import rate_limiter
+from app.services.image_batch import BatchImageGeneration, BatchResult
 
 
-class DalleService:
+class DalleService(BatchImageGeneration):
     """Servicio para generación de imágenes con OpenAI DALL-E"""
     
+    DEFAULT_MODEL = "dall-e-2"  # Más estable que DALL-E 3
+    # DALL-E 2 acepta hasta n=10 imágenes por request (DALL-E 3 solo n=1)
+    MAX_IMAGES_PER_REQUEST = 10
+    
     def __init__(self):
         self.api_key = settings.OPENAI_API_KEY
         self.api_url = "https://api.openai.com/v1"
@@ -25,8 +33,9 @@ class DalleService:
         width: int = 1024,
         height: int = 1024,
         style: Optional[str] = None,
-        model: str = "dall-e-2",  # Usando DALL-E 2 por defecto (más estable)
-        quality: str = "standard"  # "standard" o "hd"
+        model: str = DEFAULT_MODEL,
+        quality: str = "standard",  # "standard" o "hd"
+        n: int = 1
     ) -> Dict[str, Any]:
         """
         Genera una imagen usando OpenAI DALL-E 3
@@ -38,9 +47,11 @@ class DalleService:
             style: Estilo de la imagen (se añade al prompt)
             model: Modelo a usar (dall-e-3 o dall-e-2)
             quality: Calidad (standard o hd)
+            n: Cantidad de imágenes (solo DALL-E 2, hasta 10)
         
         Returns:
             Dict con información de la imagen generada incluyendo URL
+            (y en "images" las URLs de todas si n > 1)
         """
         
         # Construir el prompt completo
@@ -64,7 +75,7 @@ class DalleService:
         payload = {
             "model": model,
             "prompt": full_prompt,
-            "n": 1,
+            "n": n if model == "dall-e-2" else 1,
             "size": size
         }
         
@@ -72,12 +83,12 @@ class DalleService:
         if model == "dall-e-3":
             payload["quality"] = quality
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
+        async with get_http_client("openai", timeout=120.0) as client:
+            response = await rate_limiter.send("dalle", self.api_key, lambda: client.post(
                 f"{self.api_url}/images/generations",
                 headers=self.headers,
                 json=payload
-            )
+            ))
             
             if response.status_code != 200:
                 error_text = response.text
@@ -92,8 +103,36 @@ class DalleService:
                 return {
                     "success": True,
                     "image_url": result["data"][0].get("url"),
+                    "images": [item.get("url") for item in result["data"]],
                     "revised_prompt": result["data"][0].get("revised_prompt"),
                     "data": result
                 }
             
             raise Exception("No image data in response")
+    
+    async def _generate_prompt_images(
+        self,
+        prompt: str,
+        count: int,
+        width: int,
+        height: int,
+        style: Optional[str]
+    ) -> List[BatchResult]:
+        """Las imágenes de un mismo prompt en requests de hasta n=10"""
+        sizes = [
+            min(self.MAX_IMAGES_PER_REQUEST, count - start)
+            for start in range(0, count, self.MAX_IMAGES_PER_REQUEST)
+        ]
+        responses = await asyncio.gather(
+            *(self.generate_image(prompt=prompt, width=width, height=height, style=style, n=size) for size in sizes),
+            return_exceptions=True
+        )
+        
+        images: List[BatchResult] = []
+        for size, response in zip(sizes, responses):
+            if isinstance(response, Exception):
+                images.extend([response] * size)
+                continue
+            urls = response.get("images") or [response["image_url"]]
+            images.extend({**response, "image_url": url} for url in urls[:size])
+        return images
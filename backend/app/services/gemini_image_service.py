@@ -3,14 +3,45 @@ Gemini Image Service
 Servicio para generación de imágenes usando Google Gemini API
 Soporta múltiples modelos con fallback automático
 """
+import asyncio
 import httpx
 from typing import Optional, Dict, Any, List
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.model_health import model_health
+from app.core.rate_limit import rate_limiter
+from app.services.image_batch import BatchImageGeneration, BatchResult
 
 
-class GeminiImageService:
+def quota_retry_delay(error_data: Dict[str, Any]) -> Optional[float]:
+    """
+    retryDelay de un 429 de Google, en segundos.
+    
+    Con quota diaria agotada se ignora (el retryDelay es corto pero la
+    quota no vuelve hasta el día siguiente) y rige MODEL_QUOTA_COOLDOWN.
+    """
+    delay = None
+    for detail in error_data.get("error", {}).get("details", []) or []:
+        for violation in detail.get("violations", []) or []:
+            if "PerDay" in (violation.get("quotaId") or ""):
+                return None
+        retry_delay = detail.get("retryDelay")
+        if isinstance(retry_delay, str) and retry_delay.endswith("s"):
+            try:
+                delay = float(retry_delay[:-1])
+            except ValueError:
+                pass
+    return delay
+
+
+class GeminiImageService(BatchImageGeneration):
     """Servicio para generar imágenes con Google Gemini"""
     
+    # candidateCount: varias candidatas del mismo prompt en un request
+    MAX_IMAGES_PER_REQUEST = 4
+    # Varias escenas distintas en un request (una imagen por descripción, en orden)
+    MAX_PROMPTS_PER_REQUEST = 4
+    
     # Lista de modelos en orden de preferencia para generación de imagen
     IMAGE_MODELS = [
         {"id": "gemini-2.0-flash-exp-image-generation", "modalities": ["TEXT", "IMAGE"]},
@@ -23,16 +54,93 @@ class GeminiImageService:
         self.api_key = settings.GOOGLE_AI_API_KEY
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
     
+    async def _generate_prompt_images(
+        self,
+        prompt: str,
+        count: int,
+        width: int,
+        height: int,
+        style: Optional[str]
+    ) -> List[BatchResult]:
+        """
+        Las imágenes de un mismo prompt con candidateCount
+        
+        Si el modelo devuelve menos candidatas de las pedidas, se vuelve a
+        pedir por las que faltan; un error corta y completa con el error.
+        """
+        images: List[BatchResult] = []
+        per_request = self.MAX_IMAGES_PER_REQUEST
+        while len(images) < count:
+            remaining = count - len(images)
+            result = await self.generate_image(
+                prompt=prompt, width=width, height=height, style=style,
+                candidate_count=min(remaining, per_request)
+            )
+            if not result.get("success") and result.get("error_code") == "bad_request" and per_request > 1 and remaining > 1:
+                # El modelo no acepta candidateCount: seguir de a una imagen
+                per_request = 1
+                continue
+            if not result.get("success"):
+                images.extend([result] * remaining)
+                break
+            urls = result.get("images") or [result["image_url"]]
+            images.extend({**result, "image_url": url} for url in urls[:remaining])
+        return images
+    
+    async def _generate_prompts_images(
+        self,
+        prompts: List[str],
+        width: int,
+        height: int,
+        style: Optional[str]
+    ) -> List[BatchResult]:
+        """
+        Una imagen por prompt en un solo request multi-prompt
+        
+        El modelo devuelve las imágenes en el orden de la lista; las que
+        falten se piden de a una, y un error de quota corta para todas.
+        """
+        if len(prompts) == 1:
+            return [await self.generate_image(prompt=prompts[0], width=width, height=height, style=style)]
+        
+        numbered = "\n".join(f"{index}. {prompt}" for index, prompt in enumerate(prompts, 1))
+        combined = (
+            f"Generate {len(prompts)} separate images, one for each description below, "
+            f"in the same order:\n{numbered}"
+        )
+        result = await self.generate_image(prompt=combined, width=width, height=height, style=style)
+        if not result.get("success") and result.get("error_code") in ("quota_exhausted", "no_api_key"):
+            return [result] * len(prompts)
+        
+        urls = (result.get("images") or []) if result.get("success") else []
+        images: List[BatchResult] = [{**result, "image_url": url} for url in urls[:len(prompts)]]
+        missing = prompts[len(images):]
+        if missing:
+            print(f"⚠️ Gemini: {len(missing)} de {len(prompts)} imágenes sin generar en el request multi-prompt, pidiendo de a una...")
+            images.extend(await asyncio.gather(
+                *(self.generate_image(prompt=prompt, width=width, height=height, style=style) for prompt in missing),
+                return_exceptions=True
+            ))
+        return images
+    
+    @classmethod
+    def model_health(cls) -> List[Dict[str, Any]]:
+        """Estado de cada modelo de la cadena de fallback"""
+        return model_health.snapshot("gemini", [model["id"] for model in cls.IMAGE_MODELS])
+    
     async def generate_image(
         self,
         prompt: str,
         width: int = 1024,
         height: int = 768,
         style: Optional[str] = None,
-        aspect_ratio: str = "16:9"
+        aspect_ratio: str = "16:9",
+        candidate_count: int = 1
     ) -> Dict[str, Any]:
         """
         Genera una imagen usando Gemini, intentando múltiples modelos con fallback.
+        Con candidate_count > 1 pide varias candidatas en el mismo request
+        (quedan en "images"; algunos modelos devuelven menos).
         """
         
         if not self.api_key:
@@ -42,35 +150,79 @@ class GeminiImageService:
                 "error_code": "no_api_key"
             }
         
-        last_error = None
-        
-        for model_config in self.IMAGE_MODELS:
-            model_id = model_config["id"]
-            modalities = model_config["modalities"]
-            
-            print(f"🎨 Gemini: Intentando con modelo {model_id}...")
-            result = await self._try_model(model_id, modalities, prompt, style)
+        for attempt in range(2):
+            last_error = None
+            skipped = []
             
-            if result["success"]:
-                return result
-            
-            error_code = result.get("error_code", "")
-            last_error = result
-            
-            # Si es quota exhausted, probar siguiente modelo
-            if error_code == "quota_exhausted":
-                print(f"⚠️ Gemini: Quota agotada en {model_id}, probando siguiente modelo...")
+            for model_config in self.IMAGE_MODELS:
+                model_id = model_config["id"]
+                modalities = model_config["modalities"]
+                
+                # Modelos con quota agotada o fallando: no gastar un round trip
+                if not model_health.available("gemini", model_id):
+                    skipped.append(model_id)
+                    continue
+                
+                print(f"🎨 Gemini: Intentando con modelo {model_id}...")
+                result = None
+                try:
+                    result = await self._try_model(model_id, modalities, prompt, style, candidate_count)
+                finally:
+                    if result is None:
+                        # Cancelado o excepción: soltar el probe sin marcar el modelo
+                        model_health.release_probe("gemini", model_id)
+                
+                if result["success"]:
+                    model_health.record_success("gemini", model_id)
+                    return result
+                
+                error_code = result.get("error_code", "")
+                model_health.record_failure(
+                    "gemini", model_id, error_code,
+                    error=result.get("error"), retry_after=result.get("retry_after")
+                )
+                last_error = result
+                
+                # Si es quota exhausted, probar siguiente modelo
+                if error_code == "quota_exhausted":
+                    print(f"⚠️ Gemini: Quota agotada en {model_id}, probando siguiente modelo...")
+                    continue
+                
+                # Si es NSFW o error de contenido, no tiene sentido probar otro modelo
+                if error_code in ("nsfw", "safety_blocked"):
+                    return result
+                
+                # Para otros errores, seguir intentando
+                print(f"⚠️ Gemini: Error en {model_id}: {result.get('error')}, probando siguiente...")
                 continue
             
-            # Si es NSFW o error de contenido, no tiene sentido probar otro modelo
-            if error_code in ("nsfw", "safety_blocked"):
-                return result
-            
-            # Para otros errores, seguir intentando
-            print(f"⚠️ Gemini: Error en {model_id}: {result.get('error')}, probando siguiente...")
-            continue
+            busy = [model_id for model_id in skipped if model_health.probing("gemini", model_id)]
+            if attempt == 0 and last_error is None and busy:
+                # Solo en pausa porque otro request lo está probando: esperar su
+                # resultado y volver a recorrer la cadena una vez
+                print(f"⏳ Gemini: esperando el probe de {busy[0]}...")
+                await model_health.wait_probe("gemini", busy[0])
+                continue
+            break
         
         # Si ningún modelo funcionó
+        if last_error is None and busy:
+            # El probe sigue en curso: no es quota agotada, que se reintente la escena
+            return {
+                "success": False,
+                "error": f"Modelo {busy[0]} en verificación por otro request, intentá de nuevo en unos segundos",
+                "error_code": "overloaded"
+            }
+        
+        if last_error is None and skipped:
+            retry_in = min(model_health.retry_in("gemini", model_id) for model_id in skipped)
+            return {
+                "success": False,
+                "error": f"Todos los modelos de Gemini están en pausa (quota agotada o fallando). Próximo intento en {retry_in / 60:.0f} min.",
+                "error_code": "quota_exhausted",
+                "retry_in": round(retry_in)
+            }
+        
         if last_error and last_error.get("error_code") == "quota_exhausted":
             return {
                 "success": False,
@@ -89,7 +241,8 @@ class GeminiImageService:
         model_id: str,
         modalities: List[str],
         prompt: str,
-        style: Optional[str] = None
+        style: Optional[str] = None,
+        candidate_count: int = 1
     ) -> Dict[str, Any]:
         """Intenta generar imagen con un modelo específico"""
         
@@ -114,15 +267,18 @@ class GeminiImageService:
                 "responseModalities": modalities
             }
         }
+        if candidate_count > 1:
+            payload["generationConfig"]["candidateCount"] = candidate_count
         
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
+            async with get_http_client("google", timeout=120.0) as client:
+                # La quota de Gemini es por modelo; sin reintentos, el caller cae al siguiente modelo
+                response = await rate_limiter.send("gemini", self.api_key, lambda: client.post(
                     url,
                     headers={"Content-Type": "application/json"},
                     json=payload,
                     params={"key": self.api_key}
-                )
+                ), scope=model_id, retries=0)
                 
                 if response.status_code == 429:
                     error_data = response.json() if response.text else {}
@@ -131,7 +287,8 @@ class GeminiImageService:
                     return {
                         "success": False,
                         "error": f"Quota agotada en modelo {model_id}: {error_msg[:150]}",
-                        "error_code": "quota_exhausted"
+                        "error_code": "quota_exhausted",
+                        "retry_after": quota_retry_delay(error_data)
                     }
                 
                 if response.status_code == 400:
@@ -162,10 +319,31 @@ class GeminiImageService:
                 
                 data = response.json()
                 
+                # Juntar las imágenes de todas las candidatas
+                candidates = data.get("candidates") or []
+                images = []
+                for candidate in candidates:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if "inlineData" in part:
+                            mime_type = part["inlineData"].get("mimeType", "image/jpeg")
+                            base64_data = part["inlineData"].get("data", "")
+                            images.append((mime_type, f"data:{mime_type};base64,{base64_data}"))
+                
+                if images:
+                    mime_type, image_url = images[0]
+                    print(f"✅ Gemini: {len(images)} imagen(es) generada(s) con {model_id}")
+                    return {
+                        "success": True,
+                        "image_url": image_url,
+                        "images": [url for _, url in images],
+                        "mime_type": mime_type,
+                        "model": model_id,
+                        "data": {}
+                    }
+                
                 # Verificar si el contenido fue bloqueado por safety
-                if "candidates" in data and len(data["candidates"]) > 0:
-                    candidate = data["candidates"][0]
-                    finish_reason = candidate.get("finishReason", "")
+                if candidates:
+                    finish_reason = candidates[0].get("finishReason", "")
                     
                     if finish_reason == "SAFETY":
                         return {
@@ -180,23 +358,6 @@ class GeminiImageService:
                             "error": f"El modelo {model_id} no pudo generar una imagen para este prompt",
                             "error_code": "no_image"
                         }
-                    
-                    if "content" in candidate and "parts" in candidate["content"]:
-                        for part in candidate["content"]["parts"]:
-                            if "inlineData" in part:
-                                mime_type = part["inlineData"].get("mimeType", "image/jpeg")
-                                base64_data = part["inlineData"].get("data", "")
-                                
-                                image_url = f"data:{mime_type};base64,{base64_data}"
-                                
-                                print(f"✅ Gemini: Imagen generada con {model_id}")
-                                return {
-                                    "success": True,
-                                    "image_url": image_url,
-                                    "mime_type": mime_type,
-                                    "model": model_id,
-                                    "data": {}
-                                }
                 
                 # No se encontró imagen en la respuesta
                 return {
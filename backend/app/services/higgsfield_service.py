@@ -6,12 +6,21 @@ Docs: https://docs.higgsfield.ai/how-to/introduction
 """
 import httpx
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from app.core.config import settings
+from app.core.concurrency import provider_concurrency, spawn_bounded
+from app.core.http import get_http_client
+from app.core.rate_limit import rate_limiter
+from app.core.status_poller import PollTimeout, status_poller
+from app.core.webhooks import Webhook, new_webhook, webhooks_enabled
+from app.services.image_batch import BatchImageGeneration
 
 
-class HiggsfieldService:
+TERMINAL_STATUSES = ("completed", "failed", "nsfw")
+
+
+class HiggsfieldService(BatchImageGeneration):
     """Servicio para generación de imágenes con Higgsfield"""
     
     # Modelo por defecto para text-to-image
@@ -67,11 +76,16 @@ class HiggsfieldService:
         if additional_params:
             payload.update(additional_params)
         
+        webhook = new_webhook("higgsfield")
+        params = self.webhook_params(webhook)
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with get_http_client("higgsfield", timeout=30.0) as client:
                 # 1. Enviar request de generación
                 print(f"🎨 Higgsfield: POST {url}")
-                response = await client.post(url, headers=self.headers, json=payload)
+                response = await rate_limiter.send(
+                    "higgsfield", self.api_key_id,
+                    lambda: client.post(url, headers=self.headers, json=payload, params=params)
+                )
                 
                 if response.status_code == 403:
                     error_detail = response.json().get("detail", "")
@@ -105,6 +119,8 @@ class HiggsfieldService:
                 data = response.json()
                 request_id = data.get("request_id")
                 status_url = data.get("status_url")
+                if webhook and request_id:
+                    webhook.bind(request_id)
                 
                 if not status_url:
                     return {
@@ -113,65 +129,53 @@ class HiggsfieldService:
                         "error_code": "invalid_response"
                     }
                 
-                print(f"📋 Higgsfield: Request {request_id} queued, polling...")
-                
-                # 2. Poll status hasta completado (max 120 segundos)
-                max_polls = 40  # 40 * 3s = 120s
-                for i in range(max_polls):
-                    await asyncio.sleep(3)
-                    
-                    status_response = await client.get(status_url, headers=self.headers)
-                    
-                    if status_response.status_code != 200:
-                        print(f"⚠️ Higgsfield: Error polling status: {status_response.status_code}")
-                        continue
-                    
-                    status_data = status_response.json()
-                    current_status = status_data.get("status")
-                    
-                    print(f"  [{i+1}/{max_polls}] Status: {current_status}")
-                    
-                    if current_status == "completed":
-                        images = status_data.get("images", [])
-                        if images:
-                            image_url = images[0].get("url")
-                            if image_url:
-                                print(f"✅ Higgsfield: Imagen generada: {image_url[:100]}")
-                                return {
-                                    "success": True,
-                                    "image_url": image_url,
-                                    "url": image_url,
-                                    "request_id": request_id,
-                                    "data": status_data
-                                }
-                        return {
-                            "success": False,
-                            "error": "Generación completada pero no se recibió URL de imagen",
-                            "error_code": "no_image_url"
-                        }
-                    
-                    elif current_status == "nsfw":
-                        print(f"🚫 Higgsfield: Contenido NSFW detectado")
-                        return {
-                            "success": False,
-                            "error": "El contenido fue rechazado por el filtro de seguridad (NSFW). Intentá con otro prompt.",
-                            "error_code": "nsfw"
-                        }
-                    
-                    elif current_status == "failed":
-                        print(f"❌ Higgsfield: Generación fallida")
-                        return {
-                            "success": False,
-                            "error": "La generación falló en Higgsfield. Intentá de nuevo.",
-                            "error_code": "generation_failed"
-                        }
-                
-                # Timeout
+                print(f"📋 Higgsfield: Request {request_id} queued, waiting for status...")
+            
+            # 2. Esperar el estado final (lo consulta el status poller compartido)
+            try:
+                status_data = await self.wait_for_status(request_id, timeout=120.0)
+            except PollTimeout:
                 return {
                     "success": False,
                     "error": "Timeout esperando generación de Higgsfield (120s)",
                     "error_code": "timeout"
                 }
+            
+            current_status = status_data.get("status")
+            
+            if current_status == "completed":
+                images = status_data.get("images", [])
+                if images:
+                    image_url = images[0].get("url")
+                    if image_url:
+                        print(f"✅ Higgsfield: Imagen generada: {image_url[:100]}")
+                        return {
+                            "success": True,
+                            "image_url": image_url,
+                            "url": image_url,
+                            "request_id": request_id,
+                            "data": status_data
+                        }
+                return {
+                    "success": False,
+                    "error": "Generación completada pero no se recibió URL de imagen",
+                    "error_code": "no_image_url"
+                }
+            
+            elif current_status == "nsfw":
+                print(f"🚫 Higgsfield: Contenido NSFW detectado")
+                return {
+                    "success": False,
+                    "error": "El contenido fue rechazado por el filtro de seguridad (NSFW). Intentá con otro prompt.",
+                    "error_code": "nsfw"
+                }
+            
+            print(f"❌ Higgsfield: Generación fallida")
+            return {
+                "success": False,
+                "error": "La generación falló en Higgsfield. Intentá de nuevo.",
+                "error_code": "generation_failed"
+            }
                 
         except httpx.TimeoutException:
             print("❌ Higgsfield: Connection timeout")
@@ -188,13 +192,63 @@ class HiggsfieldService:
                 "error_code": "unexpected_error"
             }
     
+    @staticmethod
+    def webhook_params(webhook: Optional[Webhook]) -> Dict[str, str]:
+        """Query param hf_webhook: Higgsfield avisa al terminar, si hay URL pública"""
+        return {"hf_webhook": webhook.url} if webhook else {}
+    
+    @staticmethod
+    def is_finished(status: Dict[str, Any]) -> bool:
+        """Estados terminales de un request de Higgsfield"""
+        return status.get("status") in TERMINAL_STATUSES
+    
+    async def wait_for_status(self, request_id: str, timeout: float = 120.0) -> Dict[str, Any]:
+        """
+        Espera a que un request llegue a un estado terminal
+        
+        Raises:
+            PollTimeout si no termina antes de `timeout` segundos
+        """
+        # Con webhook el poll queda como respaldo si el callback no llega
+        first_poll_after = settings.WEBHOOK_POLL_FALLBACK if webhooks_enabled() else None
+        return await status_poller.wait(
+            "higgsfield", request_id,
+            timeout=timeout, first_poll_after=first_poll_after
+        )
+    
+    async def fetch_statuses(self, request_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Status de varios requests (lo llama el status poller)
+        
+        Higgsfield no tiene endpoint de status en lote: se consultan en
+        paralelo, con el límite de concurrencia del proveedor, sobre la
+        conexión compartida.
+        """
+        statuses: Dict[str, Dict[str, Any]] = {}
+        
+        async def fetch(request_id: str):
+            status = await self.get_generation_status(request_id)
+            if status.get("status"):
+                statuses[request_id] = status
+        
+        limit = provider_concurrency("higgsfield", settings.image_provider_concurrency)
+        results = await asyncio.gather(*spawn_bounded(fetch, request_ids, limit), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            print(f"⚠️ Higgsfield: {len(errors)} status checks fallaron: {errors[0]}")
+        return statuses
+    
     async def get_generation_status(self, request_id: str) -> Dict[str, Any]:
         """
         Obtiene el estado de una generación en progreso
         """
         status_url = f"{self.base_url}/requests/{request_id}/status"
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(status_url, headers=self.headers)
+        async with get_http_client("higgsfield", timeout=15.0) as client:
+            response = await rate_limiter.send(
+                "higgsfield", self.api_key_id,
+                lambda: client.get(status_url, headers=self.headers),
+                scope="status", retries=0
+            )
             if response.status_code != 200:
                 return {"error": f"Status check failed: {response.status_code}"}
             return response.json()
@@ -204,7 +258,7 @@ class HiggsfieldService:
         Cancela una generación que está en cola
         """
         cancel_url = f"{self.base_url}/requests/{request_id}/cancel"
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with get_http_client("higgsfield", timeout=15.0) as client:
             response = await client.post(cancel_url, headers=self.headers)
             return {
                 "cancelled": response.status_code == 202,
@@ -214,3 +268,6 @@ class HiggsfieldService:
 
 # Singleton instance
 higgsfield_service = HiggsfieldService()
+
+# Todos los requests de Higgsfield (de cualquier instancia) se consultan desde el poller
+status_poller.register_provider("higgsfield", higgsfield_service.fetch_statuses, HiggsfieldService.is_finished)
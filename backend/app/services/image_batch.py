@@ -0,0 +1,232 @@
+"""
+Image Batch Generation
+Generación de varias imágenes por request para los servicios de imagen
+"""
+from typing import Any, Dict, List, Optional, Union
+import asyncio
+
+
+BatchResult = Union[Dict[str, Any], Exception]
+
+
+class BatchImageGeneration:
+    """
+    `generate_images_batch` for the image services.
+
+    Images of the same prompt (repeated prompts and extra variants) are
+    asked for together when the provider returns several images per
+    request (DALL-E `n`, Gemini `candidateCount`): the service raises
+    MAX_IMAGES_PER_REQUEST and implements `_generate_prompt_images`.
+    Distinct prompts share a request when the provider can take several
+    prompts at once: the service raises MAX_PROMPTS_PER_REQUEST and
+    implements `_generate_prompts_images`. The default falls back to one
+    `generate_image` call per image.
+    """
+
+    # Imágenes del mismo prompt que el proveedor devuelve en un solo request
+    MAX_IMAGES_PER_REQUEST = 1
+    # Prompts distintos que el proveedor acepta en un solo request
+    MAX_PROMPTS_PER_REQUEST = 1
+
+    async def generate_images_batch(
+        self,
+        prompts: List[str],
+        width: int = 1024,
+        height: int = 768,
+        style: Optional[str] = None,
+        variants: int = 1
+    ) -> List[BatchResult]:
+        """
+        Genera imágenes para varios prompts
+
+        Args:
+            prompts: Un prompt por imagen (los repetidos se piden juntos)
+            variants: Candidatas por prompt
+
+        Returns:
+            Un resultado por prompt, en el mismo orden: el dict de
+            generate_image (con variants > 1, "variants" = URLs de todas
+            las candidatas) o la excepción que se produjo al generarlo
+        """
+        variants = max(1, variants)
+        positions: Dict[str, List[int]] = {}
+        for index, prompt in enumerate(prompts):
+            positions.setdefault(prompt, []).append(index)
+
+        # Una imagen sola de cada prompt distinto: juntas en requests multi-prompt
+        singles = []
+        if self.MAX_PROMPTS_PER_REQUEST > 1:
+            singles = [prompt for prompt, indexes in positions.items() if len(indexes) * variants == 1]
+        chunks = [
+            singles[start:start + self.MAX_PROMPTS_PER_REQUEST]
+            for start in range(0, len(singles), self.MAX_PROMPTS_PER_REQUEST)
+        ]
+        single_set = set(singles)
+        grouped = [prompt for prompt in positions if prompt not in single_set]
+
+        async def generate_group(prompt: str) -> List[BatchResult]:
+            count = len(positions[prompt]) * variants
+            try:
+                return await self._generate_prompt_images(prompt, count, width, height, style)
+            except Exception as e:
+                return [e] * count
+
+        async def generate_chunk(chunk: List[str]) -> List[BatchResult]:
+            try:
+                return await self._generate_prompts_images(chunk, width, height, style)
+            except Exception as e:
+                return [e] * len(chunk)
+
+        generated = await asyncio.gather(
+            *(generate_group(prompt) for prompt in grouped),
+            *(generate_chunk(chunk) for chunk in chunks)
+        )
+        images: Dict[str, List[BatchResult]] = dict(zip(grouped, generated))
+        for chunk, chunk_images in zip(chunks, generated[len(grouped):]):
+            for slot, prompt in enumerate(chunk):
+                images[prompt] = chunk_images[slot:slot + 1]
+
+        results: List[BatchResult] = [None] * len(prompts)
+        for prompt, indexes in positions.items():
+            for slot, index in enumerate(indexes):
+                candidates = images[prompt][slot * variants:(slot + 1) * variants]
+                results[index] = self._merge_variants(candidates, variants)
+        return results
+
+    @staticmethod
+    def _merge_variants(candidates: List[BatchResult], variants: int) -> BatchResult:
+        """El primer resultado exitoso, con las URLs de todas las candidatas"""
+        if not candidates:
+            # El proveedor devolvió menos imágenes que las pedidas
+            return {
+                "success": False,
+                "error": "El proveedor devolvió menos imágenes que las pedidas",
+                "error_code": "missing_image"
+            }
+        ok = [c for c in candidates if isinstance(c, dict) and c.get("success", True) and c.get("image_url")]
+        if not ok:
+            return candidates[0]
+        if variants == 1:
+            return ok[0]
+        return {**ok[0], "variants": [c["image_url"] for c in ok]}
+
+    async def _generate_prompt_images(
+        self,
+        prompt: str,
+        count: int,
+        width: int,
+        height: int,
+        style: Optional[str]
+    ) -> List[BatchResult]:
+        """`count` imágenes del mismo prompt: por defecto una llamada por imagen"""
+        return list(await asyncio.gather(
+            *(self.generate_image(prompt=prompt, width=width, height=height, style=style) for _ in range(count)),
+            return_exceptions=True
+        ))
+
+    async def _generate_prompts_images(
+        self,
+        prompts: List[str],
+        width: int,
+        height: int,
+        style: Optional[str]
+    ) -> List[BatchResult]:
+        """Una imagen de cada prompt: por defecto una llamada por prompt"""
+        return list(await asyncio.gather(
+            *(self.generate_image(prompt=prompt, width=width, height=height, style=style) for prompt in prompts),
+            return_exceptions=True
+        ))
+
+
+class ImageRequestBatcher:
+    """
+    Shares provider requests between the scenes of one generation run.
+
+    Scenes with the same prompt are split into chunks that fit the
+    provider's MAX_IMAGES_PER_REQUEST (with `variants` images each); the
+    remaining scenes are chunked by MAX_PROMPTS_PER_REQUEST when the
+    provider takes several prompts per request. The first scene of a
+    chunk to run starts one `generate_images_batch` for the whole chunk
+    and the others await that same task, so each scene still runs (and
+    reports) on its own worker.
+    """
+
+    def __init__(
+        self,
+        generator,
+        items: List[Dict[str, Any]],
+        width: int,
+        height: int,
+        style: Optional[str],
+        prompt_key: str = "image_prompt",
+        variants: int = 1
+    ):
+        self.generator = generator
+        self.width = width
+        self.height = height
+        self.style = style
+        self.prompt_key = prompt_key
+        self.batched = 0
+
+        self._batching = hasattr(generator, "generate_images_batch")
+        self.variants = max(1, variants) if self._batching else 1
+        per_prompt = per_chunk = 1
+        if self._batching:
+            per_prompt = max(1, getattr(generator, "MAX_IMAGES_PER_REQUEST", 1) // self.variants)
+            per_chunk = max(1, getattr(generator, "MAX_PROMPTS_PER_REQUEST", 1))
+
+        groups: Dict[str, List[str]] = {}
+        for item in items:
+            groups.setdefault(item[prompt_key], []).append(item["id"])
+        self._prompts = {item["id"]: item[prompt_key] for item in items}
+
+        chunks: List[tuple] = []
+        singles: List[str] = []
+        for prompt, ids in groups.items():
+            for start in range(0, len(ids), per_prompt):
+                chunk = tuple(ids[start:start + per_prompt])
+                if len(chunk) == 1 and self.variants == 1:
+                    singles.append(chunk[0])
+                else:
+                    chunks.append(chunk)
+        # Escenas con prompts distintos: juntas si el proveedor acepta varios por request
+        for start in range(0, len(singles), per_chunk):
+            chunks.append(tuple(singles[start:start + per_chunk]))
+
+        self._chunks: Dict[str, tuple] = {item_id: chunk for chunk in chunks for item_id in chunk}
+        self._tasks: Dict[tuple, asyncio.Task] = {}
+
+    async def generate(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Resultado de generate_image para un item (compartiendo el request de su chunk)"""
+        prompt = item[self.prompt_key]
+        chunk = self._chunks.get(item["id"])
+        if chunk is None:
+            chunk = (item["id"],)
+            self._prompts[item["id"]] = prompt
+        if len(chunk) == 1 and self.variants == 1:
+            return await self.generator.generate_image(
+                prompt=prompt, width=self.width, height=self.height, style=self.style
+            )
+
+        task = self._tasks.get(chunk)
+        if task is None:
+            self.batched += len(chunk) - 1
+            task = asyncio.create_task(self.generator.generate_images_batch(
+                [self._prompts[item_id] for item_id in chunk],
+                width=self.width, height=self.height, style=self.style, variants=self.variants
+            ))
+            self._tasks[chunk] = task
+        # shield: si se cancela una escena, el request sigue para las demás
+        results = await asyncio.shield(task)
+        result = results[chunk.index(item["id"])]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def close(self):
+        """Cancelar los requests que nadie llegó a esperar"""
+        pending = [task for task in self._tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
@@ -2,16 +2,22 @@
 Image Generation Service
 Servicio para generar imágenes usando Higgsfield AI
 """
-import httpx
 from typing import Dict, Any, Optional
-import asyncio
 
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.rate_limit import rate_limiter
+from app.core.status_poller import PollTimeout
+from app.core.webhooks import new_webhook
+from app.services.higgsfield_service import higgsfield_service
+from app.services.image_batch import BatchImageGeneration
 
 
-class ImageService:
+class ImageService(BatchImageGeneration):
     """Servicio para generación de imágenes con Higgsfield AI"""
     
+    DEFAULT_MODEL = "higgsfield-ai/soul/standard"  # Modelo flagship de Higgsfield
+    
     def __init__(self):
         self.api_key_id = settings.HIGGSFIELD_API_KEY_ID
         self.api_key_secret = settings.HIGGSFIELD_API_KEY_SECRET
@@ -28,7 +34,7 @@ class ImageService:
         width: int = 1024,
         height: int = 768,
         style: Optional[str] = None,
-        model: str = "higgsfield-ai/soul/standard"  # Modelo flagship de Higgsfield
+        model: str = DEFAULT_MODEL
     ) -> Dict[str, Any]:
         """
         Genera una imagen usando Higgsfield AI
@@ -68,13 +74,17 @@ class ImageService:
             "resolution": resolution
         }
         
-        async with httpx.AsyncClient(timeout=180.0) as client:
+        webhook = new_webhook("higgsfield")
+        params = higgsfield_service.webhook_params(webhook)
+        async with get_http_client("higgsfield", timeout=180.0) as client:
             # Iniciar la generación - sistema asíncrono de Higgsfield
-            response = await client.post(
+            # Misma API y credenciales que HiggsfieldService: comparten el bucket
+            response = await rate_limiter.send("higgsfield", self.api_key_id, lambda: client.post(
                 f"{self.api_url}/{model}",
                 headers=self.headers,
-                json=payload
-            )
+                json=payload,
+                params=params
+            ))
             
             if response.status_code not in [200, 201, 202]:
                 error_text = response.text
@@ -86,91 +96,62 @@ class ImageService:
             
             # Obtener el request_id y esperar el resultado
             request_id = result.get("request_id")
-            status_url = result.get("status_url")
             
             if not request_id:
                 raise Exception("No request_id returned from Higgsfield API")
+            if webhook:
+                webhook.bind(request_id)
             
-            # Esperar a que se complete la generación
-            return await self._wait_for_result(client, request_id, status_url)
+        # Esperar a que se complete la generación
+        return await self._wait_for_result(request_id)
     
-    async def _wait_for_result(
-        self, 
-        client: httpx.AsyncClient, 
-        request_id: str,
-        status_url: Optional[str] = None,
-        max_attempts: int = 60
-    ) -> Dict[str, Any]:
+    async def _wait_for_result(self, request_id: str, timeout: float = 180.0) -> Dict[str, Any]:
         """Espera el resultado de una generación asíncrona de Higgsfield"""
         
-        # Construir la URL de status si no se proporciona
-        if not status_url:
-            status_url = f"{self.api_url}/requests/{request_id}/status"
+        # El status poller compartido consulta el request con backoff
+        try:
+            result = await higgsfield_service.wait_for_status(request_id, timeout=timeout)
+        except PollTimeout:
+            raise Exception("Generation timeout - max attempts reached")
         
-        for attempt in range(max_attempts):
-            await asyncio.sleep(3)  # Esperar 3 segundos entre cada check
-            
-            response = await client.get(
-                status_url,
-                headers=self.headers
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                status = result.get("status", "").lower()
-                
-                print(f"Generation status: {status} (attempt {attempt + 1}/{max_attempts})")
-                
-                if status == "completed":
-                    # La generación está completa
-                    images = result.get("images", [])
-                    if images and len(images) > 0:
-                        return {
-                            "success": True,
-                            "image_url": images[0].get("url"),
-                            "request_id": request_id,
-                            "data": result
-                        }
-                    
-                    # Verificar si hay video en lugar de imagen
-                    video = result.get("video")
-                    if video and video.get("url"):
-                        return {
-                            "success": True,
-                            "video_url": video.get("url"),
-                            "request_id": request_id,
-                            "data": result
-                        }
-                    
-                    return {
-                        "success": True,
-                        "request_id": request_id,
-                        "data": result
-                    }
-                
-                elif status in ["failed", "nsfw"]:
-                    error_msg = f"Generation failed with status: {status}"
-                    if status == "nsfw":
-                        error_msg = "Content failed moderation checks (NSFW)"
-                    raise Exception(error_msg)
-                
-                elif status in ["queued", "in_progress"]:
-                    # Todavía procesando, continuar esperando
-                    continue
-                
-                else:
-                    # Estado desconocido
-                    print(f"Unknown status: {status}")
-                    continue
-            
-            else:
-                print(f"Status check error: {response.status_code}")
+        status = result.get("status", "").lower()
+        print(f"Generation status: {status}")
+        
+        if status in ["failed", "nsfw"]:
+            error_msg = f"Generation failed with status: {status}"
+            if status == "nsfw":
+                error_msg = "Content failed moderation checks (NSFW)"
+            raise Exception(error_msg)
         
-        raise Exception("Generation timeout - max attempts reached")
+        # La generación está completa
+        images = result.get("images", [])
+        if images and len(images) > 0:
+            return {
+                "success": True,
+                "image_url": images[0].get("url"),
+                "request_id": request_id,
+                "data": result
+            }
+        
+        # Verificar si hay video en lugar de imagen
+        video = result.get("video")
+        if video and video.get("url"):
+            return {
+                "success": True,
+                "video_url": video.get("url"),
+                "request_id": request_id,
+                "data": result
+            }
+        
+        return {
+            "success": True,
+            "request_id": request_id,
+            "data": result
+        }
     
     async def check_available_models(self) -> Dict[str, Any]:
         """Lista los modelos disponibles para generación de imágenes"""
-        async with httpx.AsyncClient() as client:
+        async with get_http_client("higgsfield") as client:
             response = await client.get(
                 f"{self.api_url}/models",
                 headers=self.headers
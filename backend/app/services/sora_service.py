@@ -8,6 +8,8 @@ from typing import Dict, Any, Optional
 import httpx
 
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.rate_limit import rate_limiter
 
 
 class SoraService:
@@ -63,8 +65,11 @@ class SoraService:
 
     async def _post_generation(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         url = f"{self.api_base}/videos"
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.post(url, json=payload, headers=self.headers)
+        async with get_http_client("openai", timeout=300.0) as client:
+            response = await rate_limiter.send(
+                "sora", self.api_key,
+                lambda: client.post(url, json=payload, headers=self.headers)
+            )
 
         if response.status_code >= 400:
             return {
@@ -95,8 +100,12 @@ class SoraService:
     async def get_animation_status(self, task_id: str) -> Dict[str, Any]:
         """Consulta el estado de un job de Sora si el endpoint lo soporta."""
         url = f"{self.api_base}/videos/{task_id}"
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(url, headers=self.headers)
+        async with get_http_client("openai", timeout=60.0) as client:
+            response = await rate_limiter.send(
+                "sora", self.api_key,
+                lambda: client.get(url, headers=self.headers),
+                scope="status"
+            )
 
         if response.status_code >= 400:
             return {"status": "error", "error": response.text}
@@ -4,8 +4,9 @@ Servicio para gestión de archivos con Google Drive
 """
 import os
 import io
+import shutil
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 import uuid
 import pickle
 
@@ -19,6 +20,7 @@ from googleapiclient.errors import HttpError
 
 
 from app.core.config import settings
+from app.core.http import download_to_file
 from app.services.supabase_storage_service import SupabaseStorageService
 
 
@@ -180,50 +182,46 @@ class StorageService:
         except HttpError as error:
             raise Exception(f"Error uploading to Google Drive: {error}")
     
-    async def get_file(self, file_id: str) -> bytes:
+    async def get_file(self, file_id: str, file_path: Union[str, Path]) -> int:
         """
-        Obtiene un archivo
+        Descarga un archivo a disco, por chunks, sin cargarlo en memoria
         
         Args:
             file_id: ID del archivo (path local o Google Drive ID)
+            file_path: Ruta destino
         
         Returns:
-            Contenido del archivo en bytes
+            Tamaño del archivo en bytes
         """
         
         if self.provider == "local":
-            with open(file_id, "rb") as f:
-                return f.read()
+            shutil.copyfile(file_id, file_path)
+            return os.path.getsize(file_path)
         elif self.provider == "gdrive":
-            return await self._get_from_google_drive(file_id)
+            return await self._get_from_google_drive(file_id, file_path)
         elif self.provider == "supabase":
             # Descargar desde Supabase Storage
             url = self.supabase.get_public_url(file_id)
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                return response.content
+            return await download_to_file("supabase", url, file_path, timeout=60.0)
         else:
             raise NotImplementedError(f"Get file not implemented for {self.provider}")
     
-    async def _get_from_google_drive(self, file_id: str) -> bytes:
-        """Descarga archivo de Google Drive"""
+    async def _get_from_google_drive(self, file_id: str, file_path: Union[str, Path]) -> int:
+        """Descarga archivo de Google Drive a disco"""
         
         if not self.drive_service:
             raise Exception("Google Drive service not initialized")
         
         try:
             request = self.drive_service.files().get_media(fileId=file_id)
-            file_buffer = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_buffer, request)
+            with open(file_path, "wb") as f:
+                downloader = MediaIoBaseDownload(f, request)
+                
+                done = False
+                while not done:
+                    status, done = downloader.next_chunk()
             
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-            
-            file_buffer.seek(0)
-            return file_buffer.read()
+            return os.path.getsize(file_path)
             
         except HttpError as error:
             raise Exception(f"Error downloading from Google Drive: {error}")
@@ -4,8 +4,10 @@ Servicio para gestión de archivos en Supabase Storage
 """
 import httpx
 import base64
-from typing import Optional
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
 from app.core.config import settings
+from app.core.http import get_http_client, iter_file
 
 class SupabaseStorageService:
     def __init__(self):
@@ -42,12 +44,18 @@ class SupabaseStorageService:
                 print(f"✅ Bucket '{self.bucket}' ya existe en Supabase")
 
     async def upload_image_from_url(self, image_url: str, filename: str) -> Optional[str]:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(image_url)
-            if response.status_code != 200:
-                return None
-            data = response.content
-            return await self._upload_bytes(data, filename)
+        # Los chunks de la descarga se reenvían a Supabase a medida que llegan
+        async with get_http_client("downloads", timeout=60.0, follow_redirects=True) as client:
+            async with client.stream("GET", image_url) as response:
+                if response.status_code != 200:
+                    return None
+                # aiter_bytes decodifica gzip/br: el largo de origen solo vale sin Content-Encoding
+                encoded = response.headers.get("content-encoding", "identity").lower() != "identity"
+                return await self._upload(
+                    response.aiter_bytes(settings.HTTP_STREAM_CHUNK_SIZE),
+                    filename,
+                    None if encoded else response.headers.get("content-length")
+                )
 
     async def upload_image_from_base64(self, base64_data: str, filename: str) -> Optional[str]:
         try:
@@ -57,7 +65,19 @@ class SupabaseStorageService:
         except Exception:
             return None
 
+    async def upload_file(self, path: Union[str, Path], filename: str) -> Optional[str]:
+        """Sube un archivo local leyéndolo por chunks"""
+        return await self._upload(iter_file(path), filename, str(Path(path).stat().st_size))
+
     async def _upload_bytes(self, data: bytes, filename: str) -> Optional[str]:
+        return await self._upload(data, filename)
+
+    async def _upload(
+        self,
+        content: Union[bytes, AsyncIterator[bytes]],
+        filename: str,
+        content_length: Optional[str] = None
+    ) -> Optional[str]:
         url = f"{self.supabase_url}/storage/v1/object/{self.bucket}/{filename}"
         # Inferimos mime desde la extensión para cumplir con allowed_mime_types
         mime_map = {
@@ -73,8 +93,11 @@ class SupabaseStorageService:
             "x-upsert": "true",
             "Content-Type": content_type,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=request_headers, content=data)
+        if content_length:
+            # Con largo conocido el body se envía sin chunked encoding
+            request_headers["Content-Length"] = content_length
+        async with get_http_client("supabase", timeout=60.0) as client:
+            response = await client.post(url, headers=request_headers, content=content)
             if response.status_code not in (200, 201):
                 print(f"❌ Supabase upload failed: {response.status_code} {response.text}")
                 return None
@@ -85,6 +108,6 @@ class SupabaseStorageService:
 
     async def delete_image(self, filename: str) -> bool:
         url = f"{self.supabase_url}/storage/v1/object/{self.bucket}/{filename}"
-        async with httpx.AsyncClient() as client:
+        async with get_http_client("supabase", timeout=60.0) as client:
             response = await client.delete(url, headers=self.headers)
             return response.status_code == 200
@@ -5,15 +5,7 @@ Servicio unificado para generación de videos con múltiples proveedores
 from typing import Dict, Any, Optional, Literal
 from app.services.video_service import kling_service
 from app.services.sora_service import sora_service
-
-# Import lazy for optional providers to avoid hard failures when deps no están
-try:
-    from app.services.veo_service import veo_service  # type: ignore
-    _veo_available = True
-except Exception as exc:
-    veo_service = None  # type: ignore
-    _veo_available = False
-    print(f"⚠️ Veo service no disponible: {exc}")
+from app.services.veo_service import veo_service
 from app.core.config import settings
 
 
@@ -27,14 +19,13 @@ class UnifiedVideoService:
         self.providers = {
             "kling": kling_service,
             "sora": sora_service,
+            "veo": veo_service,
         }
-        if _veo_available:
-            self.providers["veo"] = veo_service  # type: ignore
         # Preparado para futuros proveedores:
         # "runway": runway_service,
         # "pika": pika_service,
         
-        self.default_provider = "veo" if _veo_available else "sora"
+        self.default_provider = "veo"
     
     def get_provider(self, provider: Optional[str] = None):
         """Obtiene el servicio del proveedor especificado"""
@@ -184,26 +175,15 @@ class UnifiedVideoService:
                 "note": "Usa OPENAI_API_KEY; endpoints pueden variar según acceso"
             }
         }
-        if _veo_available:
-            providers_info["veo"] = {
-                "name": "Google Veo 3.1",
-                "available": True,
-                "features": ["image-to-video", "text-to-video"],
-                "max_duration": 8,
-                "resolutions": ["720p", "1080p", "4k"],
-                "aspect_ratios": ["16:9", "9:16"],
-                "note": "Uses same GOOGLE_AI_API_KEY as Gemini"
-            }
-        else:
-            providers_info["veo"] = {
-                "name": "Google Veo 3.1",
-                "available": False,
-                "features": ["image-to-video", "text-to-video"],
-                "max_duration": 8,
-                "resolutions": ["720p", "1080p", "4k"],
-                "aspect_ratios": ["16:9", "9:16"],
-                "note": "Dependencia google-genai no instalada"
-            }
+        providers_info["veo"] = {
+            "name": "Google Veo 3.1",
+            "available": True,
+            "features": ["image-to-video", "text-to-video"],
+            "max_duration": 8,
+            "resolutions": ["720p", "1080p", "4k"],
+            "aspect_ratios": ["16:9", "9:16"],
+            "note": "Uses same GOOGLE_AI_API_KEY as Gemini"
+        }
         return providers_info
 
 
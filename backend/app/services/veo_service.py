@@ -2,25 +2,69 @@
 Google Veo Service
 Servicio para generación de videos usando Google Veo 3.1
 Documentación: https://ai.google.dev/gemini-api/docs/video
+
+Usa la API REST de operaciones largas (predictLongRunning + GET de la
+operación) sobre el cliente HTTP compartido, sin el SDK síncrono
 """
-from google import genai
-from google.genai import types
+from collections import OrderedDict
+from datetime import datetime
 from typing import Dict, Any, Optional
 import asyncio
+import hashlib
 import time
 from pathlib import Path
-import base64
+from urllib.parse import unquote, urlparse
 
+from app.core import queries
+from app.core.cache import project_cache
+from app.core.concurrency import KeyedLock
 from app.core.config import settings
+from app.core.http import download_to_file, get_http_client
+from app.core.rate_limit import rate_limiter
+from app.core.source_images import source_image_cache
+
+
+VIDEOS_DIR = Path("uploads/videos")
+LOCAL_VIDEO_PATH = "/api/v1/assets/video/"
+
+
+def _local_video_url(filename: str) -> str:
+    """URL de un video de uploads/videos, armada igual que la de las imágenes locales"""
+    if settings.ENV == "production":
+        return f"{LOCAL_VIDEO_PATH}{filename}"
+    return f"http://localhost:{settings.API_PORT}{LOCAL_VIDEO_PATH}{filename}"
+
+
+def _local_video_path(video_url: str) -> Optional[Path]:
+    """Archivo de uploads/videos detrás de una URL local (None si es remota)"""
+    parsed = urlparse(video_url)
+    if LOCAL_VIDEO_PATH in parsed.path and parsed.hostname in (None, "localhost", "127.0.0.1"):
+        return VIDEOS_DIR / Path(unquote(parsed.path.rsplit(LOCAL_VIDEO_PATH, 1)[1])).name
+    return None
 
 
 class VeoService:
     """Servicio para generación de videos con Google Veo 3.1"""
     
+    # Resultados finales (completed/failed) que se recuerdan en memoria
+    TERMINAL_CACHE_MAX = 1000
+    
     def __init__(self):
         self.api_key = settings.GOOGLE_AI_API_KEY
         self.model = "veo-3.1-generate-preview"  # Veo 3.1 preview model
-        self.client = genai.Client(api_key=self.api_key)
+        self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self.headers = {
+            "x-goog-api-key": self.api_key,
+            "Content-Type": "application/json"
+        }
+        # task_id → status final; una operación terminada no cambia más
+        self._terminal: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Un solo status check (y descarga) en vuelo por operación
+        self._locks = KeyedLock()
+        # Operaciones cuyo resultado guardado ya se buscó en la base
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self.downloads = 0
+        self.terminal_hits = 0
     
     async def animate_image(
         self,
@@ -33,7 +77,7 @@ class VeoService:
         Anima una imagen usando Google Veo 3.1
         
         Args:
-            image_url: URL de la imagen a animar (puede ser local o HTTP)
+            image_url: URL de la imagen a animar (local, file:// o remota)
             duration: Duración del video en segundos (4-8 segundos)
             motion_type: Tipo de movimiento (usado en el prompt)
             additional_params: Parámetros adicionales
@@ -70,65 +114,40 @@ class VeoService:
         prompt = motion_prompts.get(motion_type, motion_prompts["auto"])
         
         try:
-            # Obtener la imagen local
-            if image_url.startswith("http://localhost") or image_url.startswith("file://"):
-                # Imagen local
-                local_path = image_url.replace("http://localhost:8000/api/v1/assets/image/", "")
-                file_path = Path("uploads/images") / local_path
-                
-                if not file_path.exists():
-                    return {
-                        "success": False,
-                        "error": f"Local image not found: {file_path}"
-                    }
-            else:
+            print(f"🎬 Starting Veo 3.1 animation (duration: {duration_seconds}s, motion: {motion_type})")
+            print(f"🖼️  Image: {image_url}")
+            
+            # Imagen local (uploads/) o remota (Supabase), ya en base64 desde el cache
+            try:
+                image_b64, mime_type = await source_image_cache.get_base64(image_url)
+            except FileNotFoundError as e:
                 return {
                     "success": False,
-                    "error": "Only local images are supported for now"
+                    "error": str(e)
                 }
             
-            print(f"🎬 Starting Veo 3.1 animation (duration: {duration_seconds}s, motion: {motion_type})")
-            print(f"🖼️  Image path: {file_path}")
-            
-            # Leer imagen y convertir a base64
-            with open(file_path, "rb") as f:
-                image_bytes = f.read()
-            image_b64 = base64.b64encode(image_bytes).decode('utf-8')
-            
-            # Crear objeto Image con base64
-            image_obj = types.Image(
-                image_bytes=image_b64,
-                mime_type="image/png"
-            )
-            
             # Crear la configuración
-            config_dict = {
+            parameters = {
                 "durationSeconds": duration_seconds,
                 "aspectRatio": "16:9",
                 "personGeneration": "allow_adult"  # Requerido para image-to-video
             }
             
             if additional_params:
-                config_dict.update(additional_params)
+                parameters.update(additional_params)
             
-            config = types.GenerateVideosConfig(**config_dict)
+            print(f"📦 Config: {parameters}")
             
-            print(f"📦 Config: {config_dict}")
-            
-            # Llamar a la API usando el SDK
-            # Nota: El SDK hace llamadas síncronas, así que lo ejecutamos en un thread separado
-            loop = asyncio.get_event_loop()
-            operation = await loop.run_in_executor(
-                None,
-                lambda: self.client.models.generate_videos(
-                    model=self.model,
-                    prompt=prompt,
-                    image=image_obj,  # Objeto Image con base64
-                    config=config
-                )
+            started = await self._start_operation(
+                {
+                    "prompt": prompt,
+                    "image": {"bytesBase64Encoded": image_b64, "mimeType": mime_type}
+                },
+                parameters
             )
-            
-            operation_name = operation.name
+            if not started.get("success"):
+                return started
+            operation_name = started["task_id"]
             
             print(f"✅ Veo 3.1 animation started: {operation_name}")
             
@@ -182,47 +201,25 @@ class VeoService:
             duration_seconds = 8
         
         try:
-            url = f"{self.base_url}/models/{self.model}:generateVideos"
-            
-            payload = {
-                "prompt": prompt,
-                "config": {
+            started = await self._start_operation(
+                {"prompt": prompt},
+                {
                     "durationSeconds": duration_seconds,
                     "aspectRatio": aspect_ratio,
                     "resolution": "720p"
                 }
-            }
+            )
+            if not started.get("success"):
+                return started
             
-            async with httpx.AsyncClient(timeout=180.0) as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    params={"key": self.api_key},
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.text else {}
-                    return {
-                        "success": False,
-                        "error": f"Veo API error: {response.status_code}",
-                        "details": error_data
-                    }
-                
-                data = response.json()
-                operation_name = data.get("name")
-                
-                if not operation_name:
-                    return {
-                        "success": False,
-                        "error": "No operation name returned"
-                    }
-                
-                return {
-                    "success": True,
-                    "task_id": operation_name,
-                    "status": "processing"
-                }
+            print(f"✅ Veo 3.1 text-to-video started: {started['task_id']}")
+            return {
+                "success": True,
+                "task_id": started["task_id"],
+                "status": "processing",
+                "provider": "veo",
+                "estimated_time": duration_seconds * 10
+            }
                 
         except Exception as e:
             return {
@@ -230,31 +227,150 @@ class VeoService:
                 "error": str(e)
             }
     
+    async def _start_operation(self, instance: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Iniciar una generación (operación larga de Veo)
+        
+        Returns:
+            Dict con success y task_id (nombre de la operación), o el error
+        """
+        url = f"{self.base_url}/models/{self.model}:predictLongRunning"
+        payload = {"instances": [instance], "parameters": parameters}
+        
+        async with get_http_client("google", timeout=180.0) as client:
+            response = await rate_limiter.send("veo", self.api_key, lambda: client.post(
+                url,
+                json=payload,
+                headers=self.headers
+            ))
+        
+        if response.status_code != 200:
+            try:
+                error_data = response.json()
+            except ValueError:
+                error_data = {"message": response.text[:500]}
+            print(f"❌ Veo API error {response.status_code}: {str(error_data)[:300]}")
+            return {
+                "success": False,
+                "error": f"Veo API error: {response.status_code}",
+                "details": error_data
+            }
+        
+        operation_name = response.json().get("name")
+        if not operation_name:
+            return {
+                "success": False,
+                "error": "No operation name returned"
+            }
+        return {"success": True, "task_id": operation_name}
+    
     async def get_animation_status(self, task_id: str) -> Dict[str, Any]:
         """
         Obtiene el estado de una operación de Veo 3.1
         
+        El video de una operación terminada se descarga una sola vez: el
+        resultado final queda en memoria y en la escena (video_url /
+        video_status), y los checks concurrentes de la misma operación
+        esperan al que ya está en curso.
+        
         Args:
             task_id: Nombre de la operación (operation name)
         
         Returns:
             Dict con el estado y URL del video si está completo
         """
+        cached = self._terminal.get(task_id)
+        if cached is not None:
+            self.terminal_hits += 1
+            return dict(cached)
+        
+        async with self._locks.hold(task_id):
+            cached = self._terminal.get(task_id)
+            if cached is None and task_id not in self._seen:
+                # Primera vez que este proceso ve la operación: quizás ya terminó antes
+                cached = await self._stored_status(task_id)
+                self._seen[task_id] = None
+                while len(self._seen) > self.TERMINAL_CACHE_MAX:
+                    self._seen.popitem(last=False)
+            if cached is not None:
+                self.terminal_hits += 1
+                self._remember(task_id, cached)
+                return dict(cached)
+            
+            status = await self._fetch_status(task_id)
+            if status.get("status") in ("completed", "failed"):
+                self._remember(task_id, status)
+                await self._store_status(task_id, status)
+            return status
+    
+    def _remember(self, task_id: str, status: Dict[str, Any]):
+        self._terminal[task_id] = status
+        self._terminal.move_to_end(task_id)
+        while len(self._terminal) > self.TERMINAL_CACHE_MAX:
+            self._terminal.popitem(last=False)
+    
+    async def _stored_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Resultado final guardado en la escena (sobrevive a reinicios)"""
+        from app.core.database import get_turso_client
+        
+        try:
+            rows = await get_turso_client().execute(
+                queries.SCENE_BY_VIDEO_TASK,
+                [task_id]
+            )
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el estado guardado de {task_id}: {e}")
+            return None
+        
+        for row in rows or []:
+            if row.get("video_status") == "failed":
+                return {"task_id": task_id, "status": "failed", "error": "Video generation failed"}
+            video_url = row.get("video_url")
+            if row.get("video_status") == "completed" and video_url:
+                # Solo si el archivo local sigue ahí; si no, se vuelve a descargar
+                local_path = _local_video_path(video_url)
+                if local_path is not None and not local_path.exists():
+                    return None
+                return {"task_id": task_id, "status": "completed", "video_url": video_url, "provider": "veo"}
+        return None
+    
+    async def _store_status(self, task_id: str, status: Dict[str, Any]):
+        """Guardar el resultado final en la escena de la operación"""
+        from app.core.database import get_turso_client
         
         try:
-            # Usar el SDK para obtener el estado de la operación
-            loop = asyncio.get_event_loop()
-            operation = await loop.run_in_executor(
-                None,
-                lambda: self.client.operations.get(
-                    types.GenerateVideosOperation(name=task_id)
-                )
+            turso_client = get_turso_client()
+            await turso_client.execute(
+                """UPDATE scenes SET video_url = COALESCE(?, video_url), video_status = ?, updated_at = ?
+                   WHERE video_task_id = ?""",
+                [status.get("video_url"), status["status"], datetime.utcnow().isoformat(), task_id]
             )
+            rows = await turso_client.execute(queries.SCENE_BY_VIDEO_TASK, [task_id])
+            for project_id in {row["project_id"] for row in rows or []}:
+                await project_cache.invalidate(project_id)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el estado de {task_id}: {e}")
+    
+    async def _fetch_status(self, task_id: str) -> Dict[str, Any]:
+        """Consultar la operación a Veo y descargar el video si terminó"""
+        try:
+            async with get_http_client("google", timeout=60.0) as client:
+                response = await rate_limiter.send("veo", self.api_key, lambda: client.get(
+                    f"{self.base_url}/{task_id}",
+                    headers=self.headers
+                ), scope="status")
             
-            # Verificar si está completo
-            is_done = operation.done
+            if response.status_code != 200:
+                return {
+                    "task_id": task_id,
+                    "status": "error",
+                    "error": f"Veo API error: {response.status_code} {response.text[:200]}"
+                }
+            
+            operation = response.json()
             
-            if not is_done:
+            # Verificar si está completo
+            if not operation.get("done"):
                 return {
                     "task_id": task_id,
                     "status": "processing",
@@ -262,8 +378,9 @@ class VeoService:
                 }
             
             # Verificar si hubo error
-            if hasattr(operation, 'error') and operation.error:
-                error_msg = str(operation.error)
+            if operation.get("error"):
+                error = operation["error"]
+                error_msg = error.get("message") if isinstance(error, dict) else str(error)
                 print(f"❌ Veo 3.1 generation failed: {error_msg}")
                 return {
                     "task_id": task_id,
@@ -272,19 +389,20 @@ class VeoService:
                 }
             
             # Extraer video de la respuesta
-            if not hasattr(operation, 'response') or not operation.response:
+            video_response = (operation.get("response") or {}).get("generateVideoResponse")
+            if not video_response:
                 return {
                     "task_id": task_id,
                     "status": "failed",
                     "error": "No response in completed operation"
                 }
             
-            generated_videos = operation.response.generated_videos
+            generated_videos = video_response.get("generatedSamples") or []
             
-            if not generated_videos or len(generated_videos) == 0:
+            if not generated_videos:
                 # Verificar si fue filtrado por RAI
-                if hasattr(operation.response, 'rai_media_filtered_count') and operation.response.rai_media_filtered_count:
-                    reasons = operation.response.rai_media_filtered_reasons if hasattr(operation.response, 'rai_media_filtered_reasons') else []
+                if video_response.get("raiMediaFilteredCount"):
+                    reasons = video_response.get("raiMediaFilteredReasons") or []
                     error_msg = f"Video filtered by safety filters: {', '.join(reasons)}"
                     print(f"⚠️  {error_msg}")
                     return {
@@ -299,66 +417,53 @@ class VeoService:
                     "error": "No video generated"
                 }
             
-            video = generated_videos[0]
-            video_file = video.video
+            video_uri = (generated_videos[0].get("video") or {}).get("uri")
+            if not video_uri:
+                return {
+                    "task_id": task_id,
+                    "status": "failed",
+                    "error": "No video URI in completed operation"
+                }
             
             # Descargar y guardar el video localmente
             try:
-                # El video_file es un objeto Video con uri
-                video_uri = video_file.uri if hasattr(video_file, 'uri') else str(video_file)
-                
-                # Agregar API key al URI
-                if '?' in video_uri:
-                    video_uri_with_key = f"{video_uri}&key={self.api_key}"
-                else:
-                    video_uri_with_key = f"{video_uri}?key={self.api_key}"
-                
-                print(f"📥 Downloading Veo 3.1 video from: {video_uri}")
-                
-                # Descargar el video usando httpx directamente con API key
-                loop = asyncio.get_event_loop()
-                
-                async def download_video():
-                    async with httpx.AsyncClient(timeout=300.0, follow_redirects=True) as client:
-                        response = await client.get(video_uri_with_key)
-                        if response.status_code == 200:
-                            return response.content
-                        else:
-                            raise Exception(f"Failed to download video: {response.status_code}")
-                
-                video_bytes = await download_video()
-                
                 # Crear directorio de videos si no existe
-                videos_dir = Path("uploads/videos")
-                videos_dir.mkdir(parents=True, exist_ok=True)
+                VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
                 
-                # Generar nombre único para el video
-                import uuid
-                video_filename = f"veo_{uuid.uuid4().hex[:12]}.mp4"
-                video_path = videos_dir / video_filename
+                # Nombre fijo por operación: si ya se descargó, no se repite
+                video_filename = f"veo_{hashlib.sha256(task_id.encode('utf-8')).hexdigest()[:12]}.mp4"
+                video_path = VIDEOS_DIR / video_filename
                 
-                # Guardar el video localmente
-                with open(video_path, "wb") as f:
-                    f.write(video_bytes)
+                if video_path.exists():
+                    video_size = video_path.stat().st_size
+                else:
+                    # Descargar el video directo a disco, por chunks
+                    print(f"📥 Downloading Veo 3.1 video from: {video_uri}")
+                    video_size = await download_to_file(
+                        "google", video_uri, video_path, timeout=300.0,
+                        headers={"x-goog-api-key": self.api_key}
+                    )
+                    self.downloads += 1
                 
                 # URL local para servir el video
-                local_video_url = f"http://localhost:8000/api/v1/assets/video/{video_filename}"
+                local_video_url = _local_video_url(video_filename)
                 
-                print(f"✅ Veo 3.1 video downloaded: {video_filename} ({len(video_bytes) / 1024 / 1024:.2f} MB)")
+                print(f"✅ Veo 3.1 video downloaded: {video_filename} ({video_size / 1024 / 1024:.2f} MB)")
                 
                 return {
                     "task_id": task_id,
                     "status": "completed",
                     "video_url": local_video_url,
                     "provider": "veo",
-                    "file_size": len(video_bytes)
+                    "file_size": video_size
                 }
                 
             except Exception as download_error:
                 print(f"❌ Error downloading Veo 3.1 video: {download_error}")
+                # No es final: el video sigue en Veo y el próximo check reintenta
                 return {
                     "task_id": task_id,
-                    "status": "failed",
+                    "status": "error",
                     "error": f"Failed to download video: {str(download_error)}"
                 }
                 
@@ -0,0 +1,329 @@
+"""
+Video Completion Service
+Tarea en background dueña de todas las animaciones en curso: consulta a
+cada proveedor hasta que el video termina y lo guarda en la escena, haya
+o no un cliente mirando el estado
+
+Corre como un único worker aparte, porque cada proceso que la arranca
+sigue todas las animaciones en curso (VIDEO_COMPLETION_ENABLED=True solo
+si la API corre en un único proceso):
+    python -m app.services.video_completion_service
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import time
+
+from app.core import queries
+from app.core.config import settings
+from app.core.cache import project_cache
+from app.core.concurrency import provider_concurrency
+
+
+COMPLETED_STATUSES = ("completed", "succeeded")
+FAILED_STATUSES = ("failed", "cancelled", "nsfw")
+
+
+class _VideoTask:
+    """One animation being followed and its check schedule"""
+
+    __slots__ = ("task_id", "scene_id", "project_id", "provider", "interval", "next_at", "deadline", "checks")
+
+    def __init__(
+        self,
+        task_id: str,
+        scene_id: str,
+        project_id: str,
+        provider: str,
+        started_at: float,
+        estimated_time: float,
+        min_interval: float,
+        max_interval: float,
+        timeout: float
+    ):
+        self.task_id = task_id
+        self.scene_id = scene_id
+        self.project_id = project_id
+        self.provider = provider
+        # Primer check cerca del tiempo estimado; después cada ~1/5 del estimado
+        self.interval = min(max_interval, max(min_interval, estimated_time / 5))
+        self.next_at = started_at + max(min_interval, estimated_time * 0.8)
+        self.deadline = started_at + timeout
+        self.checks = 0
+
+
+class VideoCompletionService:
+    """
+    Finalizes video animations server-side.
+
+    Every scene with a `video_task_id` and a non-terminal `video_status`
+    is owned by one background task: it checks each animation when its
+    provider's `estimated_time` is about to run out, then backs off
+    exponentially, and writes `video_url`/`video_status` as soon as the
+    provider reports a terminal status. The DB is rescanned every
+    VIDEO_COMPLETION_RESYNC seconds, so animations started before a
+    restart (or by another process) are picked up too.
+    """
+
+    BACKOFF = 1.5
+
+    def __init__(
+        self,
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        default_estimated_time: float = 60.0,
+        timeout: float = 1800.0,
+        resync_interval: float = 60.0
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_estimated_time = default_estimated_time
+        self.timeout = timeout
+        self.resync_interval = resync_interval
+        self._tasks: Dict[str, _VideoTask] = {}
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_resync = 0.0
+        self._closing = False
+        self.checks = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def start(self):
+        """Start the background loop (idempotent)"""
+        if self._runner is not None and not self._runner.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._next_resync = 0.0
+        self._closing = False
+        self._runner = asyncio.create_task(self._run())
+        print("🎞️ Video completion service iniciado")
+
+    async def close(self):
+        # wait_for puede tragarse el cancel si el wakeup llega a la vez: el
+        # flag corta el loop igual
+        self._closing = True
+        if self._runner is not None and not self._runner.done():
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        self._runner = None
+        self._tasks.clear()
+
+    def track(
+        self,
+        scene_id: str,
+        project_id: str,
+        task_id: str,
+        provider: str,
+        estimated_time: Optional[float] = None
+    ):
+        """Seguir una animación recién iniciada, con el tiempo estimado del proveedor"""
+        self._add(task_id, scene_id, project_id, provider, time.time(), estimated_time)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _add(
+        self,
+        task_id: str,
+        scene_id: str,
+        project_id: str,
+        provider: str,
+        started_at: float,
+        estimated_time: Optional[float] = None
+    ):
+        try:
+            estimated = float(estimated_time) if estimated_time else self.default_estimated_time
+        except (TypeError, ValueError):
+            estimated = self.default_estimated_time
+        self._tasks[task_id] = _VideoTask(
+            task_id, scene_id, project_id, provider or "kling", started_at, estimated,
+            self.min_interval, self.max_interval, self.timeout
+        )
+
+    async def resync(self, turso_client) -> int:
+        """
+        Cargar de la base las animaciones en curso que no se están siguiendo
+
+        Returns:
+            Cantidad de animaciones nuevas
+        """
+        rows = await turso_client.execute(queries.IN_FLIGHT_VIDEO_SCENES)
+        added = 0
+        for row in rows or []:
+            if row["video_task_id"] in self._tasks:
+                continue
+            self._add(
+                row["video_task_id"], row["id"], row["project_id"],
+                row["video_provider"], _parse_timestamp(row.get("updated_at"))
+            )
+            added += 1
+        if added:
+            print(f"🎞️ {added} animaciones en curso recuperadas de la base")
+        return added
+
+    async def _run(self):
+        from app.core.database import get_turso_client
+
+        while not self._closing:
+            now = time.time()
+            if now >= self._next_resync:
+                self._next_resync = now + self.resync_interval
+                try:
+                    await self.resync(get_turso_client())
+                except Exception as e:
+                    print(f"⚠️ Video completion: no se pudo leer la base: {e}")
+
+            due = [task for task in self._tasks.values() if task.next_at <= now]
+            if due:
+                try:
+                    await self._check(get_turso_client(), due)
+                except Exception as e:
+                    print(f"⚠️ Video completion: error guardando resultados: {e}")
+                    # Sin backoff el loop reintentaría las mismas tareas sin pausa
+                    now = time.time()
+                    for task in due:
+                        if task.next_at <= now:
+                            task.interval = min(self.max_interval, task.interval * self.BACKOFF)
+                            task.next_at = now + task.interval
+                continue
+
+            next_at = min([task.next_at for task in self._tasks.values()] + [self._next_resync])
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_at - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check(self, turso_client, due: List[_VideoTask]):
+        """Consultar las animaciones vencidas y guardar las que terminaron (un solo batch)"""
+        from app.services.unified_video_service import unified_video_service
+
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(task: _VideoTask) -> Tuple[_VideoTask, Dict[str, Any]]:
+            semaphore = semaphores.setdefault(
+                task.provider, asyncio.Semaphore(provider_concurrency(task.provider, settings.video_provider_concurrency))
+            )
+            async with semaphore:
+                try:
+                    return task, await unified_video_service.get_animation_status(task.task_id, task.provider)
+                except Exception as e:
+                    return task, {"status": "error", "error": str(e)}
+
+        results = await asyncio.gather(*(fetch(task) for task in due))
+        self.checks += len(due)
+
+        finished = []
+        now = time.time()
+        for task, result in results:
+            task.checks += 1
+            state = (result.get("status") or "").lower()
+            video_url = result.get("video_url")
+
+            if state in COMPLETED_STATUSES and video_url:
+                finished.append((task, "completed", _finish_statement(task, "completed", video_url), None))
+            elif state in COMPLETED_STATUSES or state in FAILED_STATUSES:
+                finished.append((task, "failed", _finish_statement(task, "failed"), result.get("error") or "no video URL"))
+            elif now >= task.deadline:
+                finished.append((task, "timeout", _finish_statement(task, "failed"), None))
+            else:
+                # processing, o un error al consultar: volver a intentar más tarde
+                task.interval = min(self.max_interval, task.interval * self.BACKOFF)
+                task.next_at = now + task.interval
+
+        if not finished:
+            return
+
+        # Si el batch falla las tareas siguen registradas y _run las reintenta
+        await turso_client.execute_batch([statement for _, _, statement, _ in finished])
+
+        for task, outcome, _, error in finished:
+            self._tasks.pop(task.task_id, None)
+            if outcome == "completed":
+                self.completed += 1
+                print(f"✅ Video completed and saved for scene {task.scene_id}")
+            elif outcome == "failed":
+                self.failed += 1
+                print(f"❌ Animation {task.task_id} failed: {error}")
+            else:
+                self.timeouts += 1
+                print(f"⏰ Animation {task.task_id} sin terminar después de {self.timeout:.0f}s")
+        for project_id in {task.project_id for task, _, _, _ in finished}:
+            await project_cache.invalidate(project_id)
+
+    def next_check_in(self, task_id: str) -> Optional[float]:
+        """Segundos hasta el próximo check de una animación (None si no se sigue)"""
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        return max(0.0, task.next_at - time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._tasks),
+            "checks": self.checks,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+        }
+
+
+def _finish_statement(task: _VideoTask, video_status: str, video_url: Optional[str] = None):
+    """UPDATE final de la escena; no pisa una animación más nueva de la misma escena"""
+    if video_url:
+        return (
+            """UPDATE scenes SET video_url = ?, video_status = ?, updated_at = ?
+               WHERE id = ? AND video_task_id = ?""",
+            [video_url, video_status, datetime.utcnow().isoformat(), task.scene_id, task.task_id]
+        )
+    return (
+        """UPDATE scenes SET video_status = ?, updated_at = ?
+           WHERE id = ? AND video_task_id = ?""",
+        [video_status, datetime.utcnow().isoformat(), task.scene_id, task.task_id]
+    )
+
+
+def _parse_timestamp(value: Optional[str]) -> float:
+    """updated_at (UTC ISO) como timestamp; ahora si no se puede leer"""
+    if value:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", ""))
+            return (parsed - datetime(1970, 1, 1)).total_seconds()
+        except ValueError:
+            pass
+    return time.time()
+
+
+video_completion_service = VideoCompletionService(
+    min_interval=settings.VIDEO_POLL_MIN_INTERVAL,
+    max_interval=settings.VIDEO_POLL_MAX_INTERVAL,
+    default_estimated_time=settings.VIDEO_DEFAULT_ESTIMATED_TIME,
+    timeout=settings.VIDEO_TASK_TIMEOUT,
+    resync_interval=settings.VIDEO_COMPLETION_RESYNC
+)
+
+
+async def _worker():
+    from app.core.database import init_turso_client, close_turso_client
+    from app.core.http import init_http_clients, close_http_clients
+
+    client = await init_turso_client()
+    if client is None:
+        print("❌ DATABASE_URL no es una base de Turso (libsql://)")
+        return
+    init_http_clients()
+    video_completion_service.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await video_completion_service.close()
+        await close_http_clients()
+        await close_turso_client()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_worker())
+    except KeyboardInterrupt:
+        pass
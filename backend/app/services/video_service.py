@@ -2,11 +2,13 @@
 Kling Service
 Servicio para animación de imágenes con Kling AI
 """
-import httpx
-from typing import Dict, Any, Optional
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
 import asyncio
 
 from app.core.config import settings
+from app.core.http import download_to_file, get_http_client
+from app.core.rate_limit import rate_limiter
 
 
 class KlingService:
@@ -49,13 +51,13 @@ class KlingService:
         if additional_params:
             payload.update(additional_params)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        async with get_http_client("kling") as client:
+            response = await rate_limiter.send("kling", self.api_key, lambda: client.post(
                 f"{self.api_url}/animate",
                 headers=self.headers,
                 json=payload,
                 timeout=180.0  # 3 minutos de timeout
-            )
+            ))
             
             response.raise_for_status()
             return response.json()
@@ -70,11 +72,11 @@ class KlingService:
         Returns:
             Dict con el estado y URL del video si está completo
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
+        async with get_http_client("kling") as client:
+            response = await rate_limiter.send("kling", self.api_key, lambda: client.get(
                 f"{self.api_url}/tasks/{task_id}",
                 headers=self.headers
-            )
+            ), scope="status")
             
             response.raise_for_status()
             return response.json()
@@ -111,20 +113,18 @@ class KlingService:
         
         raise TimeoutError(f"Animation did not complete within {max_wait} seconds")
     
-    async def download_video(self, video_url: str) -> bytes:
+    async def download_video(self, video_url: str, file_path: Union[str, Path]) -> int:
         """
-        Descarga un video generado
+        Descarga un video generado directo a disco, sin cargarlo en memoria
         
         Args:
             video_url: URL del video a descargar
+            file_path: Ruta destino
         
         Returns:
-            Contenido del video en bytes
+            Tamaño del video en bytes
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(video_url)
-            response.raise_for_status()
-            return response.content
+        return await download_to_file("downloads", video_url, file_path, timeout=300.0)
 
 
 # Singleton instance
@@ -0,0 +1,70 @@
+"""
+Micro-benchmark: decodificación de filas de TursoClient
+Compara el modo dict (una dict por fila) con el modo columnar (ResultSet)
+sobre una respuesta sintética de Turso, midiendo tiempo y memoria asignada.
+
+Uso: python bench_row_decoding.py [filas] [repeticiones]
+"""
+import sys
+import os
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.database import TursoClient
+
+
+COLUMNS = [
+    "id", "title", "description", "original_script", "status", "style",
+    "reference_prompt", "duration_target", "created_at", "updated_at",
+]
+
+
+def make_result(rows: int) -> dict:
+    """Resultado de un statement con el formato del HTTP API de Turso"""
+    return {
+        "columns": COLUMNS,
+        "rows": [
+            [
+                f"project-{i:06d}", f"Proyecto {i}", "Descripción", "Guión...",
+                "draft", "cinematic", None, 60,
+                "2025-01-01T00:00:00", "2025-01-01T00:00:00",
+            ]
+            for i in range(rows)
+        ],
+    }
+
+
+def measure(label: str, decode, result: dict, repeat: int):
+    # Tiempo: decodificar y leer un campo de cada fila, como hace un endpoint
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = decode(result)
+        for row in rows:
+            row["title"]
+    elapsed = (time.perf_counter() - start) / repeat
+
+    # Memoria: bytes asignados por una decodificación
+    tracemalloc.start()
+    rows = decode(result)
+    for row in rows:
+        row["title"]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {label:<10} {elapsed * 1e6:>10.1f} µs/op   {peak / 1024:>8.1f} KiB peak")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    result = make_result(rows)
+
+    print(f"\n📊 Decodificación de {rows} filas ({repeat} repeticiones)\n")
+    measure("dict", lambda r: TursoClient._rows(r), result, repeat)
+    measure("columnar", lambda r: TursoClient._rows(r, columnar=True), result, repeat)
+    print()
+
+
+if __name__ == "__main__":
+    main()
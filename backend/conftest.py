@@ -0,0 +1,9 @@
+"""
+Pytest setup
+Settings obligatorias con valores de prueba, para importar la app sin .env
+"""
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("DATABASE_URL", "libsql://test.invalid")
+os.environ.setdefault("KLING_API_KEY", "test-key")
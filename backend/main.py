@@ -3,12 +3,23 @@ HeyAI Backend - FastAPI Application
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.api.v1 import api_router
-from app.core.database import init_db
+from app.core.database import init_db, init_turso_client, close_turso_client, turso_client_stats
+from app.core.cache import project_cache
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.migrations import apply_migrations
+from app.core.metrics import query_metrics, render_gauges
+from app.core.rate_limit import rate_limiter
+from app.core.http import init_http_clients, close_http_clients, http_client_stats
+from app.core.image_cache import image_cache
+from app.core.status_poller import status_poller
+from app.core.model_health import model_health
+from app.core.source_images import source_image_cache
+from app.services.video_completion_service import video_completion_service
 
 
 @asynccontextmanager
@@ -16,13 +27,27 @@ async def lifespan(app: FastAPI):
     """Lifecycle events"""
     # Startup
     print(f"🚀 Starting {settings.APP_NAME}...")
-    # Database tables are already created in Turso
+    client = await init_turso_client()
+    init_http_clients()
+    if client is not None and settings.DATABASE_AUTO_MIGRATE:
+        try:
+            await apply_migrations(client)
+        except Exception as e:
+            print(f"⚠️ Error aplicando migraciones: {e}")
     print("✅ Database ready")
+    if client is not None and settings.VIDEO_COMPLETION_ENABLED:
+        video_completion_service.start()
     
     yield
     
     # Shutdown
     print("👋 Shutting down...")
+    await video_completion_service.close()
+    await close_turso_client()
+    await project_cache.close()
+    await rate_limiter.close()
+    await status_poller.close()
+    await close_http_clients()
 
 
 app = FastAPI(
@@ -41,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -65,11 +91,39 @@ async def health_check():
         content={
             "status": "healthy",
             "database": "connected",
+            "database_pool": turso_client_stats(),
+            "cache": project_cache.stats(),
+            "rate_limit": rate_limiter.stats(),
+            "image_cache": image_cache.stats(),
+            "source_image_cache": source_image_cache.stats(),
+            "http_clients": http_client_stats(),
+            "status_poller": status_poller.stats(),
+            "model_health": model_health.stats(),
+            "video_completion": video_completion_service.stats(),
             "redis": "connected",
         }
     )
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: latencia por statement SQL y uso del pool de Turso"""
+    return (
+        query_metrics.render_prometheus()
+        + render_gauges("heymake_db_pool", turso_client_stats())
+        + render_gauges("heymake_cache", project_cache.stats())
+        + render_gauges("heymake_rate_limit", rate_limiter.stats())
+        + render_gauges("heymake_status_poller", status_poller.stats())
+        + render_gauges("heymake_model_health", model_health.stats())
+        + render_gauges("heymake_source_images", source_image_cache.stats())
+        + render_gauges("heymake_video_completion", video_completion_service.stats())
+        + "".join(
+            render_gauges(f"heymake_http_{name}", stats)
+            for name, stats in (http_client_stats() or {}).items()
+        )
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     
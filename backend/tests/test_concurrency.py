@@ -0,0 +1,45 @@
+"""
+Locks por key
+"""
+import asyncio
+
+from app.core.concurrency import KeyedLock
+
+
+def test_keyed_lock_is_shared_while_anyone_waits():
+    locks = KeyedLock()
+    order = []
+
+    async def worker(name: str, hold: float):
+        async with locks.hold("url"):
+            order.append(f"{name}-in")
+            await asyncio.sleep(hold)
+            order.append(f"{name}-out")
+
+    async def scenario():
+        # El primero suelta el lock con dos requests esperando: no tienen
+        # que terminar con locks distintos
+        await asyncio.gather(worker("a", 0.02), worker("b", 0.01), worker("c", 0))
+        return len(locks)
+
+    remaining = asyncio.run(scenario())
+
+    assert order == ["a-in", "a-out", "b-in", "b-out", "c-in", "c-out"]
+    assert remaining == 0
+
+
+def test_keyed_lock_is_dropped_after_an_error():
+    locks = KeyedLock()
+
+    async def failing():
+        async with locks.hold("url"):
+            raise ValueError("boom")
+
+    async def scenario():
+        try:
+            await failing()
+        except ValueError:
+            pass
+        return "url" in locks
+
+    assert asyncio.run(scenario()) is False
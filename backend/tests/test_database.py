@@ -0,0 +1,41 @@
+"""
+Respuestas del HTTP API de Turso
+"""
+import pytest
+
+from app.core.database import TursoClient
+
+
+@pytest.fixture
+def client():
+    return TursoClient("libsql://test.invalid", "token")
+
+
+LIST_RESPONSE = [{"results": {"columns": ["id"], "rows": [["a"]]}}]
+OBJECT_RESPONSE = {"results": [{"columns": ["id"], "rows": [["b"]]}]}
+
+
+def test_response_shape_is_cached_per_client(client):
+    assert client._results(LIST_RESPONSE, 1, False) == [[{"id": "a"}]]
+    assert client._parse_results == client._list_results
+    assert client._results(LIST_RESPONSE, 1, False) == [[{"id": "a"}]]
+    assert client._parse_results == client._list_results
+
+
+def test_shape_is_redetected_when_the_cached_parser_fails(client):
+    assert client._results(LIST_RESPONSE, 1, False) == [[{"id": "a"}]]
+    assert client._results(OBJECT_RESPONSE, 1, False) == [[{"id": "b"}]]
+    assert client._parse_results == client._object_results
+    assert client._results(LIST_RESPONSE, 1, False) == [[{"id": "a"}]]
+
+
+def test_top_level_error_after_list_responses_raises(client):
+    client._results(LIST_RESPONSE, 1, False)
+
+    with pytest.raises(Exception, match="SQLITE_BUSY"):
+        client._results({"error": "SQLITE_BUSY"}, 1, False)
+
+
+def test_statement_error_in_list_response_raises(client):
+    with pytest.raises(Exception, match="no such table"):
+        client._results([{"error": "no such table: x"}], 1, False)
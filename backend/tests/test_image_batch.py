@@ -0,0 +1,127 @@
+"""
+Requests compartidos entre escenas con el mismo prompt
+"""
+import asyncio
+
+from app.services.image_batch import BatchImageGeneration, ImageRequestBatcher
+
+
+class FakeProvider(BatchImageGeneration):
+    MAX_IMAGES_PER_REQUEST = 2
+
+    def __init__(self):
+        self.requests = []
+
+    async def generate_image(self, prompt, width=1024, height=768, style=None):
+        self.requests.append((prompt, 1))
+        return {"success": True, "image_url": f"{prompt}-single"}
+
+    async def _generate_prompt_images(self, prompt, count, width, height, style):
+        self.requests.append((prompt, count))
+        return [{"success": True, "image_url": f"{prompt}-{i}"} for i in range(count)]
+
+
+def test_batch_returns_one_result_per_prompt_in_order():
+    provider = FakeProvider()
+
+    results = asyncio.run(provider.generate_images_batch(["a", "b", "a"]))
+
+    assert [r["image_url"] for r in results] == ["a-0", "b-0", "a-1"]
+    assert sorted(provider.requests) == [("a", 2), ("b", 1)]
+
+
+def test_batcher_shares_one_request_per_chunk_of_equal_prompts():
+    provider = FakeProvider()
+    scenes = [
+        {"id": "s1", "image_prompt": "castle"},
+        {"id": "s2", "image_prompt": "castle"},
+        {"id": "s3", "image_prompt": "castle"},
+        {"id": "s4", "image_prompt": "forest"},
+    ]
+
+    async def scenario():
+        batcher = ImageRequestBatcher(provider, scenes, 1024, 768, None)
+        try:
+            return await asyncio.gather(*(batcher.generate(scene) for scene in scenes))
+        finally:
+            await batcher.close()
+
+    results = asyncio.run(scenario())
+
+    assert [r["image_url"] for r in results] == ["castle-0", "castle-1", "castle-single", "forest-single"]
+    assert sorted(provider.requests) == [("castle", 1), ("castle", 2), ("forest", 1)]
+
+
+class MultiPromptProvider(FakeProvider):
+    MAX_IMAGES_PER_REQUEST = 4
+    MAX_PROMPTS_PER_REQUEST = 3
+
+    def __init__(self, returned=None):
+        super().__init__()
+        self.returned = returned
+
+    async def _generate_prompts_images(self, prompts, width, height, style):
+        self.requests.append(tuple(prompts))
+        images = [{"success": True, "image_url": f"{prompt}-multi"} for prompt in prompts]
+        return images[:self.returned] if self.returned is not None else images
+
+
+def run_batcher(provider, scenes, variants=1):
+    async def scenario():
+        batcher = ImageRequestBatcher(provider, scenes, 1024, 768, None, variants=variants)
+        try:
+            return await asyncio.gather(*(batcher.generate(scene) for scene in scenes))
+        finally:
+            await batcher.close()
+
+    return asyncio.run(scenario())
+
+
+def test_batcher_chunks_distinct_prompts_when_the_provider_takes_several():
+    provider = MultiPromptProvider()
+    scenes = [{"id": f"s{i}", "image_prompt": f"p{i}"} for i in range(4)]
+
+    results = run_batcher(provider, scenes)
+
+    assert [r["image_url"] for r in results] == ["p0-multi", "p1-multi", "p2-multi", "p3-single"]
+    assert set(provider.requests) == {("p0", "p1", "p2"), ("p3", 1)}
+
+
+def test_variants_come_from_one_request_per_scene():
+    provider = MultiPromptProvider()
+    scenes = [{"id": "s1", "image_prompt": "castle"}, {"id": "s2", "image_prompt": "forest"}]
+
+    results = run_batcher(provider, scenes, variants=2)
+
+    assert [r["variants"] for r in results] == [["castle-0", "castle-1"], ["forest-0", "forest-1"]]
+    assert sorted(provider.requests) == [("castle", 2), ("forest", 2)]
+
+
+def test_missing_images_are_failures_not_copies():
+    provider = MultiPromptProvider(returned=1)
+
+    results = asyncio.run(provider.generate_images_batch(["a", "b"]))
+
+    assert results[0]["image_url"] == "a-multi"
+    assert results[1]["success"] is False
+    assert results[1]["error_code"] == "missing_image"
+
+
+def test_gemini_multi_prompt_request_asks_again_for_missing_images(monkeypatch):
+    from app.services.gemini_image_service import GeminiImageService
+
+    service = GeminiImageService()
+    calls = []
+
+    async def generate_image(prompt, width=1024, height=768, style=None, candidate_count=1):
+        calls.append(prompt)
+        if len(calls) == 1:
+            return {"success": True, "image_url": "img-1", "images": ["img-1", "img-2"]}
+        return {"success": True, "image_url": f"single-{prompt}"}
+
+    monkeypatch.setattr(service, "generate_image", generate_image)
+
+    results = asyncio.run(service._generate_prompts_images(["a", "b", "c"], 1024, 768, None))
+
+    assert [r["image_url"] for r in results] == ["img-1", "img-2", "single-c"]
+    assert "1. a" in calls[0] and "3. c" in calls[0]
@@ -0,0 +1,88 @@
+"""
+Batch loaders del grafo proyecto → escenas → assets
+"""
+import asyncio
+
+import pytest
+
+from app.core import queries
+from app.core.config import settings
+from app.core.loaders import BatchLoader, Loaders
+
+
+class FakeTurso:
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, sql, params=None):
+        self.calls.append(sql)
+        if sql == queries.PROJECT_ASSETS:
+            return [
+                {"id": "a2", "scene_id": "s0", "scene_order": 0, "scene_title": "Intro"},
+                {"id": "a1", "scene_id": "s0", "scene_order": 0, "scene_title": "Intro"},
+                {"id": "b1", "scene_id": "s1", "scene_order": 1, "scene_title": "End"},
+            ]
+        if sql == queries.PROJECT_SCENES:
+            return [{"id": "s0", "project_id": params[0]}, {"id": "s1", "project_id": params[0]}]
+        return []
+
+    async def execute_batch(self, statements):
+        self.calls.extend(sql for sql, _ in statements)
+        return [[] for _ in statements]
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+
+
+def test_loads_in_the_same_tick_share_one_batch():
+    batches = []
+
+    async def batch_fn(keys):
+        # La tarea del dispatch queda referenciada mientras corre
+        batches.append((keys, len(loader._tasks)))
+        return {key: key.upper() for key in keys}
+
+    loader = BatchLoader(batch_fn)
+
+    async def main():
+        values = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"))
+        return values, await loader.load("b")
+
+    values, again = asyncio.run(main())
+
+    assert values == ["A", "B", "A"]
+    assert again == "B"
+    assert batches == [(["a", "b"], 1)]
+
+
+def test_project_assets_is_one_join_and_primes_scene_assets():
+    turso = FakeTurso()
+
+    async def main():
+        loaders = Loaders(turso)
+        assets = await loaders.project_assets("p")
+        per_scene = await loaders.assets_by_scene.load_many(["s0", "s1"])
+        return assets, per_scene
+
+    assets, per_scene = asyncio.run(main())
+
+    assert [asset["id"] for asset in assets] == ["a2", "a1", "b1"]
+    assert [[asset["id"] for asset in rows] for rows in per_scene] == [["a2", "a1"], ["b1"]]
+    assert turso.calls == [queries.PROJECT_ASSETS]
+
+
+def test_project_scenes_prime_scene_lookups():
+    turso = FakeTurso()
+
+    async def main():
+        loaders = Loaders(turso)
+        scenes = await loaders.scenes_by_project.load("p")
+        return scenes, await loaders.scene.load("s1")
+
+    scenes, scene = asyncio.run(main())
+
+    assert [scene["id"] for scene in scenes] == ["s0", "s1"]
+    assert scene["id"] == "s1"
+    assert turso.calls == [queries.PROJECT_SCENES]
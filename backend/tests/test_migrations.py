@@ -0,0 +1,47 @@
+"""
+Migraciones e índices: las queries que ejecutan los endpoints usan índices
+"""
+import sqlite3
+
+import pytest
+
+from app.core import queries
+from app.core.migrations import (
+    HOT_QUERIES,
+    LATEST_VERSION,
+    apply_migrations_sqlite,
+    explain_hot_queries,
+)
+
+
+@pytest.fixture
+def conn():
+    connection = sqlite3.connect(":memory:")
+    apply_migrations_sqlite(connection)
+    yield connection
+    connection.close()
+
+
+def test_migrations_reach_latest_version(conn):
+    version = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()[0]
+    assert version == LATEST_VERSION
+
+
+def test_migrations_are_idempotent(conn):
+    assert apply_migrations_sqlite(conn) == []
+
+
+def test_every_hot_query_is_listed():
+    """Cada SELECT de app.core.queries tiene que estar en HOT_QUERIES"""
+    listed = {sql for sql, _ in HOT_QUERIES.values()}
+    constants = {
+        name: value for name, value in vars(queries).items()
+        if name.isupper() and isinstance(value, str) and value.lstrip().upper().startswith("SELECT")
+    }
+    missing = [name for name, sql in constants.items() if sql not in listed]
+    assert not missing
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_indexes(conn, name):
+    assert explain_hot_queries(conn)[name] == []
@@ -0,0 +1,77 @@
+"""
+Probe del circuit breaker de modelos y fallback de Gemini
+"""
+import asyncio
+
+import pytest
+
+from app.core.model_health import ModelHealthRegistry
+from app.services import gemini_image_service as module
+from app.services.gemini_image_service import GeminiImageService
+
+
+@pytest.fixture
+def health(monkeypatch):
+    registry = ModelHealthRegistry(error_threshold=1, error_cooldown=60.0)
+    monkeypatch.setattr(module, "model_health", registry)
+    return registry
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = GeminiImageService()
+    service.api_key = "test-key"
+    monkeypatch.setattr(GeminiImageService, "IMAGE_MODELS", [{"id": "m1", "modalities": ["IMAGE"]}])
+    return service
+
+
+def half_open(health: ModelHealthRegistry):
+    health.record_failure("gemini", "m1", "overloaded")
+    health._state("gemini", "m1").open_until = 1.0
+
+
+def test_cancelled_probe_releases_the_slot(health, service, monkeypatch):
+    half_open(health)
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(service, "_try_model", hang)
+
+    async def scenario():
+        probe = asyncio.create_task(service.generate_image("a cat"))
+        await asyncio.sleep(0.01)
+        assert health.probing("gemini", "m1")
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert not health.probing("gemini", "m1")
+    assert health.available("gemini", "m1")
+
+
+def test_concurrent_request_waits_for_the_probe(health, service, monkeypatch):
+    half_open(health)
+    release = None
+
+    async def slow_success(*args, **kwargs):
+        await release.wait()
+        return {"success": True, "images": []}
+
+    monkeypatch.setattr(service, "_try_model", slow_success)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        probe = asyncio.create_task(service.generate_image("a cat"))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.create_task(service.generate_image("a dog"))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        release.set()
+        return await asyncio.gather(probe, waiting)
+
+    first, second = asyncio.run(scenario())
+
+    assert first["success"] and second["success"]
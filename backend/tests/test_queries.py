@@ -0,0 +1,59 @@
+"""
+Resultados de las queries compartidas contra el esquema real
+"""
+import sqlite3
+
+import pytest
+
+from app.core import queries
+from app.core.migrations import apply_migrations_sqlite
+from app.core.pagination import MAX_PAGE_SIZE
+
+
+@pytest.fixture
+def conn():
+    connection = sqlite3.connect(":memory:")
+    apply_migrations_sqlite(connection)
+    connection.execute("INSERT INTO projects (id, title) VALUES ('p', 'P')")
+    for index in range(2):
+        connection.execute(
+            "INSERT INTO scenes (id, project_id, order_index) VALUES (?, 'p', ?)",
+            [f"s{index}", index]
+        )
+    yield connection
+    connection.close()
+
+
+def add_image(conn, asset_id, scene_id, url, created_at, status="completed"):
+    conn.execute(
+        "INSERT INTO assets (id, scene_id, type, url, status, created_at) VALUES (?, ?, 'image', ?, ?, ?)",
+        [asset_id, scene_id, url, status, created_at]
+    )
+
+
+def test_project_scene_images_returns_latest_completed_image_per_scene(conn):
+    add_image(conn, "a1", "s0", "old.png", "2025-01-01")
+    add_image(conn, "a2", "s0", "new.png", "2025-02-01")
+    add_image(conn, "a3", "s0", "broken.png", "2025-03-01", status="failed")
+    add_image(conn, "b1", "s1", "only.png", "2025-01-01")
+
+    rows = conn.execute(queries.PROJECT_SCENE_IMAGES, ["p"]).fetchall()
+
+    assert [(row[0], row[3]) for row in rows] == [("s0", "new.png"), ("s1", "only.png")]
+
+
+def test_project_scene_images_skips_scenes_without_images(conn):
+    add_image(conn, "a1", "s1", "only.png", "2025-01-01")
+
+    rows = conn.execute(queries.PROJECT_SCENE_IMAGES, ["p"]).fetchall()
+
+    assert [row[0] for row in rows] == ["s1"]
+
+
+def test_scene_assets_without_a_page_returns_every_asset(conn):
+    for index in range(MAX_PAGE_SIZE + 5):
+        add_image(conn, f"a{index:04d}", "s0", f"{index}.png", f"2025-01-01T00:00:{index % 60:02d}")
+
+    rows = conn.execute(queries.SCENE_ASSETS, ["s0"]).fetchall()
+
+    assert len(rows) == MAX_PAGE_SIZE + 5
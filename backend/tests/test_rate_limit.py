@@ -0,0 +1,44 @@
+"""
+Buckets del rate limiter por proveedor y scope
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter, RateLimitExceeded
+
+
+def test_status_scope_uses_its_own_limit():
+    limiter = RateLimiter({"veo": (1, 60.0), "veo:status": (5, 60.0)}, max_wait=0.0)
+
+    async def scenario():
+        await limiter.acquire("veo", "key")
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("veo", "key")
+        # Los submits agotados no frenan los status checks
+        for _ in range(5):
+            await limiter.acquire("veo", "key", scope="status")
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("veo", "key", scope="status")
+
+    asyncio.run(scenario())
+
+
+def test_scope_without_its_own_limit_uses_the_provider_limit():
+    limiter = RateLimiter({"gemini": (1, 60.0)}, max_wait=0.0)
+
+    async def scenario():
+        await limiter.acquire("gemini", "key", scope="model-a")
+        await limiter.acquire("gemini", "key", scope="model-b")
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("gemini", "key", scope="model-a")
+
+    asyncio.run(scenario())
+
+
+def test_default_settings_give_status_polls_more_room_than_submits():
+    limits = settings.provider_rate_limits
+    for provider in ("veo", "sora", "kling", "higgsfield"):
+        requests, period = limits[f"{provider}:status"]
+        assert requests / period > limits[provider][0] / limits[provider][1]
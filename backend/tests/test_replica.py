@@ -0,0 +1,154 @@
+"""
+Lecturas de la réplica embebida: locales o al primario según su estado
+"""
+import asyncio
+import json
+import sqlite3
+import sys
+import threading
+
+import httpx
+import pytest
+
+from app.core.replica import ReplicaTursoClient
+
+
+class LocalReplica:
+    """Stand-in de la réplica libsql: un SQLite con sync() controlable"""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.execute("CREATE TABLE scenes (id TEXT, source TEXT)")
+        self.conn.execute("INSERT INTO scenes VALUES ('s1', 'replica')")
+        self.fail_sync = False
+        self.release = threading.Event()
+        self.release.set()
+        self.syncing = threading.Event()
+
+    def execute(self, sql, parameters=()):
+        return self.conn.execute(sql, parameters)
+
+    def sync(self):
+        self.syncing.set()
+        self.release.wait(5)
+        self.syncing.clear()
+        if self.fail_sync:
+            raise ConnectionError("primary unreachable")
+
+    def close(self):
+        self.conn.close()
+
+
+def make_client(replica=None, replica_path=":memory:"):
+    primary_statements = []
+
+    def primary(request: httpx.Request) -> httpx.Response:
+        statements = json.loads(request.content)["statements"]
+        primary_statements.extend(statements)
+        return httpx.Response(200, json=[
+            {"results": {"columns": ["id", "source"], "rows": [["s1", "primary"]]}} for _ in statements
+        ])
+
+    if replica is None:
+        connect = None
+    else:
+        def connect(path, url, token):
+            return replica, True
+
+    client = ReplicaTursoClient(
+        "libsql://test.invalid", "token", replica_path=replica_path, sync_interval=0, connect=connect
+    )
+    client.client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(primary))
+    return client, primary_statements
+
+
+READ = "SELECT id, source FROM scenes WHERE id = ?"
+WRITE = "UPDATE scenes SET source = ? WHERE id = ?"
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_clean_replica_serves_reads_locally():
+    replica = LocalReplica()
+    client, primary = make_client(replica)
+
+    rows = run(client.execute(READ, ["s1"]))
+
+    assert rows == [{"id": "s1", "source": "replica"}]
+    assert primary == []
+    assert client.local_reads == 1
+
+
+def test_read_after_write_syncs_then_reads_locally():
+    replica = LocalReplica()
+    client, primary = make_client(replica)
+
+    async def scenario():
+        await client.execute(WRITE, ["x", "s1"])
+        return await client.execute(READ, ["s1"])
+
+    rows = run(scenario())
+
+    assert rows == [{"id": "s1", "source": "replica"}]
+    assert len(primary) == 1
+    assert client.syncs == 1
+    assert client.local_reads == 1
+
+
+def test_dirty_replica_that_cannot_sync_falls_back_to_primary():
+    replica = LocalReplica()
+    replica.fail_sync = True
+    client, primary = make_client(replica)
+
+    async def scenario():
+        await client.execute(WRITE, ["x", "s1"])
+        return await client.execute(READ, ["s1"])
+
+    rows = run(scenario())
+
+    assert rows == [{"id": "s1", "source": "primary"}]
+    assert client.remote_reads == 1
+    assert client.local_reads == 0
+
+
+def test_reads_during_a_sync_go_to_primary():
+    replica = LocalReplica()
+    replica.release.clear()
+    client, primary = make_client(replica)
+
+    async def scenario():
+        sync = asyncio.create_task(client.sync())
+        await asyncio.to_thread(replica.syncing.wait, 5)
+        rows = await client.execute(READ, ["s1"])
+        replica.release.set()
+        await sync
+        return rows, await client.execute(READ, ["s1"])
+
+    during, after = run(scenario())
+
+    assert during == [{"id": "s1", "source": "primary"}]
+    assert after == [{"id": "s1", "source": "replica"}]
+    assert (client.remote_reads, client.local_reads) == (1, 1)
+
+
+def test_without_libsql_reads_go_to_the_primary(monkeypatch):
+    from app.core import database
+    from app.core.config import settings
+
+    monkeypatch.setitem(sys.modules, "libsql_experimental", None)
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_PATH", "replica.db")
+    monkeypatch.setattr(database, "turso_client", None)
+
+    async def scenario():
+        client = await database.init_turso_client()
+        try:
+            return client
+        finally:
+            await database.close_turso_client()
+
+    client = run(scenario())
+
+    # Un SQLite sin sync serviría lecturas viejas: mejor el primario
+    assert type(client) is database.TursoClient
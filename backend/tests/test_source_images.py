@@ -0,0 +1,44 @@
+"""
+Cache en disco de las imágenes de entrada de los proveedores de video
+"""
+import asyncio
+import base64
+import os
+
+import pytest
+
+from app.core.image_cache import IMAGES_DIR
+from app.core.source_images import SourceImageCache, _local_path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SourceImageCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+
+
+def test_rewriting_an_entry_does_not_grow_the_size(cache, tmp_path):
+    image = tmp_path / "scene.png"
+    url = f"file://{image}"
+
+    for version in range(3):
+        image.write_bytes(bytes([version]) * 300)
+        os.utime(image, ns=(version * 10**9, version * 10**9))
+        data, mime_type = asyncio.run(cache.get_base64(url))
+
+    assert base64.b64decode(data) == bytes([2]) * 300
+    assert mime_type == "image/png"
+    assert cache.stats()["bytes"] == sum(p.stat().st_size for p in cache.directory.glob("*.b64"))
+
+
+@pytest.mark.parametrize("url", [
+    "/api/v1/assets/image/scene.png",
+    "http://localhost:8000/api/v1/assets/image/scene.png",
+    "http://127.0.0.1/api/v1/assets/image/scene.png?v=2",
+])
+def test_local_image_urls_are_read_from_uploads(url):
+    assert _local_path(url) == IMAGES_DIR / "scene.png"
+
+
+def test_remote_and_escaping_urls():
+    assert _local_path("https://cdn.example.com/api/v1/assets/image/scene.png") is None
+    assert _local_path("/api/v1/assets/image/..%2F..%2Fsecret.txt") == IMAGES_DIR / "secret.txt"
@@ -0,0 +1,57 @@
+"""
+Subida a Supabase reenviando la descarga por chunks
+"""
+import asyncio
+import gzip
+
+import httpx
+
+from app.core.http import close_http_clients, init_http_clients
+from app.services.supabase_storage_service import SupabaseStorageService
+
+
+IMAGE = b"\x89PNG" + bytes(range(256)) * 64
+
+
+def upload(headers):
+    uploads = []
+
+    async def source(request):
+        body = gzip.compress(IMAGE) if headers.get("content-encoding") == "gzip" else IMAGE
+        return httpx.Response(200, content=body, headers=headers)
+
+    async def supabase(request):
+        uploads.append((request.headers, await request.aread()))
+        return httpx.Response(200)
+
+    async def main():
+        registry = init_http_clients()
+        registry._clients["downloads"] = httpx.AsyncClient(transport=httpx.MockTransport(source))
+        registry._clients["supabase"] = httpx.AsyncClient(transport=httpx.MockTransport(supabase))
+        # Sin __init__: no consultar el bucket
+        service = SupabaseStorageService.__new__(SupabaseStorageService)
+        service.supabase_url = "http://supabase.test"
+        service.bucket = "heymake-images"
+        service.headers = {}
+        try:
+            return await service.upload_image_from_url("https://cdn.example.com/a.png", "a.png")
+        finally:
+            await close_http_clients()
+
+    url = asyncio.run(main())
+    assert url == "http://supabase.test/storage/v1/object/public/heymake-images/a.png"
+    return uploads[0]
+
+
+def test_plain_download_forwards_its_length():
+    headers, body = upload({"content-type": "image/png"})
+
+    assert body == IMAGE
+    assert headers["content-length"] == str(len(IMAGE))
+
+
+def test_compressed_download_does_not_forward_the_encoded_length():
+    headers, body = upload({"content-type": "image/png", "content-encoding": "gzip"})
+
+    assert body == IMAGE
+    assert headers.get("content-length") != str(len(gzip.compress(IMAGE)))
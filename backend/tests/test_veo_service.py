@@ -0,0 +1,90 @@
+"""
+Status checks de Veo: locks, resultado guardado y URLs locales
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import veo_service as module
+from app.services.veo_service import VIDEOS_DIR, VeoService
+
+
+class RecordingTurso:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if sql.lstrip().startswith("SELECT"):
+            return [{"id": "s1", "project_id": "p1", "video_url": None, "video_status": None, "video_provider": "veo"}]
+        return []
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = VeoService()
+    stored_lookups = []
+
+    async def stored_status(task_id):
+        stored_lookups.append(task_id)
+        return None
+
+    monkeypatch.setattr(service, "_stored_status", stored_status)
+    service.stored_lookups = stored_lookups
+    return service
+
+
+def test_status_checks_leave_no_lock_behind(service, monkeypatch):
+    async def processing(task_id):
+        return {"task_id": task_id, "status": "processing"}
+
+    monkeypatch.setattr(service, "_fetch_status", processing)
+
+    async def scenario():
+        await asyncio.gather(*(service.get_animation_status("op-1") for _ in range(3)))
+        await service.get_animation_status("op-1")
+
+    asyncio.run(scenario())
+
+    assert len(service._locks) == 0
+    # El resultado guardado se busca una sola vez por operación
+    assert service.stored_lookups == ["op-1"]
+
+
+def test_finished_status_invalidates_the_project(service, monkeypatch):
+    turso = RecordingTurso()
+    invalidated = []
+
+    async def completed(task_id):
+        return {"task_id": task_id, "status": "completed", "video_url": "/api/v1/assets/video/veo_x.mp4"}
+
+    async def invalidate(project_id):
+        invalidated.append(project_id)
+
+    monkeypatch.setattr(service, "_fetch_status", completed)
+    monkeypatch.setattr("app.core.database.get_turso_client", lambda: turso)
+    monkeypatch.setattr(module.project_cache, "invalidate", invalidate)
+
+    asyncio.run(service.get_animation_status("op-1"))
+
+    assert turso.statements[0].lstrip().startswith("UPDATE scenes")
+    assert invalidated == ["p1"]
+
+
+def test_local_video_url_follows_the_environment(monkeypatch):
+    monkeypatch.setattr(settings, "API_PORT", 9000)
+    monkeypatch.setattr(settings, "ENV", "development")
+    assert module._local_video_url("a.mp4") == "http://localhost:9000/api/v1/assets/video/a.mp4"
+
+    monkeypatch.setattr(settings, "ENV", "production")
+    assert module._local_video_url("a.mp4") == "/api/v1/assets/video/a.mp4"
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("/api/v1/assets/video/a.mp4", VIDEOS_DIR / "a.mp4"),
+    ("http://localhost:8000/api/v1/assets/video/a.mp4", VIDEOS_DIR / "a.mp4"),
+    ("https://cdn.example.com/api/v1/assets/video/a.mp4", None),
+])
+def test_local_video_path(url, expected):
+    assert module._local_video_path(url) == expected
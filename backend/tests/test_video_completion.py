@@ -0,0 +1,77 @@
+"""
+Guardado de las animaciones terminadas del video completion service
+"""
+import asyncio
+
+import pytest
+
+from app.services import video_completion_service as module
+from app.services.unified_video_service import unified_video_service
+
+
+class FlakyTurso:
+    """Stand-in de Turso cuyo batch falla las primeras `failures` veces"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.batches = []
+
+    async def execute_batch(self, statements):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("turso unavailable")
+        self.batches.append(statements)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    async def completed(task_id, provider):
+        return {"status": "completed", "video_url": f"https://cdn/{task_id}.mp4"}
+
+    monkeypatch.setattr(unified_video_service, "get_animation_status", completed)
+    service = module.VideoCompletionService(min_interval=1.0, max_interval=10.0)
+    service._add("t1", "s1", "p1", "kling", started_at=0.0, estimated_time=5.0)
+    return service
+
+
+def test_finished_tasks_stay_tracked_until_the_batch_commits(service):
+    turso = FlakyTurso(failures=1)
+    task = service._tasks["t1"]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service._check(turso, [task]))
+    assert "t1" in service._tasks
+    assert service.completed == 0
+
+    asyncio.run(service._check(turso, [task]))
+    assert "t1" not in service._tasks
+    assert service.completed == 1
+    assert len(turso.batches) == 1
+
+
+def test_run_backs_off_when_saving_fails(service, monkeypatch):
+    turso = FlakyTurso(failures=100)
+    monkeypatch.setattr("app.core.database.get_turso_client", lambda: turso)
+
+    async def resync(turso_client):
+        return 0
+
+    monkeypatch.setattr(service, "resync", resync)
+
+    async def run_briefly():
+        service.start()
+        await asyncio.sleep(0.2)
+        await service.close()
+
+    attempts = []
+    original = service._check
+
+    async def check(turso_client, due):
+        attempts.append(len(due))
+        await original(turso_client, due)
+
+    monkeypatch.setattr(service, "_check", check)
+    asyncio.run(run_briefly())
+
+    # Un intento y después espera el backoff, en vez de reintentar sin pausa
+    assert attempts == [1]
@@ -0,0 +1,119 @@
+"""
+Callbacks de proveedores contra la API real, con un Higgsfield local que
+llama al hf_webhook que recibe
+"""
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.http import init_http_clients
+from app.core.status_poller import status_poller
+from app.services.higgsfield_service import higgsfield_service
+from main import app
+
+
+class FakeHiggsfield:
+    """Stand-in de Higgsfield: encola cada request y avisa al webhook al terminar"""
+
+    def __init__(self, api: httpx.AsyncClient):
+        self.api = api
+        self.callbacks = []
+        self.status_checks = 0
+        self.responses = []
+        self._count = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            self.status_checks += 1
+            return httpx.Response(200, json={"status": "in_progress"})
+
+        self._count += 1
+        request_id = f"req-{self._count}"
+        callback_url = request.url.params["hf_webhook"]
+        self.callbacks.append(callback_url)
+        asyncio.create_task(self.fire(callback_url, request_id))
+        return httpx.Response(200, json={
+            "request_id": request_id,
+            "status_url": f"https://platform.higgsfield.ai/requests/{request_id}/status",
+        })
+
+    async def fire(self, callback_url: str, request_id: str):
+        await asyncio.sleep(0.01)
+        response = await self.api.post(callback_url, json={
+            "request_id": request_id,
+            "status": "completed",
+            "images": [{"url": f"https://cdn.example.com/{request_id}.png"}],
+        })
+        self.responses.append(response.status_code)
+
+
+@pytest.fixture
+def webhooks_on(monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_BASE_URL", "http://api.test")
+    # El poll de respaldo no llega a correr: solo el callback puede resolver
+    monkeypatch.setattr(settings, "WEBHOOK_POLL_FALLBACK", 60.0)
+
+
+def run_with_fake_higgsfield(scenario):
+    async def main():
+        api = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.test")
+        fake = FakeHiggsfield(api)
+        registry = init_http_clients()
+        registry._clients["higgsfield"] = httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+        try:
+            return await scenario(fake, api)
+        finally:
+            await status_poller.close()
+            await registry.close()
+            await api.aclose()
+
+    return asyncio.run(main())
+
+
+def test_callback_completes_the_generation(webhooks_on):
+    async def scenario(fake, api):
+        return fake, await asyncio.wait_for(higgsfield_service.generate_image("a lighthouse"), timeout=5)
+
+    fake, result = run_with_fake_higgsfield(scenario)
+
+    assert result["success"] is True
+    assert result["image_url"] == "https://cdn.example.com/req-1.png"
+    assert fake.responses == [202]
+    assert fake.status_checks == 0
+
+
+def test_callback_url_only_resolves_its_own_request(webhooks_on):
+    async def scenario(fake, api):
+        await asyncio.wait_for(higgsfield_service.generate_image("a lighthouse"), timeout=5)
+        callback_url = fake.callbacks[0]
+        replayed = await api.post(callback_url, json={"request_id": "req-other", "status": "completed"})
+
+        query = parse_qs(urlparse(callback_url).query)
+        forged = await api.post(
+            "/api/v1/webhooks/higgsfield",
+            params={"nonce": query["nonce"][0], "token": "0" * 64},
+            json={"request_id": "req-1", "status": "completed"},
+        )
+        return replayed.status_code, forged.status_code
+
+    replayed, forged = run_with_fake_higgsfield(scenario)
+
+    assert replayed == 403
+    assert forged == 401
+
+
+def test_each_request_gets_its_own_callback_url(webhooks_on):
+    async def scenario(fake, api):
+        await asyncio.gather(
+            higgsfield_service.generate_image("a lighthouse"),
+            higgsfield_service.generate_image("a harbour"),
+        )
+        return fake
+
+    fake = run_with_fake_higgsfield(scenario)
+
+    assert len(set(fake.callbacks)) == 2
+    assert fake.responses == [202, 202]
@@ -69,6 +69,9 @@ const statusColors: Record<string, { bg: string; text: string }> = {
   images_ready: { bg: "bg-fuchsia-500/20", text: "text-fuchsia-400" },
   completed: { bg: "bg-green-500/20", text: "text-green-400" },
   pending: { bg: "bg-gray-500/20", text: "text-gray-400" },
+  image_generating: { bg: "bg-amber-500/20", text: "text-amber-400" },
+  image_ready: { bg: "bg-fuchsia-500/20", text: "text-fuchsia-400" },
+  image_failed: { bg: "bg-red-500/20", text: "text-red-400" },
 };
 
 export default function ProjectDetailPage({
@@ -224,7 +227,8 @@ export default function ProjectDetailPage({
             break;
             
           case "scene_complete":
-            const completePercent = (data.scene / data.total) * 85 + 10;
+            // Las escenas terminan en cualquier orden: usar el conteo de completadas
+            const completePercent = ((data.completed ?? data.scene) / data.total) * 85 + 10;
             setGenerationProgress(completePercent);
             setProgressMessage(data.message);
             break;
@@ -255,7 +259,7 @@ export default function ProjectDetailPage({
           case "complete":
             setGenerationProgress(100);
             setProgressMessage(data.message);
-            if (data.generated === 0) {
+            if (data.generated === 0 && data.total > 0) {
               setGenerationError(`No se pudo generar ninguna imagen. Probá con otro proveedor.`);
             }
             eventSource.close();